@@ -3,6 +3,7 @@ from .detection_events import (
     ObjectDetectedEvent,
     FallDetectedEvent,
 )
+from .event_bus import BLOCK, COALESCE, DROP_OLDEST, EventBus
 # from .detection_events import (
 #     FaceRecognizedEvent,
 #     ToddlerDetectedEvent,
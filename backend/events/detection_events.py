@@ -14,8 +14,10 @@ class VisionEvent:
 @dataclass
 class ObjectDetectedEvent(VisionEvent):
     name: str = "ObjectDetected"
-    # list of dicts: {'label': str, 'confidence': float, 'bbox': tuple, 'class_id': int}
-    objects: list[dict[str, Any]] = field(default_factory=list)
+    # DetectionBatch (iterates as dict-like views), or a list of dicts:
+    # {'label': str, 'confidence': float, 'bbox': tuple, 'class_id': int}
+    # Call .to_dicts() on a batch before serializing.
+    objects: Any = field(default_factory=list)
 
 @dataclass
 class FallDetectedEvent(VisionEvent):
@@ -23,6 +25,16 @@ class FallDetectedEvent(VisionEvent):
     confidence: float = 0.0
     bbox: tuple[int, int, int, int] = (0, 0, 0, 0)
 
+@dataclass
+class FallStateChangedEvent(VisionEvent):
+    """Published when a fall starts or stops being seen (not on every inference)."""
+    name: str = "FallStateChanged"
+    fall_present: bool = False
+    confidence: float = 0.0
+    bbox: tuple[int, int, int, int] = (0, 0, 0, 0)
+    # time.monotonic() when the inference result that changed the state was ready.
+    detected_at: float = 0.0
+
 @dataclass
 class FaceRecognizedEvent(VisionEvent):
     name: str = "FaceRecognized"
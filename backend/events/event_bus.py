@@ -0,0 +1,273 @@
+"""
+In-process async pub/sub for the detection events.
+
+Processors used to leave their events in ``latest_event`` attributes for
+consumers to poll. They now ``publish`` them on the call's ``EventBus``, and
+each subscriber (alerting, LLM, notifications, recorders, ...) gets them
+through its own bounded queue, drained by its own task, so a slow
+subscriber never delays the publisher or the other subscribers. What happens
+when a subscriber's queue is full is its overflow policy:
+
+- ``COALESCE``: a queued event with the same key (default: the event type)
+  is replaced by the newer one in place; the oldest is dropped only when
+  the queue is full of distinct keys. For state-like events where only the
+  latest matters.
+- ``DROP_OLDEST``: the oldest queued event is discarded.
+- ``BLOCK``: ``publish`` waits until the subscriber has room. For consumers
+  that must see every event (e.g. a recorder); the publisher is slowed down
+  to their pace, so use it sparingly.
+
+Per subscriber, the bus tracks queue depth and publish-to-deliver latency.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+COALESCE = "coalesce"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (COALESCE, DROP_OLDEST, BLOCK)
+
+DEFAULT_QUEUE_SIZE = 64
+
+
+def event_type_key(event: Any) -> Hashable:
+    return type(event).__name__
+
+
+@dataclass
+class _Subscriber:
+    name: str
+    handler: Callable[[Any], Any]
+    event_types: Optional[tuple[type, ...]]
+    policy: str
+    maxsize: int
+    coalesce_key: Callable[[Any], Hashable]
+    # (enqueued loop time, event); keyed by coalesce key for COALESCE.
+    queue: Any = None
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    space: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    blocked: int = 0
+    blocked_seconds: float = 0.0
+    errors: int = 0
+    max_depth: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.queue = OrderedDict() if self.policy == COALESCE else deque()
+        self.space.set()
+
+    def wants(self, event: Any) -> bool:
+        return self.event_types is None or isinstance(event, self.event_types)
+
+    def full(self) -> bool:
+        return len(self.queue) >= self.maxsize
+
+    def put(self, enqueued_ts: float, event: Any) -> None:
+        """Enqueue per the overflow policy (BLOCK callers wait for room first)."""
+        if self.policy == COALESCE:
+            key = self.coalesce_key(event)
+            if key in self.queue:
+                # Keeps its place in line, carries the newer event.
+                self.queue[key] = (enqueued_ts, event)
+                self.coalesced += 1
+                return
+            if self.full():
+                self.queue.popitem(last=False)
+                self.dropped += 1
+            self.queue[key] = (enqueued_ts, event)
+        else:
+            if self.full():
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append((enqueued_ts, event))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        if self.full():
+            self.space.clear()
+        self.wakeup.set()
+
+    def take(self) -> tuple[float, Any]:
+        if self.policy == COALESCE:
+            _, item = self.queue.popitem(last=False)
+        else:
+            item = self.queue.popleft()
+        self.space.set()
+        return item
+
+
+class EventBus:
+    """
+    Fan events out to named subscribers, each with its own queue and task.
+
+    Subscribing again under the same name replaces the previous subscription.
+    Must be used from one event loop; other threads hand events over with
+    ``publish_threadsafe``.
+    """
+
+    def __init__(self, name: str = "event_bus") -> None:
+        self.name = name
+        self._subscribers: dict[str, _Subscriber] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.published_by_type: dict[str, int] = {}
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[Any], Any],
+        *,
+        event_types: Optional[tuple[type, ...]] = None,
+        policy: str = DROP_OLDEST,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        coalesce_key: Callable[[Any], Hashable] = event_type_key,
+    ) -> None:
+        """
+        Deliver published events to ``handler``.
+
+        Args:
+            name: Unique subscriber name.
+            handler: Sync or async callable receiving each event.
+            event_types: Only events that are instances of these (default: all).
+            policy: ``COALESCE``, ``DROP_OLDEST`` or ``BLOCK`` (see module docs).
+            maxsize: Queue bound.
+            coalesce_key: Which events replace each other under ``COALESCE``.
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy must be one of {OVERFLOW_POLICIES}, got {policy!r}")
+        self._loop = asyncio.get_running_loop()
+        self.unsubscribe(name)
+        subscriber = _Subscriber(
+            name=name,
+            handler=handler,
+            event_types=tuple(event_types) if event_types is not None else None,
+            policy=policy,
+            maxsize=max(1, int(maxsize)),
+            coalesce_key=coalesce_key,
+        )
+        subscriber.task = asyncio.create_task(self._deliver_loop(subscriber), name=f"{self.name}_{name}")
+        self._subscribers[name] = subscriber
+
+    def unsubscribe(self, name: str) -> None:
+        subscriber = self._subscribers.pop(name, None)
+        if subscriber is not None and subscriber.task is not None:
+            subscriber.task.cancel()
+            # Unblock publishers waiting on it.
+            subscriber.space.set()
+
+    def subscribers(self) -> list[str]:
+        return list(self._subscribers)
+
+    async def publish(self, event: Any) -> None:
+        """Queue ``event`` for every interested subscriber; waits only on full ``BLOCK`` subscribers."""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._count(event)
+        now = loop.time()
+        for subscriber in list(self._subscribers.values()):
+            if not subscriber.wants(event):
+                continue
+            if subscriber.policy == BLOCK and subscriber.full():
+                subscriber.blocked += 1
+                started = loop.time()
+                while subscriber.full() and self._subscribers.get(subscriber.name) is subscriber:
+                    await subscriber.space.wait()
+                subscriber.blocked_seconds += loop.time() - started
+                if self._subscribers.get(subscriber.name) is not subscriber:
+                    continue
+            subscriber.put(now, event)
+
+    def publish_nowait(self, event: Any) -> None:
+        """
+        Like ``publish`` without waiting: full ``BLOCK`` subscribers drop
+        their oldest event instead. Must run on the bus's loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._count(event)
+        now = self._loop.time()
+        for subscriber in list(self._subscribers.values()):
+            if subscriber.wants(event):
+                subscriber.put(now, event)
+
+    def publish_threadsafe(self, event: Any) -> None:
+        """Publish from another thread (dropped if no subscriber has attached a loop yet)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(lambda: loop.create_task(self.publish(event)))
+
+    def _count(self, event: Any) -> None:
+        self.published += 1
+        key = type(event).__name__
+        self.published_by_type[key] = self.published_by_type.get(key, 0) + 1
+
+    async def _deliver_loop(self, subscriber: _Subscriber) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not subscriber.queue:
+                subscriber.wakeup.clear()
+                await subscriber.wakeup.wait()
+                continue
+
+            enqueued_ts, event = subscriber.take()
+            latency = loop.time() - enqueued_ts
+            subscriber.last_latency = latency
+            subscriber.max_latency = max(subscriber.max_latency, latency)
+            subscriber.total_latency += latency
+            subscriber.delivered += 1
+            try:
+                result = subscriber.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                subscriber.errors += 1
+                logger.exception("Event subscriber %s failed", subscriber.name)
+
+    async def close(self) -> None:
+        subscribers = list(self._subscribers.values())
+        for name in list(self._subscribers):
+            self.unsubscribe(name)
+        await asyncio.gather(
+            *(subscriber.task for subscriber in subscribers if subscriber.task is not None),
+            return_exceptions=True,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "published": self.published,
+            "published_by_type": dict(self.published_by_type),
+            "subscribers": {
+                name: {
+                    "policy": subscriber.policy,
+                    "maxsize": subscriber.maxsize,
+                    "depth": len(subscriber.queue),
+                    "max_depth": subscriber.max_depth,
+                    "delivered": subscriber.delivered,
+                    "dropped": subscriber.dropped,
+                    "coalesced": subscriber.coalesced,
+                    "blocked": subscriber.blocked,
+                    "blocked_ms": subscriber.blocked_seconds * 1000.0,
+                    "errors": subscriber.errors,
+                    "last_latency_ms": subscriber.last_latency * 1000.0,
+                    "max_latency_ms": subscriber.max_latency * 1000.0,
+                    "mean_latency_ms": (
+                        subscriber.total_latency / subscriber.delivered * 1000.0
+                        if subscriber.delivered
+                        else None
+                    ),
+                }
+                for name, subscriber in self._subscribers.items()
+            },
+        }
@@ -0,0 +1,189 @@
+"""
+Spoken fall alerts driven by fall state transitions.
+
+``join_call`` used to poll the fall processor every 250 ms (for a state key
+that never existed). ``FallAlerter`` instead subscribes to the
+``FallStateChangedEvent`` s the fall processor publishes on the call's
+``EventBus`` and responds as soon as one arrives:
+
+- A fall must still be present ``debounce_seconds`` after it was first seen
+  before it is announced (0 announces on the first detection).
+- Once announced, it is not announced again until it has been gone for
+  ``hold_seconds``, so a person flickering in and out of the lying pose
+  gets one alert.
+
+The latency from the inference result to the ``respond`` call (and to its
+completion) is recorded per alert.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from .detection_events import FallStateChangedEvent
+from .event_bus import DROP_OLDEST, EventBus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_SECONDS = 0.0
+DEFAULT_HOLD_SECONDS = 10.0
+DEFAULT_MESSAGE = "Fall detected"
+
+
+class FallAlerter:
+    """
+    Args:
+        respond: Async callable speaking the alert (e.g. ``PhraseAudioCache.speak`` bound to the agent).
+        debounce_seconds: How long a fall must persist before it is announced.
+        hold_seconds: How long a fall must be gone before a new one is announced.
+        message: Text passed to ``respond``.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[str], Awaitable[Any]],
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        hold_seconds: float = DEFAULT_HOLD_SECONDS,
+        message: str = DEFAULT_MESSAGE,
+    ) -> None:
+        self.respond = respond
+        self.debounce_seconds = max(0.0, float(debounce_seconds))
+        self.hold_seconds = max(0.0, float(hold_seconds))
+        self.message = message
+
+        self._bus: Optional[EventBus] = None
+        self._name = "fall_alerter"
+        self._debounce: Optional[asyncio.TimerHandle] = None
+        self._rearm: Optional[asyncio.TimerHandle] = None
+        self._responses: set[asyncio.Task] = set()
+        self.announced = False
+
+        self.alerts = 0
+        self.debounced = 0
+        self.held = 0
+        self.errors = 0
+        self.last_dispatch_latency: Optional[float] = None
+        self.max_dispatch_latency = 0.0
+        self.total_dispatch_latency = 0.0
+        self.last_response_latency: Optional[float] = None
+        self.max_response_latency = 0.0
+        self.total_response_latency = 0.0
+        self.responses = 0
+
+    def attach(
+        self,
+        bus: EventBus,
+        name: str = "fall_alerter",
+        initial: Optional[FallStateChangedEvent] = None,
+    ) -> None:
+        """
+        Start listening to ``bus``. Must be called from the event loop.
+
+        ``initial`` is the fall state at attach time (e.g. the fall processor's
+        ``fall_state_event``): transitions are only published when the state
+        flips, so a fall already in progress would otherwise go unannounced.
+        """
+        self._bus, self._name = bus, name
+        # Transitions are rare; keep every one of them.
+        bus.subscribe(name, self.on_event, event_types=(FallStateChangedEvent,), policy=DROP_OLDEST, maxsize=16)
+        if initial is not None and initial.fall_present:
+            self.on_event(initial)
+
+    def on_event(self, event: FallStateChangedEvent) -> None:
+        loop = asyncio.get_running_loop()
+        if event.fall_present:
+            if self._rearm is not None:
+                # Back within the hold time: still the same fall.
+                self._rearm.cancel()
+                self._rearm = None
+                self.held += 1
+            if self.announced or self._debounce is not None:
+                return
+            remaining = self.debounce_seconds - (time.monotonic() - event.detected_at)
+            if remaining <= 0:
+                self._announce(event)
+            else:
+                self._debounce = loop.call_later(remaining, self._debounced, event)
+        else:
+            if self._debounce is not None:
+                # Gone before the debounce time: not announced.
+                self._debounce.cancel()
+                self._debounce = None
+                self.debounced += 1
+            if self.announced and self._rearm is None:
+                self._rearm = loop.call_later(self.hold_seconds, self._rearmed)
+
+    def _debounced(self, event: FallStateChangedEvent) -> None:
+        self._debounce = None
+        self._announce(event)
+
+    def _rearmed(self) -> None:
+        self._rearm = None
+        self.announced = False
+
+    def _announce(self, event: FallStateChangedEvent) -> None:
+        self.announced = True
+        self.alerts += 1
+        task = asyncio.get_running_loop().create_task(self._respond(event))
+        self._responses.add(task)
+        task.add_done_callback(self._responses.discard)
+
+    async def _respond(self, event: FallStateChangedEvent) -> None:
+        dispatched = time.monotonic()
+        latency = dispatched - event.detected_at
+        self.last_dispatch_latency = latency
+        self.max_dispatch_latency = max(self.max_dispatch_latency, latency)
+        self.total_dispatch_latency += latency
+        logger.info(
+            "Fall alert (confidence %.2f) dispatched %.1f ms after detection",
+            event.confidence,
+            latency * 1000.0,
+        )
+        try:
+            await self.respond(self.message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors += 1
+            logger.exception("Fall alert response failed")
+            return
+        latency = time.monotonic() - event.detected_at
+        self.responses += 1
+        self.last_response_latency = latency
+        self.max_response_latency = max(self.max_response_latency, latency)
+        self.total_response_latency += latency
+
+    async def close(self) -> None:
+        if self._bus is not None:
+            self._bus.unsubscribe(self._name)
+            self._bus = None
+        for handle in (self._debounce, self._rearm):
+            if handle is not None:
+                handle.cancel()
+        self._debounce = self._rearm = None
+        for task in list(self._responses):
+            task.cancel()
+        await asyncio.gather(*self._responses, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else value * 1000.0
+
+        return {
+            "debounce_seconds": self.debounce_seconds,
+            "hold_seconds": self.hold_seconds,
+            "announced": self.announced,
+            "alerts": self.alerts,
+            "debounced": self.debounced,
+            "held": self.held,
+            "errors": self.errors,
+            "last_dispatch_latency_ms": ms(self.last_dispatch_latency),
+            "max_dispatch_latency_ms": ms(self.max_dispatch_latency),
+            "mean_dispatch_latency_ms": ms(self.total_dispatch_latency / self.alerts) if self.alerts else None,
+            "last_response_latency_ms": ms(self.last_response_latency),
+            "max_response_latency_ms": ms(self.max_response_latency),
+            "mean_response_latency_ms": (
+                ms(self.total_response_latency / self.responses) if self.responses else None
+            ),
+        }
@@ -0,0 +1,437 @@
+"""
+Rolling world-state digest for the LLM.
+
+Every processor publishes several events per second; forwarding them to
+the LLM (the slowest and most expensive stage) would flood it with
+near-identical detection lists. ``WorldDigest`` subscribes to them on the
+call's ``EventBus`` and keeps one line of state instead, e.g.::
+
+    toddler present 40 s, near scissors; adult left 10 s ago; cup present 2 min
+
+It is sent to the LLM only when:
+
+- the situation changed (something appeared or left, a toddler moved next
+  to or away from an object, a fall started or ended, crying started or
+  stopped), at most every ``min_interval_seconds`` except for falls and
+  crying, or
+- ``cadence_seconds`` passed since the last push while something is in
+  view (0 disables the refresh).
+
+Every push is charged against a hard ``tokens_per_minute`` budget (prompt
+size estimated at ``CHARS_PER_TOKEN`` characters per token, plus
+``response_tokens`` reserved for the reply); a push that doesn't fit waits
+until enough of the last minute's spend has expired. Replies are cached by
+situation, so returning to one already answered (the toddler walks back to
+the scissors) replays the cached reply instead of asking again.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import numpy as np
+
+from processors.base import as_boxes, box_gap_matrix
+from processors.detections import as_batch
+from .detection_events import CryDetectedEvent, FallStateChangedEvent, ObjectDetectedEvent
+from .event_bus import COALESCE, EventBus
+
+logger = logging.getLogger(__name__)
+
+# Not seen for this long counts as gone. Longer than the motion gate's
+# refresh, so a still scene doesn't empty out between inferences.
+DEFAULT_STALE_SECONDS = 15.0
+# How long "... left N s ago" stays in the digest.
+DEFAULT_FORGET_SECONDS = 120.0
+DEFAULT_CADENCE_SECONDS = 120.0
+DEFAULT_MIN_INTERVAL_SECONDS = 5.0
+DEFAULT_TOKENS_PER_MINUTE = 2000
+DEFAULT_RESPONSE_TOKENS = 64
+DEFAULT_CACHE_SIZE = 32
+DEFAULT_CACHE_SECONDS = 600.0
+DEFAULT_TICK_SECONDS = 1.0
+DEFAULT_PREFIX = "Room update: "
+
+CHARS_PER_TOKEN = 4
+BUDGET_WINDOW_SECONDS = 60.0
+# An object is "near" a toddler when the gap between their boxes is within
+# this fraction of the toddler box's longer side.
+NEAR_FACTOR = 0.5
+
+TODDLER = "toddler"
+FALL = "fall"
+CRY = "crying"
+# Listed first, in this order; everything else follows alphabetically.
+PRIORITY_LABELS = (FALL, CRY, TODDLER, "adult")
+# Labels pushed without waiting out ``min_interval_seconds``.
+URGENT_LABELS = frozenset({FALL, CRY})
+# (present, gone) wording for the non-object entities.
+PHRASES = {
+    FALL: ("person down {}", "person got up {} ago"),
+    CRY: ("crying {}", "crying stopped {} ago"),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def format_duration(seconds: float) -> str:
+    seconds = max(0.0, seconds)
+    if seconds < 60:
+        return f"{int(seconds)} s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{int(seconds // 3600)} h"
+
+
+def response_text(response: Any) -> Optional[str]:
+    """The text of an LLM reply (``LLMResponseEvent`` or plain string), if any."""
+    text = response if isinstance(response, str) else getattr(response, "text", None)
+    return (text.strip() or None) if isinstance(text, str) else None
+
+
+@dataclass
+class _Entity:
+    label: str
+    first_seen: float
+    last_seen: float
+    present: bool = True
+    count: int = 1
+    boxes: np.ndarray = field(default_factory=lambda: np.zeros((0, 4)))
+
+
+class WorldDigest:
+    """
+    Args:
+        respond: Async callable sending a prompt to the LLM; its reply
+            (``LLMResponseEvent`` or string) is cached when it has text.
+        replay: Optional async callable speaking a cached reply (e.g.
+            ``agent.say``). Without it, repeated situations are just skipped.
+        cadence_seconds: Refresh interval while something is in view (0: only on change).
+        min_interval_seconds: Shortest gap between pushes, except for falls and crying.
+        tokens_per_minute: Hard budget over any 60 s window.
+        response_tokens: Tokens reserved per push for the reply.
+        stale_seconds: How long something may go unseen before it counts as gone.
+        forget_seconds: How long gone things are still mentioned.
+        cache_size: Situations whose replies are kept.
+        cache_seconds: How long a cached reply may be replayed.
+        prefix: Prepended to the digest in the prompt.
+        clock: Monotonic time source.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[str], Awaitable[Any]],
+        replay: Optional[Callable[[str], Awaitable[Any]]] = None,
+        cadence_seconds: float = DEFAULT_CADENCE_SECONDS,
+        min_interval_seconds: float = DEFAULT_MIN_INTERVAL_SECONDS,
+        tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+        response_tokens: int = DEFAULT_RESPONSE_TOKENS,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        forget_seconds: float = DEFAULT_FORGET_SECONDS,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_seconds: float = DEFAULT_CACHE_SECONDS,
+        prefix: str = DEFAULT_PREFIX,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.respond = respond
+        self.replay = replay
+        self.cadence_seconds = max(0.0, float(cadence_seconds))
+        self.min_interval_seconds = max(0.0, float(min_interval_seconds))
+        self.tokens_per_minute = max(1, int(tokens_per_minute))
+        self.response_tokens = max(0, int(response_tokens))
+        self.stale_seconds = max(0.0, float(stale_seconds))
+        self.forget_seconds = max(0.0, float(forget_seconds))
+        self.cache_size = max(0, int(cache_size))
+        self.cache_seconds = max(0.0, float(cache_seconds))
+        self.prefix = prefix
+        self.clock = clock
+
+        self._entities: dict[str, _Entity] = {}
+        # Event source (ObjectDetectedEvent.name) -> labels in its latest snapshot.
+        self._sources: dict[str, set[str]] = {}
+        self._spent: deque[tuple[float, int]] = deque()
+        # Situation -> (time cached, reply).
+        self._cache: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()
+        self._pushed_situation: Hashable = ()
+        self._last_push: Optional[float] = None
+        self._bus: Optional[EventBus] = None
+        self._name = "world_digest"
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.events = 0
+        self.pushes = 0
+        self.cadence_pushes = 0
+        self.cache_hits = 0
+        self.budget_deferred = 0
+        self.throttled = 0
+        self.errors = 0
+        self.tokens_total = 0
+        self.last_digest = ""
+        self.last_response: Optional[str] = None
+        self.last_response_latency: Optional[float] = None
+        self.max_response_latency = 0.0
+
+    def attach(self, bus: EventBus, name: str = "world_digest") -> None:
+        """Start listening to ``bus`` and pushing digests. Must be called from the event loop."""
+        self._bus, self._name = bus, name
+        # Only the latest snapshot per source matters.
+        bus.subscribe(
+            name,
+            self.observe,
+            event_types=(ObjectDetectedEvent, FallStateChangedEvent, CryDetectedEvent),
+            policy=COALESCE,
+            maxsize=16,
+            coalesce_key=lambda event: (type(event).__name__, event.name),
+        )
+        self._task = asyncio.create_task(self._run(), name=name)
+
+    # ── State ────────────────────────────────────────────────────────
+
+    def observe(self, event: Any) -> None:
+        """Fold one detection event into the state."""
+        now = self.clock()
+        self.events += 1
+        if isinstance(event, ObjectDetectedEvent):
+            batch = as_batch(event.objects)
+            labels = np.array([str(label).strip().lower() for label in batch.labels], dtype=object)
+            seen = set(labels.tolist())
+            for label in seen:
+                selected = labels == label
+                self._see(label, now, int(selected.sum()), as_boxes(batch.boxes[selected]))
+            # A snapshot lists everything its source sees: the rest is gone.
+            for label in self._sources.get(event.name, set()) - seen:
+                self._lose(label)
+            self._sources[event.name] = seen
+        elif isinstance(event, FallStateChangedEvent):
+            if event.fall_present:
+                self._see(FALL, now)
+            else:
+                self._lose(FALL)
+        elif isinstance(event, CryDetectedEvent):
+            self._see(CRY, now)
+        self._wakeup.set()
+
+    def _see(self, label: str, now: float, count: int = 1, boxes: Optional[np.ndarray] = None) -> None:
+        entity = self._entities.get(label)
+        if entity is None or not entity.present:
+            entity = self._entities[label] = _Entity(label=label, first_seen=now, last_seen=now)
+        entity.last_seen = now
+        entity.count = count
+        if boxes is not None:
+            entity.boxes = boxes
+
+    def _lose(self, label: str) -> None:
+        entity = self._entities.get(label)
+        if entity is not None:
+            entity.present = False
+
+    def _expire(self, now: float) -> None:
+        for label, entity in list(self._entities.items()):
+            if entity.present and now - entity.last_seen > self.stale_seconds:
+                entity.present = False
+            if not entity.present and now - entity.last_seen > self.forget_seconds:
+                del self._entities[label]
+
+    def _near(self) -> list[str]:
+        """Objects next to a toddler, alphabetically."""
+        toddler = self._entities.get(TODDLER)
+        if toddler is None or not toddler.present or not len(toddler.boxes):
+            return []
+        sides = np.maximum(toddler.boxes[:, 2] - toddler.boxes[:, 0], toddler.boxes[:, 3] - toddler.boxes[:, 1])
+        near = []
+        for label, entity in self._entities.items():
+            if label in PRIORITY_LABELS or not entity.present or not len(entity.boxes):
+                continue
+            gaps = box_gap_matrix(toddler.boxes, entity.boxes)
+            if (gaps <= NEAR_FACTOR * sides[:, None]).any():
+                near.append(label)
+        return sorted(near)
+
+    def _ordered(self) -> list[_Entity]:
+        def rank(entity: _Entity) -> tuple[int, str]:
+            if entity.label in PRIORITY_LABELS:
+                return PRIORITY_LABELS.index(entity.label), ""
+            return len(PRIORITY_LABELS), entity.label
+
+        return sorted(self._entities.values(), key=rank)
+
+    def situation(self) -> Hashable:
+        """What is in view and what is next to the toddler, without timings: the cache key."""
+        present = tuple(
+            (entity.label, entity.count) for entity in self._ordered() if entity.present
+        )
+        return present + (("near", tuple(self._near())),) if present else ()
+
+    def digest(self, now: Optional[float] = None) -> str:
+        now = self.clock() if now is None else now
+        self._expire(now)
+        near = self._near()
+        parts = []
+        for entity in self._ordered():
+            if entity.present:
+                phrase = PHRASES.get(entity.label, (f"{self._name_of(entity)} present {{}}", None))[0]
+                part = phrase.format(format_duration(now - entity.first_seen))
+                if entity.label == TODDLER and near:
+                    part += ", near " + ", ".join(near)
+            else:
+                phrase = PHRASES.get(entity.label, (None, f"{entity.label} left {{}} ago"))[1]
+                part = phrase.format(format_duration(now - entity.last_seen))
+            parts.append(part)
+        return "; ".join(parts) if parts else "nobody in view"
+
+    @staticmethod
+    def _name_of(entity: _Entity) -> str:
+        return entity.label if entity.count == 1 else f"{entity.count} x {entity.label}"
+
+    # ── Pushing ──────────────────────────────────────────────────────
+
+    def tokens_last_minute(self, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        while self._spent and now - self._spent[0][0] >= BUDGET_WINDOW_SECONDS:
+            self._spent.popleft()
+        return sum(tokens for _, tokens in self._spent)
+
+    async def poll(self) -> Optional[str]:
+        """
+        Push the digest if it is due; returns what was sent (or replayed from cache), else None.
+        """
+        now = self.clock()
+        text = self.digest(now)
+        situation = self.situation()
+        changed = situation != self._pushed_situation
+        since = None if self._last_push is None else now - self._last_push
+        cadence_due = (
+            bool(situation)
+            and self.cadence_seconds > 0
+            and since is not None
+            and since >= self.cadence_seconds
+        )
+        if not changed and not cadence_due:
+            return None
+
+        if changed:
+            urgent = any(label in URGENT_LABELS for label, *_ in situation)
+            if since is not None and since < self.min_interval_seconds and not urgent:
+                self.throttled += 1
+                return None
+            cached = self._cached(situation, now)
+            if cached is not None:
+                self.cache_hits += 1
+                self._pushed(situation, now, text)
+                if self.replay is not None:
+                    try:
+                        await self.replay(cached)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        self.errors += 1
+                        logger.exception("Replaying a cached digest reply failed")
+                return text
+
+        prompt = self.prefix + text
+        cost = estimate_tokens(prompt) + self.response_tokens
+        if self.tokens_last_minute(now) + cost > self.tokens_per_minute:
+            self.budget_deferred += 1
+            return None
+        self._spent.append((now, cost))
+        self.tokens_total += cost
+        self._pushed(situation, now, text)
+        self.pushes += 1
+        if not changed:
+            self.cadence_pushes += 1
+
+        started = self.clock()
+        try:
+            response = await self.respond(prompt)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors += 1
+            logger.exception("Sending the world digest to the LLM failed")
+            return text
+        latency = self.clock() - started
+        self.last_response_latency = latency
+        self.max_response_latency = max(self.max_response_latency, latency)
+        reply = response_text(response)
+        if reply is not None:
+            self.last_response = reply
+            self._cache_reply(situation, reply, now)
+        return text
+
+    def _pushed(self, situation: Hashable, now: float, text: str) -> None:
+        self._pushed_situation = situation
+        self._last_push = now
+        self.last_digest = text
+
+    def _cached(self, situation: Hashable, now: float) -> Optional[str]:
+        entry = self._cache.get(situation)
+        if entry is None:
+            return None
+        cached_at, reply = entry
+        if now - cached_at > self.cache_seconds:
+            del self._cache[situation]
+            return None
+        self._cache.move_to_end(situation)
+        return reply
+
+    def _cache_reply(self, situation: Hashable, reply: str, now: float) -> None:
+        if not self.cache_size or not situation:
+            return
+        self._cache[situation] = (now, reply)
+        self._cache.move_to_end(situation)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _run(self) -> None:
+        # Ticks as well as wakes on events: things also change by going stale.
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("World digest update failed")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), DEFAULT_TICK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        if self._bus is not None:
+            self._bus.unsubscribe(self._name)
+            self._bus = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "digest": self.last_digest,
+            "last_response": self.last_response,
+            "cadence_seconds": self.cadence_seconds,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_last_minute": self.tokens_last_minute(),
+            "tokens_total": self.tokens_total,
+            "events": self.events,
+            "pushes": self.pushes,
+            "cadence_pushes": self.cadence_pushes,
+            "cache_hits": self.cache_hits,
+            "cached_situations": len(self._cache),
+            "budget_deferred": self.budget_deferred,
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "last_response_latency_ms": (
+                None if self.last_response_latency is None else self.last_response_latency * 1000.0
+            ),
+            "max_response_latency_ms": self.max_response_latency * 1000.0,
+        }
@@ -29,17 +29,19 @@ def main(device_id: int):
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
                 
-            frame = camera.get_latest_frame()
-            if frame is None:
+            frame_ref = camera.acquire_latest_frame()
+            if frame_ref is None:
                 time.sleep(0.01)
                 continue
                 
-            # Process the frame
-            # The processor returns the annotated frame (boxes drawn)
-            annotated_frame = detector.process_frame(frame_count, frame)
-            
-            # Fall detector expects the _detect synchronous method for now
-            fall_detections = fall_detector._detect(frame_count, frame)
+            # Process the frame straight from the camera ring (no copy); the
+            # processor returns its own annotated copy (boxes drawn)
+            with frame_ref:
+                frame = frame_ref.array
+                annotated_frame = detector.process_frame(frame_count, frame)
+                
+                # Fall detector expects the _detect synchronous method for now
+                fall_detections = fall_detector._detect(frame_count, frame)
             fall_detector.latest_detections = fall_detections
             
             # Draw fall detections
@@ -0,0 +1,103 @@
+"""
+Fixed-capacity float32 ring for accumulating audio samples.
+
+The cry detector used to grow its buffer with ``np.concatenate`` on every
+packet and slice it for every chunk, reallocating the whole buffer about 50
+times a second. ``AudioRing`` allocates once. Its storage is mirrored: every
+sample is written at ``i`` and at ``i + capacity``, so any run of up to
+``capacity`` unread samples is one contiguous slice and ``window`` returns it
+as a view, never a copy, even when it wraps around the end.
+
+Single writer and single reader, on the same thread (or under a lock the
+caller holds). When a write would overflow the unread samples, the oldest
+are dropped and counted in ``overrun_samples``.
+"""
+
+from typing import Any
+
+import numpy as np
+
+
+class AudioRing:
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=np.float32)
+        # Read position in [0, capacity) and number of unread samples.
+        self._start = 0
+        self._size = 0
+
+        self.written_samples = 0
+        self.overrun_samples = 0
+
+    @property
+    def size(self) -> int:
+        """Unread samples."""
+        return self._size
+
+    def write(self, samples: np.ndarray, scale: float = 1.0) -> None:
+        """
+        Append ``samples`` (any numeric 1-D array), times ``scale``, converting
+        to float32 straight into the ring.
+        """
+        samples = np.asarray(samples).reshape(-1)
+        count = len(samples)
+        if not count:
+            return
+        if count > self.capacity:
+            # Only the newest ``capacity`` samples can be kept.
+            self.overrun_samples += count - self.capacity
+            self.written_samples += count - self.capacity
+            samples = samples[-self.capacity:]
+            count = self.capacity
+        overflow = self._size + count - self.capacity
+        if overflow > 0:
+            self.consume(overflow)
+            self.overrun_samples += overflow
+
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        self._put(end, samples[:first], scale)
+        if first < count:
+            self._put(0, samples[first:], scale)
+        self._size += count
+        self.written_samples += count
+
+    def _put(self, offset: int, samples: np.ndarray, scale: float) -> None:
+        count = len(samples)
+        low = self._data[offset:offset + count]
+        if scale == 1.0:
+            low[...] = samples
+        else:
+            np.multiply(samples, scale, out=low, casting="unsafe")
+        # The mirror half, so reads across the wrap stay contiguous.
+        self._data[offset + self.capacity:offset + self.capacity + count] = low
+
+    def window(self, count: int) -> np.ndarray:
+        """
+        View of the oldest ``count`` unread samples (without consuming them).
+
+        Valid until the next ``write``; copy it to keep it longer.
+        """
+        if count > self._size:
+            raise ValueError(f"only {self._size} samples buffered, asked for {count}")
+        return self._data[self._start:self._start + count]
+
+    def consume(self, count: int) -> None:
+        """Drop the oldest ``count`` unread samples."""
+        count = min(int(count), self._size)
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "buffered": self._size,
+            "written_samples": self.written_samples,
+            "overrun_samples": self.overrun_samples,
+        }
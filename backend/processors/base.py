@@ -9,6 +9,8 @@ import cv2
 import numpy as np
 from typing import Sequence
 
+from .detections import DetectionBatch
+
 
 # ── Drawing helpers ──────────────────────────────────────────────
 
@@ -69,10 +71,16 @@ def draw_zone(
     Returns:
         Frame with zone overlay
     """
-    overlay = frame.copy()
-    pts = np.array(polygon, dtype=np.int32)
-    cv2.fillPoly(overlay, [pts], color)
-    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+    pts = np.array(polygon, dtype=np.int32).reshape(-1, 2)
+    # Blend only the polygon's bounding rectangle, not a copy of the whole frame.
+    x, y, w, h = cv2.boundingRect(pts)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(frame.shape[1], x + w), min(frame.shape[0], y + h)
+    if x0 < x1 and y0 < y1:
+        roi = frame[y0:y1, x0:x1]
+        overlay = roi.copy()
+        cv2.fillPoly(overlay, [pts], color, offset=(-x0, -y0))
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
     cv2.polylines(frame, [pts], isClosed=True, color=color, thickness=2)
 
     if label and len(polygon) > 0:
@@ -87,11 +95,122 @@ def draw_zone(
 
 
 # ── Geometry helpers ─────────────────────────────────────────────
+#
+# The array versions compare many boxes / points / zones at once; the scalar
+# helpers below them are thin wrappers kept for existing callers.
+
+def as_boxes(bboxes) -> np.ndarray:
+    """
+    Coerce bounding boxes to an (N, 4) float64 array of (x1, y1, x2, y2).
+
+    Accepts a list of tuples, a single tuple, or an existing array.
+    """
+    boxes = np.asarray(bboxes, dtype=np.float64)
+    if boxes.size == 0:
+        return boxes.reshape(0, 4)
+    return boxes.reshape(-1, 4)
+
+
+def bbox_centers(bboxes) -> np.ndarray:
+    """
+    Return the (N, 2) integer-pixel centers (cx, cy) of N boxes.
+
+    Centers are floored like ``bbox_center`` so both APIs agree.
+    """
+    boxes = as_boxes(bboxes)
+    return np.floor((boxes[:, :2] + boxes[:, 2:]) / 2.0)
+
+
+def iou_matrix(bboxes_a, bboxes_b) -> np.ndarray:
+    """
+    Calculate the N x M IoU (Intersection over Union) matrix of two box sets.
+    """
+    a = as_boxes(bboxes_a)[:, None, :]
+    b = as_boxes(bboxes_b)[None, :, :]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0.0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0.0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+def center_distance_matrix(bboxes_a, bboxes_b) -> np.ndarray:
+    """
+    Calculate the N x M pixel distances between the centers of two box sets.
+    """
+    a = bbox_centers(bboxes_a)[:, None, :]
+    b = bbox_centers(bboxes_b)[None, :, :]
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1])
+
+
+def box_gap_matrix(bboxes_a, bboxes_b) -> np.ndarray:
+    """
+    Calculate the N x M pixel distances between the edges of two box sets
+    (0 where boxes touch or overlap).
+    """
+    a = as_boxes(bboxes_a)[:, None, :]
+    b = as_boxes(bboxes_b)[None, :, :]
+    dx = np.clip(np.maximum(a[..., 0] - b[..., 2], b[..., 0] - a[..., 2]), 0.0, None)
+    dy = np.clip(np.maximum(a[..., 1] - b[..., 3], b[..., 1] - a[..., 3]), 0.0, None)
+    return np.hypot(dx, dy)
+
+
+def points_in_polygons(
+    points,
+    polygons: Sequence[Sequence[tuple[int, int]]],
+) -> np.ndarray:
+    """
+    Test many points against many polygons at once.
+
+    Args:
+        points: (N, 2) array-like of (x, y)
+        polygons: K polygons, each a list of (x, y) vertices (any lengths)
+
+    Returns:
+        (N, K) bool array; True if the point is inside or on the edge of the
+        polygon (same rule as ``cv2.pointPolygonTest(...) >= 0``)
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    inside = np.zeros((len(pts), len(polygons)), dtype=bool)
+    vertex_sets = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in polygons]
+    columns = [k for k, vertices in enumerate(vertex_sets) if len(vertices)]
+    if not columns or not len(pts):
+        return inside
+
+    # All zones' edges side by side, so every (point, edge) pair is one array op.
+    starts = np.cumsum([0] + [len(vertex_sets[k]) for k in columns[:-1]])
+    first = np.concatenate([vertex_sets[k] for k in columns])
+    second = np.concatenate([np.roll(vertex_sets[k], -1, axis=0) for k in columns])
+    x1, y1, x2, y2 = first[:, 0], first[:, 1], second[:, 0], second[:, 1]
+    px, py = pts[:, 0:1], pts[:, 1:2]
+    dx, dy = x2 - x1, y2 - y1
+    # > 0 when the point is left of the edge direction, 0 when collinear.
+    cross = dx * (py - y1) - dy * (px - x1)
+
+    # Even-odd rule: count edges crossed by a ray going right from each point.
+    # For an edge straddling the ray, "crossing right of the point" is
+    # cross * dy > 0, which avoids dividing by dy.
+    crossed = ((y1 > py) != (y2 > py)) & (cross * dy > 0)
+    crossings = np.add.reduceat(crossed.astype(np.int32), starts, axis=1)
+
+    # Points exactly on an edge count as inside.
+    on_edge = (
+        (np.abs(cross) <= 1e-9)
+        & (px >= np.minimum(x1, x2)) & (px <= np.maximum(x1, x2))
+        & (py >= np.minimum(y1, y2)) & (py <= np.maximum(y1, y2))
+    )
+    touching = np.logical_or.reduceat(on_edge, starts, axis=1)
+    inside[:, columns] = (crossings % 2 == 1) | touching
+    return inside
+
 
 def bbox_center(bbox: tuple[int, int, int, int]) -> tuple[int, int]:
     """Return the center point (cx, cy) of a bounding box (x1, y1, x2, y2)."""
-    x1, y1, x2, y2 = bbox
-    return ((x1 + x2) // 2, (y1 + y2) // 2)
+    cx, cy = bbox_centers(bbox)[0]
+    return (int(cx), int(cy))
 
 
 def calculate_distance(
@@ -101,9 +220,7 @@ def calculate_distance(
     """
     Calculate pixel distance between the centers of two bounding boxes.
     """
-    c1 = bbox_center(bbox1)
-    c2 = bbox_center(bbox2)
-    return float(np.sqrt((c1[0] - c2[0]) ** 2 + (c1[1] - c2[1]) ** 2))
+    return float(center_distance_matrix(bbox1, bbox2)[0, 0])
 
 
 def is_inside_zone(
@@ -111,14 +228,12 @@ def is_inside_zone(
     polygon: Sequence[tuple[int, int]],
 ) -> bool:
     """
-    Check if a point is inside a polygon using OpenCV's pointPolygonTest.
+    Check if a point is inside a polygon (edges count as inside).
 
     Returns:
         True if the point is inside or on the edge of the polygon
     """
-    pts = np.array(polygon, dtype=np.float32)
-    result = cv2.pointPolygonTest(pts, (float(point[0]), float(point[1])), False)
-    return result >= 0
+    return bool(points_in_polygons([point], [polygon])[0, 0])
 
 
 def bbox_overlap_ratio(
@@ -128,20 +243,7 @@ def bbox_overlap_ratio(
     """
     Calculate the IoU (Intersection over Union) of two bounding boxes.
     """
-    x1 = max(bbox1[0], bbox2[0])
-    y1 = max(bbox1[1], bbox2[1])
-    x2 = min(bbox1[2], bbox2[2])
-    y2 = min(bbox1[3], bbox2[3])
-
-    if x2 <= x1 or y2 <= y1:
-        return 0.0
-
-    intersection = (x2 - x1) * (y2 - y1)
-    area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
-    area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
-    union = area1 + area2 - intersection
-
-    return intersection / union if union > 0 else 0.0
+    return float(iou_matrix(bbox1, bbox2)[0, 0])
 
 
 # ── Detection result helpers ────────────────────────────────────
@@ -150,20 +252,12 @@ def format_yolo_detections(results) -> list[dict]:
     """
     Convert YOLO results to a standardized list of detection dicts.
 
+    Processors keep the array form (``DetectionBatch.from_ultralytics``);
+    this is the dict view of it for callers that want plain dicts.
+
     Returns:
         List of dicts with keys: label, confidence, bbox (x1,y1,x2,y2), class_id
     """
-    detections = []
-
-    if results and len(results) > 0:
-        result = results[0]  # First image result
-        for box in result.boxes:
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            detections.append({
-                "label": result.names[int(box.cls[0])],
-                "confidence": float(box.conf[0]),
-                "bbox": (int(x1), int(y1), int(x2), int(y2)),
-                "class_id": int(box.cls[0]),
-            })
-
-    return detections
+    if not results:
+        return []
+    return DetectionBatch.from_ultralytics(results[0]).to_dicts()
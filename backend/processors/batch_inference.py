@@ -0,0 +1,305 @@
+"""
+Dynamic micro-batching for the ultralytics models.
+
+When several cameras or calls run in one process, each processor calls its
+YOLO model on a single frame and pays the per-call overhead (pre-processing
+setup, a forward pass with batch size 1, NMS bookkeeping) every time.
+``BatchInferenceServer`` keeps one ``MicroBatcher`` per model key. A batcher
+collects frames from any number of callers for up to ``max_wait_ms`` (or
+until ``max_batch_size`` frames are waiting), runs them as one batch, and
+hands each caller back its own result.
+
+Each frame is submitted with its caller's own ``run_batch`` (bound to that
+caller's model lease), and a batch runs through one of its own callers', so
+a batcher never keeps a closed session's processor or model alive. Callers
+``release`` their key when they close; the batcher is dropped with the last.
+
+Batches run through the ``InferenceScheduler`` when one is given, so batched
+jobs keep their owner's priority, deadline and CPU budget.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+
+from .inference_scheduler import InferenceScheduler
+
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 8.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Request:
+    frame: np.ndarray
+    run_batch: Callable[[list[np.ndarray]], list[Any]]
+    postprocess: Optional[Callable[[Any], Any]]
+    future: asyncio.Future
+    enqueued_ts: float
+
+
+@dataclass
+class _BatchStats:
+    batches: int = 0
+    requests: int = 0
+    errors: int = 0
+    total_queue_seconds: float = 0.0
+    max_queue_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+    size_histogram: dict[int, int] = field(default_factory=dict)
+
+
+class MicroBatcher:
+    """
+    Collects frames for one model and runs them as a single batch.
+
+    Args:
+        name: Key used in logs and stats.
+        owner: Scheduler owner the batches run as (its priority, deadline
+            and budget apply to every batch).
+        scheduler: Optional scheduler; without one batches run via
+            ``asyncio.to_thread``.
+        max_batch_size: Flush as soon as this many frames are waiting.
+        max_wait_ms: Flush at most this long after the first frame arrives.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        owner: str,
+        scheduler: Optional[InferenceScheduler] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ) -> None:
+        self.name = name
+        self.owner = owner
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+        self._scheduler = scheduler
+
+        self._pending: list[_Request] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = _BatchStats()
+
+    async def submit(
+        self,
+        frame: np.ndarray,
+        run_batch: Callable[[list[np.ndarray]], list[Any]],
+        postprocess: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Queue one frame and wait for its (optionally post-processed) result.
+
+        ``run_batch`` is a blocking callable taking a list of frames and
+        returning one result per frame, in order (e.g. the caller's
+        ``lease.infer(frames, ...)``); every caller of a batcher runs the same
+        model, so the batch runs through any one of them. ``postprocess``
+        runs on the inference thread right after the batch, so Python-heavy
+        result parsing stays off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._collect_loop(), name=f"batcher_{self.name}")
+
+        request = _Request(
+            frame=frame,
+            run_batch=run_batch,
+            postprocess=postprocess,
+            future=loop.create_future(),
+            enqueued_ts=loop.time(),
+        )
+        self._pending.append(request)
+        self._wakeup.set()
+        return await request.future
+
+    async def _collect_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Give other callers a short window to join this batch.
+            flush_at = self._pending[0].enqueued_ts + self.max_wait_seconds
+            while len(self._pending) < self.max_batch_size:
+                remaining = flush_at - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            batch = [request for request in batch if not request.future.done()]
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        frames = [request.frame for request in batch]
+        postprocessors = [request.postprocess for request in batch]
+        run_batch = batch[0].run_batch
+        try:
+            if self._scheduler is not None:
+                outcomes = await self._scheduler.submit(
+                    self.owner,
+                    self._execute,
+                    run_batch,
+                    frames,
+                    postprocessors,
+                    stream=self,
+                )
+            else:
+                outcomes = await asyncio.to_thread(self._execute, run_batch, frames, postprocessors)
+        except Exception as error:
+            # Scheduler drops (JobDropped) and model failures reach every caller.
+            self._stats.errors += 1
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(error)
+            return
+
+        stats = self._stats
+        stats.batches += 1
+        stats.requests += len(batch)
+        stats.size_histogram[len(batch)] = stats.size_histogram.get(len(batch), 0) + 1
+        stats.total_run_seconds += loop.time() - started
+        for request, (ok, value) in zip(batch, outcomes):
+            queued = started - request.enqueued_ts
+            stats.total_queue_seconds += queued
+            stats.max_queue_seconds = max(stats.max_queue_seconds, queued)
+            if request.future.done():
+                continue
+            if ok:
+                request.future.set_result(value)
+            else:
+                request.future.set_exception(value)
+
+    def _execute(
+        self,
+        run_batch: Callable[[list[np.ndarray]], list[Any]],
+        frames: list[np.ndarray],
+        postprocessors: list[Optional[Callable[[Any], Any]]],
+    ) -> list[tuple[bool, Any]]:
+        results = run_batch(frames)
+        if len(results) != len(frames):
+            raise RuntimeError(
+                f"{self.name}: batch of {len(frames)} frames returned {len(results)} results"
+            )
+        outcomes: list[tuple[bool, Any]] = []
+        for result, postprocess in zip(results, postprocessors):
+            # One caller's bad post-processing must not fail the whole batch.
+            try:
+                outcomes.append((True, postprocess(result) if postprocess else result))
+            except Exception as error:
+                outcomes.append((False, error))
+        return outcomes
+
+    def stats(self) -> dict[str, Any]:
+        stats = self._stats
+        return {
+            "owner": self.owner,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+            "batches": stats.batches,
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "waiting": len(self._pending),
+            "avg_batch_size": stats.requests / stats.batches if stats.batches else 0.0,
+            "occupancy": (
+                stats.requests / (stats.batches * self.max_batch_size) if stats.batches else 0.0
+            ),
+            "batch_sizes": dict(sorted(stats.size_histogram.items())),
+            "avg_queue_ms": (
+                stats.total_queue_seconds / stats.requests * 1000.0 if stats.requests else 0.0
+            ),
+            "max_queue_ms": stats.max_queue_seconds * 1000.0,
+            "avg_batch_ms": (
+                stats.total_run_seconds / stats.batches * 1000.0 if stats.batches else 0.0
+            ),
+        }
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending.clear()
+
+
+class BatchInferenceServer:
+    """
+    Process-wide registry of ``MicroBatcher`` instances, one per model key.
+
+    Callers asking for the same key (the model's registry key plus anything
+    that changes the model call, such as the confidence threshold) share a
+    batcher, and therefore share batches. Each ``batcher`` call must be
+    paired with a ``release`` of the key.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[InferenceScheduler] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ) -> None:
+        self.scheduler = scheduler
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers: dict[Hashable, MicroBatcher] = {}
+        self._refcounts: dict[Hashable, int] = {}
+
+    def batcher(self, key: Hashable, owner: str) -> MicroBatcher:
+        """Return the batcher for ``key``, creating it on first use."""
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(
+                name=str(key),
+                owner=owner,
+                scheduler=self.scheduler,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+            )
+            self._batchers[key] = batcher
+            logger.info("BatchInferenceServer: created batcher %s", batcher.name)
+        self._refcounts[key] = self._refcounts.get(key, 0) + 1
+        return batcher
+
+    async def release(self, key: Hashable) -> None:
+        """Drop one caller of ``key``; the batcher is closed with its last caller."""
+        count = self._refcounts.get(key, 0) - 1
+        if count > 0:
+            self._refcounts[key] = count
+            return
+        self._refcounts.pop(key, None)
+        batcher = self._batchers.pop(key, None)
+        if batcher is not None:
+            await batcher.close()
+            logger.info("BatchInferenceServer: closed batcher %s", batcher.name)
+
+    def stats(self) -> dict[str, Any]:
+        return {batcher.name: batcher.stats() for batcher in self._batchers.values()}
+
+    async def close(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.close()
+        self._batchers.clear()
+        self._refcounts.clear()
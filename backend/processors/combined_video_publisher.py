@@ -1,20 +1,83 @@
 import asyncio
-from typing import Any, Optional
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
 
 import aiortc
 import av
 import cv2
+import numpy as np
 from vision_agents.core.processors import VideoProcessorPublisher
 from vision_agents.core.utils.video_forwarder import VideoForwarder
 from vision_agents.core.utils.video_track import QueuedVideoTrack
 
-from .base import draw_bbox
+from .frame_cache import FrameCache
+from .frame_ring import FrameRef, RingOverrun, SharedFrameRing
+from .jpeg_broadcast import JpegBroadcast
+from .tracker import frame_time
+from .frame_hub import DROP_OLDEST, FrameHub
+from .overlay import BoxItem, OverlayCompositor
+
+JPEG_QUALITY = 80
+MAX_JPEG_RENDITIONS = 8
+# Narrower renditions are not worth a separate encode.
+MIN_JPEG_WIDTH = 16
+# Size of the published video track.
+OUTPUT_WIDTH = 1280
+OUTPUT_HEIGHT = 720
+
+
+@dataclass
+class _Rendition:
+    width: Optional[int]
+    quality: int
+    broadcast: JpegBroadcast = field(default_factory=JpegBroadcast)
+    # Subscriber id -> requested fps.
+    subscribers: dict[int, float] = field(default_factory=dict)
+    last_encode_ts: float = 0.0
+    encodes: int = 0
+    rate_limited: int = 0
+    resize_seconds: float = 0.0
+    encode_seconds: float = 0.0
+    encoded_bytes: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.width or 'full'}@q{self.quality}"
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "width": self.width,
+            "quality": self.quality,
+            "subscribers": len(self.subscribers),
+            "target_fps": max(self.subscribers.values(), default=0.0),
+            "encodes": self.encodes,
+            "rate_limited": self.rate_limited,
+            "mean_resize_ms": self.resize_seconds / self.encodes * 1000.0 if self.encodes else None,
+            "mean_encode_ms": self.encode_seconds / self.encodes * 1000.0 if self.encodes else None,
+            "encoded_bytes": self.encoded_bytes,
+            "mean_bytes": self.encoded_bytes // self.encodes if self.encodes else None,
+            "bytes_sent": self.broadcast.bytes_sent,
+            "broadcast": self.broadcast.stats(),
+        }
 
 
 class CombinedVideoPublisher(VideoProcessorPublisher):
     """
     Single publisher that merges overlays from multiple analysis processors
     and publishes one annotated video stream.
+
+    The MJPEG snapshot (``get_latest_jpeg``) is only encoded while someone
+    is subscribed (``add_jpeg_subscriber``), at most at the fastest
+    subscriber's fps, on a dedicated encoder thread, and handed to viewers
+    through a ``JpegBroadcast`` per rendition: each distinct (width,
+    quality) asked for is resized and encoded once per frame however many
+    viewers share it, and dropped when its last viewer leaves.
+
+    Boxes and labels are drawn through an ``OverlayCompositor``: labels and
+    outlines are rendered once and re-stamped onto every frame.
     """
 
     name = "combined_video_publisher"
@@ -25,19 +88,40 @@ class CombinedVideoPublisher(VideoProcessorPublisher):
         toddler_processor: Optional[Any] = None,
         fall_processor: Optional[Any] = None,
         fps: float = 10.0,
+        frame_cache: Optional[FrameCache] = None,
+        frame_hub: Optional[FrameHub] = None,
+        ring_slots: int = 4,
+        overlay: Optional[OverlayCompositor] = None,
     ) -> None:
         self.object_processor = object_processor
         self.toddler_processor = toddler_processor
         self.fall_processor = fall_processor
         self.fps = float(fps)
+        self.frame_cache = frame_cache or FrameCache()
+        self.frame_hub = frame_hub or FrameHub()
+        # Annotated frames are composed in preallocated slots; sized on the first frame.
+        self.ring_slots = ring_slots
+        self.frame_ring: Optional[SharedFrameRing] = None
+        # Width of the last published frame, for keying renditions.
+        self._frame_width: Optional[int] = None
+        self.overlay = overlay or OverlayCompositor()
 
-        self._forwarder: Optional[VideoForwarder] = None
-        self._owns_forwarder = False
-        self._handler_registered = False
         self._processing_lock = asyncio.Lock()
-        self._video_track = QueuedVideoTrack(width=1280, height=720, fps=max(1, int(self.fps)))
-        self._latest_jpeg: Optional[bytes] = None
-        self._jpeg_lock = asyncio.Lock()
+        self._video_track = QueuedVideoTrack(width=OUTPUT_WIDTH, height=OUTPUT_HEIGHT, fps=max(1, int(self.fps)))
+        # Rendition key (width or None for full size, quality) -> its encodes
+        # and viewers. The full-size default is always kept.
+        self._renditions: dict[tuple[Optional[int], int], _Rendition] = {}
+        self._default_rendition = self._rendition(None, JPEG_QUALITY)
+
+        # Subscriber id -> (requested fps, rendition key).
+        self._jpeg_subscribers: dict[int, tuple[float, tuple[Optional[int], int]]] = {}
+        self._jpeg_subscriber_ids = itertools.count(1)
+        self._jpeg_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jpeg-encoder")
+        self._jpeg_task: Optional[asyncio.Future] = None
+        self.jpeg_encodes = 0
+        self.jpeg_encode_seconds = 0.0
+        self.jpeg_renditions_collected = 0
+        self.jpeg_skipped = {"no_subscribers": 0, "rate_limited": 0, "encoder_busy": 0}
 
     async def process_video(
         self,
@@ -46,98 +130,304 @@ class CombinedVideoPublisher(VideoProcessorPublisher):
         shared_forwarder: Optional[VideoForwarder] = None,
     ) -> None:
         _ = participant_id
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-            if self._owns_forwarder:
-                await self._forwarder.stop()
-            self._handler_registered = False
-            self._owns_forwarder = False
-
-        self._forwarder = shared_forwarder
-        if self._forwarder is None:
-            self._forwarder = VideoForwarder(
-                input_track=track,
-                max_buffer=5,
-                fps=max(1.0, self.fps),
-                name=f"{self.name}_forwarder",
-            )
-            await self._forwarder.start()
-            self._owns_forwarder = True
-
-        self._forwarder.add_frame_handler(
+        # Re-subscribing under the same name replaces the previous track (e.g., track switch).
+        await self.frame_hub.subscribe(
+            track,
             self._on_frame,
             fps=self.fps,
-            name=f"{self.name}_handler",
+            name=self.name,
+            policy=DROP_OLDEST,
+            queue_size=2,
+            shared_forwarder=shared_forwarder,
         )
-        self._handler_registered = True
 
     @staticmethod
-    def _draw_detection_list(frame, detections: list[dict[str, Any]], color=(0, 255, 0)):
+    def _box_items(detections: Iterable[Any], color=(0, 255, 0)) -> list[BoxItem]:
+        items = []
         for det in detections:
             bbox = det.get("bbox")
             label = str(det.get("label", "object"))
             confidence = det.get("confidence")
             if bbox is None:
                 continue
+            if det.get("track_id") is not None:
+                label = f"{label} #{det['track_id']}"
             if isinstance(confidence, (int, float)):
                 text = f"{label} {float(confidence):.2f}"
             else:
                 text = label
-            frame = draw_bbox(frame, bbox, label=text, color=color)
-        return frame
+            items.append(BoxItem(tuple(int(v) for v in bbox), text, color))
+        return items
+
+    @staticmethod
+    def _detections_at(processor: Optional[Any], ts: float) -> Iterable[Any]:
+        """A processor's boxes as of ``ts``: tracker predictions if it has a tracker, else its last result."""
+        if processor is None or not hasattr(processor, "state"):
+            return []
+        tracker = getattr(processor, "tracker", None)
+        if tracker is not None:
+            return tracker.predict(ts)
+        return processor.state().get("detections", []) or []
 
     async def _on_frame(self, frame: av.VideoFrame) -> None:
         if self._processing_lock.locked():
             return
 
         async with self._processing_lock:
-            image_bgr = frame.to_ndarray(format="bgr24")
-            annotated = image_bgr.copy()
+            # The cached frame is shared with the analysis processors and is
+            # read-only, so draw into a ring slot instead.
+            image_bgr = self.frame_cache.bgr(frame)
+            ring = self._ensure_ring(image_bgr)
+            try:
+                slot, annotated = ring.reserve(image_bgr.shape)
+            except RingOverrun:
+                # Readers hold every slot; fall back to a throwaway buffer.
+                slot, annotated = None, np.empty_like(image_bgr)
+            np.copyto(annotated, image_bgr)
 
-            object_detections = []
-            if hasattr(self.object_processor, "state"):
-                object_detections = self.object_processor.state().get("detections", []) or []
-            annotated = self._draw_detection_list(annotated, object_detections, color=(0, 255, 0))
+            # Boxes are predicted to this frame's time so they move smoothly
+            # between the (much sparser) inference frames.
+            ts = frame_time(frame)
+            object_detections = self._detections_at(self.object_processor, ts)
+            items = self._box_items(object_detections, color=(0, 255, 0))
 
-            toddler_detections = []
-            if self.toddler_processor is not None and hasattr(self.toddler_processor, "state"):
-                toddler_detections = self.toddler_processor.state().get("detections", []) or []
-            annotated = self._draw_detection_list(annotated, toddler_detections, color=(0, 165, 255))
+            toddler_detections = self._detections_at(self.toddler_processor, ts)
+            items += self._box_items(toddler_detections, color=(0, 165, 255))
 
             if self.fall_processor is not None and hasattr(self.fall_processor, "state"):
                 fall_state = self.fall_processor.state()
                 if fall_state.get("fall_present"):
                     # Find the bounding box for the falling person
-                    for det in fall_state.get("detections", []):
+                    for det in self._detections_at(self.fall_processor, ts):
                         if det.get("is_falling", False):
-                            annotated = draw_bbox(annotated, det.get("bbox", (0, 0, 0, 0)), label="FALL DETECTED!", color=(0, 0, 255), thickness=3)
+                            bbox = tuple(int(v) for v in det.get("bbox", (0, 0, 0, 0)))
+                            items.append(BoxItem(bbox, "FALL DETECTED!", (0, 0, 255), thickness=3))
+
+            # Outlines and labels come from cached templates and glyphs; nothing is redrawn.
+            self.overlay.update(items)
+            self.overlay.composite(annotated)
 
             out_frame = av.VideoFrame.from_ndarray(annotated, format="bgr24")
             out_frame.pts = frame.pts
             out_frame.time_base = frame.time_base
             await self._video_track.add_frame(out_frame)
 
-            ok, encoded = cv2.imencode(".jpg", annotated, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-            if ok:
-                async with self._jpeg_lock:
-                    self._latest_jpeg = encoded.tobytes()
+            seq = ring.commit(slot, pts=frame.pts) if slot is not None else None
+            self._frame_width = annotated.shape[1]
+            self._schedule_jpeg(ring, seq, annotated, frame_time(frame))
+
+    @property
+    def jpeg_broadcast(self) -> JpegBroadcast:
+        """The full-size, default-quality rendition."""
+        return self._default_rendition.broadcast
+
+    def _rendition_key(self, width: Optional[int], quality: Optional[int]) -> tuple[Optional[int], int]:
+        quality = JPEG_QUALITY if quality is None else min(100, max(1, int(quality)))
+        if width is not None:
+            width = max(MIN_JPEG_WIDTH, int(width))
+            # Never upscale: at or above the frame width it is the full-size
+            # rendition. Before the first frame, the output width stands in.
+            if width >= (self._frame_width or OUTPUT_WIDTH):
+                width = None
+        return width, quality
+
+    def _rendition(self, width: Optional[int], quality: int) -> _Rendition:
+        rendition = self._renditions.get((width, quality))
+        if rendition is None:
+            if len(self._renditions) >= MAX_JPEG_RENDITIONS:
+                raise ValueError(f"at most {MAX_JPEG_RENDITIONS} stream renditions at a time")
+            rendition = self._renditions[(width, quality)] = _Rendition(width, quality)
+        return rendition
+
+    def add_jpeg_subscriber(
+        self,
+        fps: Optional[float] = None,
+        width: Optional[int] = None,
+        quality: Optional[int] = None,
+    ) -> int:
+        """
+        Register an MJPEG viewer; returns its id.
+
+        ``fps`` defaults to the publisher fps, ``width`` to the full frame
+        width (the height keeps the aspect ratio) and ``quality`` to
+        ``JPEG_QUALITY``. Raises ValueError when that would need a new
+        rendition beyond ``MAX_JPEG_RENDITIONS``.
+        """
+        requested = self.fps if fps is None or fps <= 0 else min(float(fps), self.fps)
+        key = self._rendition_key(width, quality)
+        rendition = self._rendition(*key)
+        subscriber_id = next(self._jpeg_subscriber_ids)
+        rendition.subscribers[subscriber_id] = requested
+        self._jpeg_subscribers[subscriber_id] = (requested, key)
+        return subscriber_id
+
+    def remove_jpeg_subscriber(self, subscriber_id: int) -> None:
+        entry = self._jpeg_subscribers.pop(subscriber_id, None)
+        if entry is None:
+            return
+        key = entry[1]
+        rendition = self._renditions.get(key)
+        if rendition is None:
+            return
+        rendition.subscribers.pop(subscriber_id, None)
+        if not rendition.subscribers and rendition is not self._default_rendition:
+            # Nobody watches it any more; its last viewer has stopped waiting on it.
+            del self._renditions[key]
+            self.jpeg_renditions_collected += 1
+
+    def jpeg_broadcast_for(self, subscriber_id: int) -> JpegBroadcast:
+        """The broadcast carrying the rendition ``subscriber_id`` asked for."""
+        return self._renditions[self._jpeg_subscribers[subscriber_id][1]].broadcast
+
+    def _jpeg_skip_reason(self, now: float) -> Optional[str]:
+        if not self._jpeg_subscribers:
+            return "no_subscribers"
+        if not self._due_renditions(now):
+            return "rate_limited"
+        if self._jpeg_task is not None and not self._jpeg_task.done():
+            return "encoder_busy"
+        return None
+
+    def _due_renditions(self, now: float) -> list[_Rendition]:
+        due = []
+        for rendition in self._renditions.values():
+            if not rendition.subscribers:
+                continue
+            # Half an input frame of slack, so jitter in frame arrival doesn't
+            # halve a subscriber asking for the full rate.
+            interval = 1.0 / max(rendition.subscribers.values()) - 0.5 / self.fps
+            if now - rendition.last_encode_ts >= interval:
+                due.append(rendition)
+        return due
+
+    def _schedule_jpeg(
+        self,
+        ring: SharedFrameRing,
+        seq: Optional[int],
+        fallback: np.ndarray,
+        pts: Optional[float] = None,
+    ) -> None:
+        now = time.monotonic()
+        reason = self._jpeg_skip_reason(now)
+        if reason is not None:
+            self.jpeg_skipped[reason] += 1
+            return
+        renditions = self._due_renditions(now)
+        for rendition in self._renditions.values():
+            if rendition.subscribers and rendition not in renditions:
+                rendition.rate_limited += 1
+        for rendition in renditions:
+            rendition.last_encode_ts = now
+        # Pin the committed slot so the writer can't reuse it mid-encode;
+        # without one (ring overrun) the throwaway buffer is ours anyway.
+        ref = ring.acquire(seq) if seq is not None else None
+        image = ref.array if ref is not None else fallback
+        self._jpeg_task = asyncio.ensure_future(self._encode_jpeg(image, ref, renditions, pts))
+
+    @staticmethod
+    def _encode_renditions(
+        image: np.ndarray,
+        renditions: list[_Rendition],
+    ) -> list[tuple[_Rendition, Optional[bytes], float, float]]:
+        """Runs on the encoder thread: (rendition, jpeg, resize seconds, encode seconds) each."""
+        height, width = image.shape[:2]
+        resized: dict[Optional[int], tuple[np.ndarray, float]] = {None: (image, 0.0)}
+        # A rendition keyed before the first frame may turn out to be full
+        # size; it shares the full-size encode instead of repeating it.
+        encoded: dict[tuple[Optional[int], int], Optional[bytes]] = {}
+        results = []
+        for rendition in renditions:
+            target = None if rendition.width is None or rendition.width >= width else rendition.width
+            if target not in resized:
+                started = time.perf_counter()
+                size = (target, max(1, round(height * target / width)))
+                scaled = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+                resized[target] = (scaled, time.perf_counter() - started)
+            scaled, resize_seconds = resized[target]
+            key = (target, rendition.quality)
+            if key in encoded:
+                results.append((rendition, encoded[key], 0.0, 0.0))
+                continue
+            started = time.perf_counter()
+            ok, jpeg = cv2.imencode(".jpg", scaled, [int(cv2.IMWRITE_JPEG_QUALITY), rendition.quality])
+            encoded[key] = jpeg.tobytes() if ok else None
+            results.append((rendition, encoded[key], resize_seconds, time.perf_counter() - started))
+        return results
+
+    async def _encode_jpeg(
+        self,
+        image: np.ndarray,
+        ref: Optional[FrameRef],
+        renditions: list[_Rendition],
+        pts: Optional[float] = None,
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._jpeg_executor,
+                self._encode_renditions,
+                image,
+                renditions,
+            )
+        finally:
+            if ref is not None:
+                ref.release()
+        self.jpeg_encodes += 1
+        self.jpeg_encode_seconds += time.perf_counter() - started
+        for rendition, jpeg, resize_seconds, encode_seconds in results:
+            rendition.encodes += 1
+            rendition.resize_seconds += resize_seconds
+            rendition.encode_seconds += encode_seconds
+            if jpeg is not None:
+                rendition.encoded_bytes += len(jpeg)
+                await rendition.broadcast.publish(jpeg, pts)
+
+    def jpeg_stats(self) -> dict[str, Any]:
+        return {
+            "subscribers": len(self._jpeg_subscribers),
+            "target_fps": max((fps for fps, _ in self._jpeg_subscribers.values()), default=0.0),
+            "encodes": self.jpeg_encodes,
+            "encodes_saved": sum(self.jpeg_skipped.values()),
+            "skipped": dict(self.jpeg_skipped),
+            "mean_encode_ms": (
+                self.jpeg_encode_seconds / self.jpeg_encodes * 1000.0 if self.jpeg_encodes else None
+            ),
+            "broadcast": self.jpeg_broadcast.stats(),
+            "renditions": {rendition.name: rendition.stats() for rendition in self._renditions.values()},
+            "renditions_collected": self.jpeg_renditions_collected,
+        }
+
+    def _ensure_ring(self, image: np.ndarray) -> SharedFrameRing:
+        ring = self.frame_ring
+        if ring is None or image.nbytes > ring.slot_bytes:
+            if ring is not None:
+                ring.close()
+            ring = self.frame_ring = SharedFrameRing(self.ring_slots, image.nbytes)
+        return ring
+
+    def latest_frame(self) -> Optional[FrameRef]:
+        """Pin the newest annotated frame (zero-copy, read-only); release it when done."""
+        if self.frame_ring is None:
+            return None
+        return self.frame_ring.acquire()
 
     def publish_video_track(self) -> aiortc.VideoStreamTrack:
         return self._video_track
 
     async def get_latest_jpeg(self) -> Optional[bytes]:
-        async with self._jpeg_lock:
-            return self._latest_jpeg
+        return self.jpeg_broadcast.latest
 
     async def stop_processing(self) -> None:
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-        if self._forwarder is not None and self._owns_forwarder:
-            await self._forwarder.stop()
-        self._handler_registered = False
-        self._forwarder = None
-        self._owns_forwarder = False
+        await self.frame_hub.unsubscribe(self.name)
 
     async def close(self) -> None:
         await self.stop_processing()
         self._video_track.stop()
+        if self._jpeg_task is not None:
+            await asyncio.gather(self._jpeg_task, return_exceptions=True)
+        for rendition in list(self._renditions.values()):
+            await rendition.broadcast.close()
+        self._jpeg_executor.shutdown(wait=False, cancel_futures=True)
+        if self.frame_ring is not None:
+            self.frame_ring.close()
+            self.frame_ring = None
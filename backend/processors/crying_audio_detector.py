@@ -22,6 +22,12 @@ except Exception:  # pragma: no cover - allows local CLI without full stack
         async def process_audio(self, audio_data: Any) -> None:  # noqa: D401
             return None
 
+from events.detection_events import CryDetectedEvent
+from events.event_bus import EventBus
+from .audio_ring import AudioRing
+from .detection_feed import SCORE_DECIMALS, SECTION_CRY, DetectionFeed
+from .resampler import StreamingResampler, resample
+
 logger = logging.getLogger(__name__)
 
 YAMNET_MODEL_URL = "https://tfhub.dev/google/yamnet/1"
@@ -33,6 +39,10 @@ DEFAULT_CRY_KEYWORDS = (
     "sobbing",
     "wail",
 )
+# Packets are handed to the worker in batches of at least this much audio.
+BATCH_SECONDS = 0.1
+# Batches waiting for the worker before new audio is dropped.
+MAX_QUEUED_BATCHES = 20
 
 
 class CryingAudioDetector(AudioProcessor):
@@ -52,16 +62,21 @@ class CryingAudioDetector(AudioProcessor):
         enter_threshold: float = 0.35,
         exit_threshold: float = 0.20,
         log_interval_seconds: float = 2.0,
+        detection_feed: Optional[DetectionFeed] = None,
+        event_bus: Optional[EventBus] = None,
     ) -> None:
         self.window_seconds = max(0.5, float(window_seconds))
         self.infer_interval_seconds = 1.0 / max(0.1, float(infer_hz))
         self.enter_threshold = float(enter_threshold)
         self.exit_threshold = float(exit_threshold)
         self.log_interval_seconds = max(0.5, float(log_interval_seconds))
+        # Pushes cry state to metadata-stream clients.
+        self.detection_feed = detection_feed
+        # Receives a CryDetectedEvent for every inference window that hears crying.
+        self.event_bus = event_bus
 
         self.sample_rate = 16000
         self.window_samples = int(self.window_seconds * self.sample_rate)
-        self._buffer = np.array([], dtype=np.float32)
 
         self._lock = threading.Lock()
         self._last_infer_ts = 0.0
@@ -82,12 +97,25 @@ class CryingAudioDetector(AudioProcessor):
         self._class_names: list[str] = []
         self._cry_class_indices: list[int] = []
 
-        self._audio_queue: "queue.Queue[tuple[np.ndarray, int, int]]" = queue.Queue(maxsize=50)
+        # Batches of (samples, sample_rate, channels) packets, collected on the event loop.
+        self._audio_queue: "queue.Queue[list[tuple[np.ndarray, int, int]]]" = queue.Queue(
+            maxsize=MAX_QUEUED_BATCHES
+        )
+        self._pending: list[tuple[np.ndarray, int, int]] = []
+        self._pending_seconds = 0.0
         self._stop_event = threading.Event()
         self._worker_thread: Optional[threading.Thread] = None
         self._chunk_size = int(self.sample_rate * 1.0)
         self._chunk_step = int(self.sample_rate * 1.0)
         self._alarm_window_size = 5
+        # Resampled mono audio at ``sample_rate``, waiting to be cut into chunks.
+        self._ring = AudioRing(2 * max(self.window_samples, self._chunk_size))
+        # Carries filter state across packets; replaced when the input rate or layout changes.
+        self._resampler: Optional[StreamingResampler] = None
+
+        self.dropped_batches = 0
+        self.dropped_packets = 0
+        self.dropped_seconds = 0.0
 
         try:
             import tensorflow as tf
@@ -149,6 +177,9 @@ class CryingAudioDetector(AudioProcessor):
     @staticmethod
     def _to_mono(samples: np.ndarray, channels: int) -> np.ndarray:
         if samples.ndim == 1:
+            if channels > 1 and samples.size % channels == 0:
+                # Interleaved frames.
+                return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
             return samples.astype(np.float32, copy=False)
         if samples.ndim == 2:
             if channels > 1 and samples.shape[0] == channels:
@@ -159,15 +190,16 @@ class CryingAudioDetector(AudioProcessor):
         return samples.reshape(-1).astype(np.float32, copy=False)
 
     def _resample_if_needed(self, mono: np.ndarray, src_rate: int) -> np.ndarray:
+        """Resample a whole recording (live audio goes through ``_stream_resampler``)."""
         if src_rate == self.sample_rate:
             return mono
-        target_len = int(len(mono) * (self.sample_rate / max(1, src_rate)))
-        target_len = max(1, target_len)
-        # tf.signal.resample is not available in some TF builds (e.g., certain macOS wheels).
-        if self._tf is not None and hasattr(self._tf.signal, "resample"):
-            return self._tf.signal.resample(mono, target_len).numpy().astype(np.float32)
-        from scipy.signal import resample
-        return resample(mono, target_len).astype(np.float32)
+        return resample(mono, src_rate, self.sample_rate)
+
+    def _stream_resampler(self, sample_rate: int, channels: int) -> StreamingResampler:
+        resampler = self._resampler
+        if resampler is None or resampler.src_rate != sample_rate or resampler.channels != channels:
+            resampler = self._resampler = StreamingResampler(sample_rate, self.sample_rate, channels)
+        return resampler
 
     def _infer_window(self, wav: np.ndarray) -> tuple[float, str, float]:
         scores, _, _ = self._yamnet(wav)
@@ -185,45 +217,61 @@ class CryingAudioDetector(AudioProcessor):
         if audio_data.samples is None or len(audio_data.samples) == 0:
             return
 
-        pcm = audio_data.to_float32()
-        samples = np.array(pcm.samples, copy=False)
+        # Converted to float on the worker, straight into the ring.
+        sample_rate = int(audio_data.sample_rate)
+        channels = int(audio_data.channels or 1)
+        samples = audio_data.samples
+        self._pending.append((samples, sample_rate, channels))
+        self._pending_seconds += samples.size / max(1, channels) / max(1, sample_rate)
+        if self._pending_seconds < BATCH_SECONDS:
+            return
+        batch, seconds = self._pending, self._pending_seconds
+        self._pending, self._pending_seconds = [], 0.0
         try:
-            self._audio_queue.put_nowait((samples, int(pcm.sample_rate), int(pcm.channels or 1)))
+            self._audio_queue.put_nowait(batch)
         except queue.Full:
             # Drop audio if we can't keep up.
-            pass
+            self.dropped_batches += 1
+            self.dropped_packets += len(batch)
+            self.dropped_seconds += seconds
+
+    def _write_packet(self, samples: np.ndarray, sample_rate: int, channels: int) -> None:
+        """Append one packet to the ring as mono float32 at ``sample_rate`` (worker thread, under the lock)."""
+        # Integer PCM is scaled to [-1, 1) as it is written.
+        scale = 1.0 / (np.iinfo(samples.dtype).max + 1) if samples.dtype.kind == "i" else 1.0
+        # 1-D stereo is interleaved, so the channel count matters as much as the shape.
+        if samples.ndim == 1 and channels == 1 and sample_rate == self.sample_rate:
+            # Already mono at the model rate: no intermediate copy.
+            self._ring.write(samples, scale)
+            return
+        # Mixed down and resampled in one pass, continuing the previous packet.
+        mono = self._stream_resampler(sample_rate, channels).process(samples)
+        self._ring.write(mono, scale)
 
     def _worker_loop(self) -> None:
         while not self._stop_event.is_set():
             try:
-                samples, sample_rate, channels = self._audio_queue.get(timeout=0.2)
+                batch = self._audio_queue.get(timeout=0.2)
             except queue.Empty:
                 continue
 
             with self._lock:
-                mono = self._to_mono(samples, channels)
-                mono = self._resample_if_needed(mono, int(sample_rate))
+                for samples, sample_rate, channels in batch:
+                    self._write_packet(samples, sample_rate, channels)
                 self.last_audio_ts = time.time()
 
-                if mono.size == 0:
-                    continue
-
-                if self._buffer.size == 0:
-                    self._buffer = mono
-                else:
-                    self._buffer = np.concatenate([self._buffer, mono]).astype(np.float32, copy=False)
-
                 # Process fixed 1-second chunks at 16kHz.
-                while self._buffer.size >= self._chunk_size:
-                    chunk = self._buffer[: self._chunk_size]
-                    self._buffer = self._buffer[self._chunk_step :]
+                while self._ring.size >= self._chunk_size:
+                    # A view into the ring; inference finishes before the next write.
+                    chunk = self._ring.window(self._chunk_size)
+                    self._ring.consume(self._chunk_step)
 
                     now = time.time()
                     if now - self._last_infer_ts < self.infer_interval_seconds:
                         continue
                     self._last_infer_ts = now
 
-                    cry_score, top_label, top_score = self._infer_window(chunk.copy())
+                    cry_score, top_label, top_score = self._infer_window(chunk)
                     self.cry_score = cry_score
                     self.top_label = top_label
                     self.top_score = top_score
@@ -245,6 +293,16 @@ class CryingAudioDetector(AudioProcessor):
                     if len(self.recent_predictions) > self._alarm_window_size:
                         self.recent_predictions.pop(0)
                     self.alarm_active = sum(self.recent_predictions) >= 3
+                    if self.detection_feed is not None:
+                        self.detection_feed.publish(SECTION_CRY, {
+                            "detected": self.cry_detected,
+                            "alarm": self.alarm_active,
+                            "score": round(self.cry_score, SCORE_DECIMALS),
+                            "label": self.top_label,
+                        })
+                    if self.event_bus is not None and self.cry_detected:
+                        # From the worker thread; handed over to the bus's loop.
+                        self.event_bus.publish_threadsafe(CryDetectedEvent(timestamp=now, confidence=cry_score))
 
                     if now - self._last_log_ts >= self.log_interval_seconds:
                         logger.info(
@@ -258,11 +316,6 @@ class CryingAudioDetector(AudioProcessor):
                         )
                         self._last_log_ts = now
 
-    async def close(self) -> None:
-        self._stop_event.set()
-        if self._worker_thread is not None:
-            self._worker_thread.join(timeout=2.0)
-
     def state(self) -> dict[str, Any]:
         return {
             "enabled": self.enabled,
@@ -274,7 +327,19 @@ class CryingAudioDetector(AudioProcessor):
             "recent_predictions": list(self.recent_predictions),
             "last_audio_ts": self.last_audio_ts,
             "disable_reason": self.disable_reason,
+            "buffer": self._ring.stats(),
+            "resampler": self._resampler.stats() if self._resampler is not None else None,
+            "dropped": {
+                "batches": self.dropped_batches,
+                "packets": self.dropped_packets,
+                "seconds": self.dropped_seconds,
+            },
         }
 
     async def close(self) -> None:
-        self._buffer = np.array([], dtype=np.float32)
+        self._stop_event.set()
+        if self._worker_thread is not None:
+            self._worker_thread.join(timeout=2.0)
+        self._pending, self._pending_seconds = [], 0.0
+        self._ring.clear()
+        self._resampler = None
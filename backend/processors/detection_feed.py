@@ -0,0 +1,199 @@
+"""
+Push feed of compact detection state for client-side overlays.
+
+Remote viewers used to see detections only as pixels burned into the video,
+and polled ``/audio/crying/status`` for cry state. Processors now publish
+their latest results into a per-call ``DetectionFeed`` as small JSON-able
+sections (``objects``, ``fall``, ``toddlers``, ``cry``), each stamped with
+the pts of the frame it was computed on. A section that comes out the same
+as before is not republished, so the feed only moves when something
+changed.
+
+Every accepted update bumps a feed-wide sequence number. A client that has
+seen up to ``seq`` asks for ``delta(seq)`` and gets just the sections
+updated since then, however far behind it is, so there is no per-client
+queue to overflow. ``publish`` may be called from any thread (the cry
+detector runs on its own).
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Optional
+
+import numpy as np
+
+from .detections import NO_ID, as_batch
+
+
+SECTION_OBJECTS = "objects"
+SECTION_FALL = "fall"
+SECTION_TODDLERS = "toddlers"
+SECTION_CRY = "cry"
+
+# Confidence and score digits kept on the wire; finer changes are not news.
+SCORE_DECIMALS = 2
+
+
+def compact_detections(detections: Any, **columns: str) -> list[dict[str, Any]]:
+    """
+    Detections as short dicts: ``label``, ``conf``, integer ``bbox`` and ``id`` (track id, if any).
+
+    ``columns`` maps extra batch columns to output keys, e.g.
+    ``falling="is_falling"``. Keypoints are never included.
+    """
+    batch = as_batch(detections)
+    if not len(batch):
+        return []
+    fields = {
+        "label": batch.labels.tolist(),
+        "conf": np.round(batch.scores.astype(np.float64), SCORE_DECIMALS).tolist(),
+        "bbox": batch.boxes.astype(np.int64).tolist(),
+    }
+    track_ids = batch.column("track_id")
+    if track_ids is not None:
+        fields["id"] = [None if track_id == NO_ID else track_id for track_id in track_ids.tolist()]
+    for key, column in columns.items():
+        values = batch.column(column)
+        if values is not None:
+            fields[key] = values.tolist()
+    return [dict(zip(fields, row)) for row in zip(*fields.values())]
+
+
+class DetectionFeed:
+    """
+    Latest value of each section plus the sequence number it was set at.
+
+    Waiters are woken on the event loop they waited from.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Section -> {"seq", "pts", "data"}.
+        self._sections: dict[str, dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._closed = False
+
+        self.updates = 0
+        self.unchanged = 0
+        self.clients = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def publish(self, section: str, data: Any, pts: Optional[float] = None) -> bool:
+        """Set ``section`` to ``data`` (JSON-able); returns False when it was already that."""
+        with self._lock:
+            current = self._sections.get(section)
+            if current is not None and current["data"] == data:
+                self.unchanged += 1
+                return False
+            self._seq += 1
+            self._sections[section] = {"seq": self._seq, "pts": pts, "data": data}
+            self.updates += 1
+            loop = self._loop
+        if loop is not None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                self._wake()
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._wake)
+        return True
+
+    def publish_detections(
+        self,
+        section: str,
+        detections: Any,
+        pts: Optional[float] = None,
+        columns: Optional[dict[str, str]] = None,
+        **extra: Any,
+    ) -> bool:
+        """
+        Publish detections as ``{"detections": [...], **extra}``.
+
+        ``columns`` is passed on to ``compact_detections``.
+        """
+        detections = compact_detections(detections, **(columns or {}))
+        return self.publish(section, {**extra, "detections": detections}, pts)
+
+    def delta(self, after_seq: int = 0) -> tuple[int, dict[str, dict[str, Any]]]:
+        """(current seq, sections updated after ``after_seq``); everything for 0."""
+        with self._lock:
+            changed = {
+                name: {"pts": state["pts"], "data": state["data"]}
+                for name, state in self._sections.items()
+                if state["seq"] > after_seq
+            }
+            return self._seq, changed
+
+    async def wait_delta(
+        self,
+        after_seq: int,
+        timeout: Optional[float] = None,
+    ) -> Optional[tuple[int, dict[str, dict[str, Any]]]]:
+        """
+        Like ``delta`` but waits until something changed after ``after_seq``.
+
+        Returns None on timeout or once the feed is closed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while not self._closed:
+            with self._lock:
+                if self._loop is None:
+                    self._loop, self._changed = loop, asyncio.Event()
+                changed = self._changed
+            seq, sections = self.delta(after_seq)
+            if sections:
+                return seq, sections
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return None
+
+    def _wake(self) -> None:
+        # A fresh event per change: everyone waiting on the old one wakes once.
+        changed, self._changed = self._changed, asyncio.Event()
+        if changed is not None:
+            changed.set()
+
+    def message(self, kind: str, seq: int, sections: dict[str, dict[str, Any]]) -> str:
+        """One wire message (compact JSON), counted in the feed's traffic stats."""
+        text = json.dumps({"type": kind, "seq": seq, "sections": sections}, separators=(",", ":"))
+        self.messages_sent += 1
+        self.bytes_sent += len(text)
+        return text
+
+    def close(self) -> None:
+        self._closed = True
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "seq": self._seq,
+                "sections": {name: state["seq"] for name, state in self._sections.items()},
+                "updates": self.updates,
+                "unchanged": self.unchanged,
+                "clients": self.clients,
+                "messages_sent": self.messages_sent,
+                "bytes_sent": self.bytes_sent,
+            }
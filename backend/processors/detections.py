@@ -0,0 +1,405 @@
+"""
+Array-backed detection results.
+
+Processors used to turn every ultralytics result into a list of dicts (one
+per box, built in a Python loop), then the tracker, the publisher and the
+fall logic walked those dicts again on every frame. ``DetectionBatch`` keeps
+a whole frame's detections as contiguous NumPy arrays instead: boxes
+(N, 4), scores (N,), class ids (N,), optional keypoints (N, K, 2|3) and
+named per-detection columns such as ``track_id`` or ``is_falling``. It is
+built straight from the ultralytics tensors with one device-to-host copy.
+
+Indexing or iterating a batch yields ``Detection`` views (``__slots__``, no
+copy) that read like the old dicts (``det["bbox"]``, ``det.get("label")``),
+so existing call sites keep working. Plain dicts / JSON are only produced at
+API boundaries (``state()``, HTTP), through ``to_dicts`` / ``to_json``, and
+the dict form is cached per batch.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+
+# Integer id columns where a negative value means "none" (``None`` in dicts).
+NULLABLE_ID_COLUMNS = frozenset({"track_id"})
+NO_ID = -1
+
+_FIELDS = ("label", "confidence", "bbox")
+
+
+class Detection(Mapping):
+    """
+    Read-only view of one row of a ``DetectionBatch``.
+
+    Behaves like the detection dict it replaces: ``det["bbox"]`` is an int
+    ``(x1, y1, x2, y2)`` tuple, ``det.get("track_id")`` may be ``None``, and
+    ``dict(det)`` / ``det.to_dict()`` give the plain dict.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "DetectionBatch", index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    @property
+    def batch(self) -> "DetectionBatch":
+        return self._batch
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def label(self) -> str:
+        return self._batch.labels[self._index]
+
+    @property
+    def confidence(self) -> float:
+        return float(self._batch.scores[self._index])
+
+    @property
+    def bbox(self) -> tuple[int, int, int, int]:
+        x1, y1, x2, y2 = self._batch.boxes[self._index]
+        return (int(x1), int(y1), int(x2), int(y2))
+
+    @property
+    def class_id(self) -> Optional[int]:
+        class_ids = self._batch.class_ids
+        return None if class_ids is None else int(class_ids[self._index])
+
+    @property
+    def keypoints(self) -> Optional[np.ndarray]:
+        keypoints = self._batch.keypoints
+        return None if keypoints is None else keypoints[self._index]
+
+    def __getitem__(self, key: str) -> Any:
+        batch = self._batch
+        if key == "label":
+            return self.label
+        if key == "confidence":
+            return self.confidence
+        if key == "bbox":
+            return self.bbox
+        if key == "class_id" and batch.class_ids is not None:
+            return self.class_id
+        if key == "keypoints" and batch.keypoints is not None:
+            return batch.keypoints[self._index].tolist()
+        column = batch.columns.get(key)
+        if column is None:
+            raise KeyError(key)
+        return _column_value(key, column[self._index])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._batch.keys())
+
+    def __len__(self) -> int:
+        return len(self._batch.keys())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {key: self[key] for key in self._batch.keys()}
+
+    def __repr__(self) -> str:
+        return f"Detection({self.to_dict()!r})"
+
+
+class DetectionBatch:
+    """
+    One frame's detections as parallel arrays.
+
+    Args:
+        boxes: (N, 4) ``x1, y1, x2, y2`` in pixels (float32).
+        scores: (N,) confidences; float64 input is kept as is (scores
+            parsed from JSON), anything else is stored as float32.
+        class_ids: (N,) model class indices, or ``None`` for sources without
+            them (Roboflow); then ``labels`` must be given.
+        names: Class index -> label, as in ``ultralytics.Results.names``.
+        labels: (N,) labels; derived lazily from ``class_ids`` and ``names``
+            when omitted.
+        keypoints: Optional (N, K, 2) or (N, K, 3) pose keypoints.
+        columns: Extra per-detection arrays of length N (``track_id``,
+            ``is_falling``, ...).
+
+    Batches are treated as immutable: ``select``, ``with_column`` and
+    friends return new batches that share the unchanged arrays.
+    """
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: Optional[np.ndarray] = None,
+        names: Optional[dict[int, str]] = None,
+        labels: Optional[np.ndarray] = None,
+        keypoints: Optional[np.ndarray] = None,
+        columns: Optional[dict[str, np.ndarray]] = None,
+    ) -> None:
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores)
+        self.scores = scores.astype(np.float64 if scores.dtype == np.float64 else np.float32, copy=False).reshape(-1)
+        self.class_ids = None if class_ids is None else np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        self.names = dict(names or {})
+        self.keypoints = None if keypoints is None else np.asarray(keypoints, dtype=np.float32)
+        self.columns = {key: np.asarray(value) for key, value in (columns or {}).items()}
+        if labels is None and self.class_ids is None:
+            raise ValueError("DetectionBatch needs class_ids or labels")
+        self._labels = None if labels is None else np.asarray(labels, dtype=object).reshape(-1)
+        self._dicts: Optional[list[dict[str, Any]]] = None
+
+    # ── Construction ─────────────────────────────────────────────
+
+    @classmethod
+    def empty(cls, names: Optional[dict[int, str]] = None) -> "DetectionBatch":
+        return cls(np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32), names)
+
+    @classmethod
+    def from_ultralytics(cls, result: Any) -> "DetectionBatch":
+        """
+        Build a batch from one ``ultralytics`` Results without per-box loops.
+
+        ``boxes.data`` is ``(N, 6)`` xyxy/conf/cls (``(N, 7)`` with a track
+        column), copied to host memory once.
+        """
+        names = dict(getattr(result, "names", None) or {})
+        boxes = getattr(result, "boxes", None)
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(names)
+        data = _to_numpy(boxes.data)
+        keypoints = getattr(result, "keypoints", None)
+        if keypoints is not None and getattr(keypoints, "data", None) is not None:
+            keypoints = _to_numpy(keypoints.data)
+        else:
+            keypoints = None
+        return cls(
+            boxes=data[:, :4],
+            scores=data[:, -2],
+            class_ids=data[:, -1].astype(np.int32),
+            names=names,
+            keypoints=keypoints,
+        )
+
+    @classmethod
+    def from_dicts(cls, detections: Iterable[Mapping[str, Any]]) -> "DetectionBatch":
+        """
+        Build a batch from detection dicts (Roboflow predictions, old callers).
+
+        Entries without a ``bbox`` are dropped. A missing confidence counts
+        as 1.0, ``class_id`` and ``keypoints`` are kept only when every entry
+        has them, and other scalar keys become columns.
+        """
+        if isinstance(detections, DetectionBatch):
+            return detections
+        rows = [det for det in detections if det.get("bbox") is not None]
+        if not rows:
+            return cls(np.empty((0, 4)), np.empty(0), labels=np.empty(0, dtype=object))
+
+        scores = []
+        for det in rows:
+            confidence = det.get("confidence")
+            scores.append(float(confidence) if isinstance(confidence, (int, float, np.number)) else 1.0)
+        class_ids = None
+        if all(det.get("class_id") is not None for det in rows):
+            class_ids = np.array([int(det["class_id"]) for det in rows], dtype=np.int32)
+        keypoints = None
+        if all(det.get("keypoints") is not None for det in rows):
+            stacked = [np.asarray(det["keypoints"], dtype=np.float32) for det in rows]
+            if len({kpts.shape for kpts in stacked}) == 1:
+                keypoints = np.stack(stacked)
+
+        columns = {}
+        extra_keys = {key for det in rows for key in det} - {*_FIELDS, "class_id", "keypoints"}
+        for key in sorted(extra_keys):
+            values = [det.get(key) for det in rows]
+            if key in NULLABLE_ID_COLUMNS:
+                columns[key] = np.array([NO_ID if value is None else int(value) for value in values], dtype=np.int64)
+            elif all(isinstance(value, (bool, np.bool_)) for value in values):
+                columns[key] = np.array(values, dtype=bool)
+            else:
+                columns[key] = np.array(values, dtype=object)
+
+        return cls(
+            boxes=np.array([tuple(det["bbox"]) for det in rows], dtype=np.float32),
+            # Kept at float64 so confidences read back exactly as given.
+            scores=np.array(scores, dtype=np.float64),
+            class_ids=class_ids,
+            labels=np.array([str(det.get("label", "object")) for det in rows], dtype=object),
+            keypoints=keypoints,
+            columns=columns,
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        """Stack batches row-wise; fields missing from any batch are dropped."""
+        batches = [batch for batch in batches if batch is not None]
+        if not batches:
+            return cls.from_dicts([])
+        if len(batches) == 1:
+            return batches[0]
+        class_ids = None
+        if all(batch.class_ids is not None for batch in batches):
+            class_ids = np.concatenate([batch.class_ids for batch in batches])
+        keypoints = None
+        if all(batch.keypoints is not None for batch in batches):
+            if len({batch.keypoints.shape[1:] for batch in batches}) == 1:
+                keypoints = np.concatenate([batch.keypoints for batch in batches])
+        shared = set(batches[0].columns).intersection(*(batch.columns for batch in batches[1:]))
+        names: dict[int, str] = {}
+        for batch in batches:
+            names.update(batch.names)
+        return cls(
+            boxes=np.concatenate([batch.boxes for batch in batches]),
+            scores=np.concatenate([batch.scores for batch in batches]),
+            class_ids=class_ids,
+            names=names,
+            labels=np.concatenate([batch.labels for batch in batches]),
+            keypoints=keypoints,
+            columns={key: np.concatenate([batch.columns[key] for batch in batches]) for key in sorted(shared)},
+        )
+
+    # ── Derived batches ──────────────────────────────────────────
+
+    def select(self, index: Any) -> "DetectionBatch":
+        """Rows picked by a boolean mask, index array or slice."""
+        return DetectionBatch(
+            boxes=self.boxes[index],
+            scores=self.scores[index],
+            class_ids=None if self.class_ids is None else self.class_ids[index],
+            names=self.names,
+            labels=None if self._labels is None else self._labels[index],
+            keypoints=None if self.keypoints is None else self.keypoints[index],
+            columns={key: value[index] for key, value in self.columns.items()},
+        )
+
+    def with_column(self, name: str, values: Any) -> "DetectionBatch":
+        values = np.asarray(values)
+        if values.shape[:1] != (len(self),):
+            raise ValueError(f"column {name!r} has {values.shape[:1]} rows, batch has {len(self)}")
+        return self._replace(columns={**self.columns, name: values})
+
+    def with_boxes(self, boxes: Any) -> "DetectionBatch":
+        return self._replace(boxes=boxes)
+
+    def with_labels(self, labels: Any) -> "DetectionBatch":
+        return self._replace(labels=np.broadcast_to(np.asarray(labels, dtype=object), (len(self),)))
+
+    def _replace(self, **changes: Any) -> "DetectionBatch":
+        fields = {
+            "boxes": self.boxes,
+            "scores": self.scores,
+            "class_ids": self.class_ids,
+            "names": self.names,
+            "labels": self._labels,
+            "keypoints": self.keypoints,
+            "columns": self.columns,
+        }
+        fields.update(changes)
+        return DetectionBatch(**fields)
+
+    # ── Access ───────────────────────────────────────────────────
+
+    @property
+    def labels(self) -> np.ndarray:
+        """(N,) object array of label strings."""
+        if self._labels is None:
+            if len(self.class_ids) == 0:
+                self._labels = np.empty(0, dtype=object)
+            else:
+                lookup = np.array(
+                    [self.names.get(class_id, str(class_id)) for class_id in range(int(self.class_ids.max()) + 1)],
+                    dtype=object,
+                )
+                self._labels = lookup[self.class_ids]
+        return self._labels
+
+    def column(self, name: str, default: Any = None) -> Optional[np.ndarray]:
+        return self.columns.get(name, default)
+
+    def keys(self) -> tuple[str, ...]:
+        """Dict keys each detection exposes, in dict order."""
+        keys = list(_FIELDS)
+        if self.class_ids is not None:
+            keys.append("class_id")
+        keys.extend(self.columns)
+        if self.keypoints is not None:
+            keys.append("keypoints")
+        return tuple(keys)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __bool__(self) -> bool:
+        return len(self.boxes) > 0
+
+    def __iter__(self) -> Iterator[Detection]:
+        for index in range(len(self.boxes)):
+            yield Detection(self, index)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("detection index out of range")
+            return Detection(self, int(index))
+        return self.select(index)
+
+    def __repr__(self) -> str:
+        return f"DetectionBatch(n={len(self)}, keys={self.keys()})"
+
+    # ── API boundary ─────────────────────────────────────────────
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """
+        The detections as plain dicts (``label``, ``confidence``, int
+        ``bbox`` tuple, then ``class_id`` / columns / ``keypoints``).
+
+        Built column-wise and cached; callers must not mutate the result.
+        """
+        if self._dicts is None:
+            fields: list[tuple[str, list[Any]]] = [
+                ("label", self.labels.tolist()),
+                ("confidence", self.scores.tolist()),
+                ("bbox", [tuple(box) for box in self.boxes.astype(np.int64).tolist()]),
+            ]
+            if self.class_ids is not None:
+                fields.append(("class_id", self.class_ids.tolist()))
+            for key, values in self.columns.items():
+                fields.append((key, [_column_value(key, value) for value in values.tolist()]))
+            if self.keypoints is not None:
+                fields.append(("keypoints", self.keypoints.tolist()))
+            keys = [key for key, _ in fields]
+            self._dicts = [dict(zip(keys, row)) for row in zip(*(values for _, values in fields))]
+        return self._dicts
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dicts())
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Results cross process boundaries (inference pool); the caches don't need to.
+        state = dict(self.__dict__)
+        state["_dicts"] = None
+        return state
+
+
+def as_batch(detections: Any) -> DetectionBatch:
+    """Accept a ``DetectionBatch``, a list of detection dicts/views, or ``None``."""
+    if isinstance(detections, DetectionBatch):
+        return detections
+    return DetectionBatch.from_dicts(detections or [])
+
+
+def _column_value(key: str, value: Any) -> Any:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if key in NULLABLE_ID_COLUMNS and value is not None and value < 0:
+        return None
+    return value
+
+
+def _to_numpy(tensor: Any) -> np.ndarray:
+    if hasattr(tensor, "cpu"):
+        tensor = tensor.cpu().numpy()
+    return np.asarray(tensor, dtype=np.float32)
@@ -1,5 +1,5 @@
-import asyncio
-from typing import Any, Optional
+import time
+from typing import Any, Optional, Sequence
 
 import aiortc
 import av
@@ -8,8 +8,41 @@ from ultralytics import YOLO
 from vision_agents.core.processors import VideoProcessor
 from vision_agents.core.utils.video_forwarder import VideoForwarder
 
-from events.detection_events import FallDetectedEvent
+from events.detection_events import FallDetectedEvent, FallStateChangedEvent
+from events.event_bus import EventBus
 from .base import draw_bbox
+from .batch_inference import BatchInferenceServer
+from .detection_feed import SECTION_FALL, DetectionFeed
+from .detections import DetectionBatch
+from .fall_rules import DEFAULT_FALL_RATIO_THRESHOLD, FallRule, default_fall_rules, evaluate_fall_rules
+from .frame_cache import FrameCache
+from .frame_hub import LATEST_WINS, FrameHub
+from .inference_pool import InferenceWorkerPool
+from .inference_scheduler import PRIORITY_CRITICAL, InferenceScheduler, JobDropped
+from .model_backends import BACKEND_TORCH, Calibration, backend_from_env, normalize_backend, prepare_weights
+from .model_registry import MODEL_REGISTRY, ModelLease, ModelRegistry
+from .motion_gate import MotionGate
+from .tracker import MultiObjectTracker, frame_time
+
+
+def parse_pose_result(
+    result: Any,
+    fall_ratio_threshold: float = DEFAULT_FALL_RATIO_THRESHOLD,
+    rules: Optional[Sequence[FallRule]] = None,
+) -> DetectionBatch:
+    """
+    Turn one ultralytics pose Results into a person batch with an ``is_falling`` column.
+
+    ``rules`` defaults to ``default_fall_rules(fall_ratio_threshold)``; every
+    rule sees all people's boxes and keypoints at once.
+    """
+    detections = DetectionBatch.from_ultralytics(result)
+    if detections.keypoints is None:
+        return DetectionBatch.empty(detections.names)
+    if rules is None:
+        rules = default_fall_rules(fall_ratio_threshold)
+    is_falling = evaluate_fall_rules(detections.boxes, detections.keypoints, rules)
+    return detections.with_labels("person").with_column("is_falling", is_falling)
 
 
 class FallDetectionProcessor(VideoProcessor):
@@ -24,25 +57,86 @@ class FallDetectionProcessor(VideoProcessor):
         fps: float = 2.0,
         model_path: str = "yolo11n-pose.pt",
         confidence_threshold: float = 0.5,
-        fall_ratio_threshold: float = 1.2, # width / height ratio to trigger fall
+        fall_ratio_threshold: float = DEFAULT_FALL_RATIO_THRESHOLD, # width / height ratio to trigger fall
+        fall_rules: Optional[Sequence[FallRule]] = None, # replaces the default rule set
+        frame_cache: Optional[FrameCache] = None,
+        frame_hub: Optional[FrameHub] = None,
+        scheduler: Optional[InferenceScheduler] = None,
+        batch_server: Optional[BatchInferenceServer] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        motion_gate: Optional[MotionGate] = None,
+        tracker: Optional[MultiObjectTracker] = None,
+        inference_pool: Optional[InferenceWorkerPool] = None,
+        backend: Optional[str] = None,
+        int8: Optional[bool] = None,
+        calibration: Optional[Calibration] = None,
+        weights_path: Optional[str] = None,
+        model_lease: Optional[ModelLease] = None,
+        detection_feed: Optional[DetectionFeed] = None,
+        event_bus: Optional[EventBus] = None,
     ) -> None:
         self.fps = float(fps)
         self.confidence_threshold = confidence_threshold
+        # Pushes compact results to metadata-stream clients.
+        self.detection_feed = detection_feed
+        # Receives a FallDetectedEvent for every inference that sees a fall,
+        # and a FallStateChangedEvent whenever fall_present flips.
+        self.event_bus = event_bus
         self.fall_ratio_threshold = fall_ratio_threshold
+        self.fall_rules = tuple(fall_rules) if fall_rules is not None else default_fall_rules(fall_ratio_threshold)
         self.model_path = model_path
+        self._frame_cache = frame_cache or FrameCache()
+        self._frame_hub = frame_hub or FrameHub()
+        self._motion_gate = motion_gate
+        # Assigns track ids and lets the publisher extrapolate boxes between runs.
+        self.tracker = tracker
+        self.scheduler = scheduler or InferenceScheduler(max_workers=1)
+        # Stale frames are skipped once they are two inference periods old.
+        self.scheduler.register(self.name, priority=PRIORITY_CRITICAL, deadline_seconds=2.0 / self.fps)
 
-        print(f"Loading YOLO Pose model from {model_path}...")
-        self.model = YOLO(model_path)
-        print("YOLO Pose model loaded.")
+        # torch / onnxruntime / openvino; unset arguments fall back to YOLO_BACKEND etc.
+        env_backend, env_int8, env_calibration = backend_from_env()
+        self.backend = normalize_backend(backend) if backend else env_backend
+        # Given weights_path was already prepared for this backend (off the event
+        # loop, see create_agent); otherwise export here, which blocks on first use.
+        self.weights_path = weights_path or prepare_weights(
+            model_path,
+            self.backend,
+            int8=env_int8 if int8 is None else int8,
+            calibration=env_calibration if calibration is None else calibration,
+        )
 
-        self.latest_detections: list[dict[str, Any]] = []
+        # With a worker pool the model lives in the worker processes only.
+        self.inference_pool = inference_pool
+        # Sessions share one instance per path; the lease serializes inference.
+        # A given model_lease was acquired off the event loop (see acquire_model) and
+        # is ours to release; otherwise the model is loaded here, which blocks.
+        self._model_lease = model_lease
+        if self._model_lease is None and inference_pool is None:
+            # No explicit device: ultralytics picks one per call.
+            self._model_lease = (model_registry or MODEL_REGISTRY).acquire(
+                self.weights_path,
+                loader=lambda: self._load_model(self.weights_path),
+                device="auto",
+                backend=self.backend,
+            )
+        self.model = self._model_lease.model if self._model_lease is not None else None
+
+        # Share batches with every other caller running this model with the same settings.
+        # Keyed on the registry's model key, so only callers of the same loaded model batch together.
+        self._batch_server = batch_server
+        self._batch_key = None
+        self._batcher = None
+        if batch_server is not None and inference_pool is None:
+            self._batch_key = (*self._model_lease.key, confidence_threshold)
+            self._batcher = batch_server.batcher(self._batch_key, owner=self.name)
+
+        self.latest_detections = DetectionBatch.empty()
         self.latest_event: Optional[FallDetectedEvent] = None
         self.fall_present: bool = False
+        # The transition that set fall_present, for subscribers attaching late.
+        self.fall_state_event: Optional[FallStateChangedEvent] = None
 
-        self._forwarder: Optional[VideoForwarder] = None
-        self._owns_forwarder = False
-        self._handler_registered = False
-        self._processing_lock = asyncio.Lock()
         self._frame_number = 0
 
     async def process_video(
@@ -52,137 +146,152 @@ class FallDetectionProcessor(VideoProcessor):
         shared_forwarder: Optional[VideoForwarder] = None,
     ) -> None:
         _ = participant_id
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-            if self._owns_forwarder:
-                await self._forwarder.stop()
-            self._handler_registered = False
-            self._owns_forwarder = False
-
-        self._forwarder = shared_forwarder
-        if self._forwarder is None:
-            self._forwarder = VideoForwarder(
-                input_track=track,
-                max_buffer=5,
-                fps=max(1.0, self.fps),
-                name=f"{self.name}_forwarder",
-            )
-            await self._forwarder.start()
-            self._owns_forwarder = True
-
-        self._forwarder.add_frame_handler(
+        # Re-subscribing under the same name replaces the previous track (e.g., track switch).
+        await self._frame_hub.subscribe(
+            track,
             self._on_frame,
             fps=self.fps,
-            name=f"{self.name}_handler",
+            name=self.name,
+            policy=LATEST_WINS,
+            shared_forwarder=shared_forwarder,
         )
-        self._handler_registered = True
 
     async def _on_frame(self, frame: av.VideoFrame) -> None:
-        if self._processing_lock.locked():
+        if self._motion_gate is not None and not self._motion_gate.should_run(self.name, frame):
+            # Scene unchanged since the last run: keep the previous detections
+            # (re-confirmed so their tracks stay alive).
+            if self.tracker is not None:
+                self.latest_detections = self.tracker.update(self.latest_detections, frame_time(frame))
+                self._publish(frame)
+            return
+        frame_bgr = self._frame_cache.bgr(frame)
+        frame_number = self._frame_number
+        self._frame_number += 1
+        try:
+            if self._batcher is not None:
+                detections = await self._batcher.submit(frame_bgr, self._predict, postprocess=self._parse)
+            else:
+                detections = await self.scheduler.submit(
+                    self.name,
+                    self._detect,
+                    frame_number,
+                    frame_bgr,
+                    stream=self,
+                )
+        except JobDropped:
             return
+        if self._motion_gate is not None:
+            self._motion_gate.mark_ran(self.name)
+        if self.tracker is not None:
+            detections = self.tracker.update(detections, frame_time(frame))
 
-        async with self._processing_lock:
-            frame_bgr = frame.to_ndarray(format="bgr24")
-            frame_number = self._frame_number
-            self._frame_number += 1
-            detections = await asyncio.to_thread(
-                self._detect,
-                frame_number,
-                frame_bgr,
+        self.latest_detections = detections
+
+        # Check if any detected person is falling; report the most confident one
+        falling = detections.column("is_falling")
+        fall_detected = falling is not None and bool(falling.any())
+        highest_conf_fall = 0.0
+        fall_bbox = (0, 0, 0, 0)
+        if fall_detected:
+            fall = detections[int(np.argmax(np.where(falling, detections.scores, -1.0)))]
+            highest_conf_fall = fall.confidence
+            fall_bbox = fall.bbox
+
+        changed = fall_detected != self.fall_present
+        self.fall_present = fall_detected
+        if fall_detected:
+            self.latest_event = FallDetectedEvent(
+                frame_number=frame_number,
+                timestamp=frame_time(frame),
+                confidence=highest_conf_fall,
+                bbox=fall_bbox,
+            )
+        else:
+            self.latest_event = None
+        if changed:
+            self.fall_state_event = FallStateChangedEvent(
+                frame_number=frame_number,
+                timestamp=frame_time(frame),
+                fall_present=fall_detected,
+                confidence=highest_conf_fall,
+                bbox=fall_bbox,
+                detected_at=time.monotonic(),
             )
+        self._publish(frame)
+        if self.event_bus is not None:
+            if changed:
+                await self.event_bus.publish(self.fall_state_event)
+            if self.latest_event is not None:
+                await self.event_bus.publish(self.latest_event)
 
-            self.latest_detections = detections
-            
-            # Check if any detected person is falling
-            fall_detected = False
-            highest_conf_fall = 0.0
-            fall_bbox = (0, 0, 0, 0)
-
-            for det in detections:
-                if det.get("is_falling", False):
-                    fall_detected = True
-                    if det["confidence"] > highest_conf_fall:
-                        highest_conf_fall = det["confidence"]
-                        fall_bbox = det["bbox"]
-
-            self.fall_present = fall_detected
-            if fall_detected:
-                self.latest_event = FallDetectedEvent(
-                    frame_number=frame_number,
-                    confidence=highest_conf_fall,
-                    bbox=fall_bbox,
-                )
-            else:
-                self.latest_event = None
+    def _publish(self, frame: av.VideoFrame) -> None:
+        if self.detection_feed is not None:
+            self.detection_feed.publish_detections(
+                SECTION_FALL,
+                self.latest_detections,
+                frame_time(frame),
+                columns={"falling": "is_falling"},
+                present=self.fall_present,
+            )
+
+    @classmethod
+    async def acquire_model(
+        cls,
+        weights_path: str,
+        backend: str = BACKEND_TORCH,
+        model_registry: Optional[ModelRegistry] = None,
+    ) -> ModelLease:
+        """Lease the pose model for ``weights_path`` (from ``prepare_weights``), loading it on a worker thread."""
+        return await (model_registry or MODEL_REGISTRY).acquire_async(
+            weights_path,
+            loader=lambda: cls._load_model(weights_path),
+            device="auto",
+            backend=backend,
+        )
+
+    @staticmethod
+    def _load_model(model_path: str) -> YOLO:
+        print(f"Loading YOLO Pose model from {model_path}...")
+        model = YOLO(model_path, task="pose")
+        print("YOLO Pose model loaded.")
+        return model
+
+    def _predict(self, frames: list[np.ndarray]) -> list[Any]:
+        # A list input runs as one batch and yields one Results per frame.
+        return self._model_lease.infer(frames, verbose=False, conf=self.confidence_threshold)
+
+    def _parse(self, result: Any) -> DetectionBatch:
+        return parse_pose_result(result, rules=self.fall_rules)
 
     def _detect(
         self,
         frame_number: int,
         frame_bgr: np.ndarray,
-    ) -> list[dict[str, Any]]:
+    ) -> DetectionBatch:
         _ = frame_number
-        results = self.model(frame_bgr, verbose=False, conf=self.confidence_threshold)
-        detections = []
-
-        if results and len(results) > 0:
-            result = results[0]
-            if result.boxes and result.keypoints:
-                for box, keypoints in zip(result.boxes, result.keypoints):
-                    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                    conf = float(box.conf[0])
-                    
-                    # Pose keypoints: [17, 2] or [17, 3] usually
-                    kpts = keypoints.data[0].tolist() if keypoints.data is not None else []
-                    
-                    is_falling = False
-                    
-                    # Bounding box aspect ratio check
-                    width = max(1, x2 - x1)
-                    height = max(1, y2 - y1)
-                    ratio = width / height
-                    
-                    if ratio > self.fall_ratio_threshold:
-                        is_falling = True
-                    
-                    # Further keypoint analysis can be added here
-                    # e.g. check if head keypoints are lower than hip keypoints
-                    if len(kpts) >= 13:
-                        # 0: nose, 11: left_hip, 12: right_hip
-                        nose_y = kpts[0][1] if len(kpts[0]) > 1 else 0
-                        l_hip_y = kpts[11][1] if len(kpts[11]) > 1 else 0
-                        r_hip_y = kpts[12][1] if len(kpts[12]) > 1 else 0
-                        
-                        # Only check if points are valid (y > 0)
-                        if nose_y > 0 and l_hip_y > 0 and r_hip_y > 0:
-                            avg_hip_y = (l_hip_y + r_hip_y) / 2
-                            # in image coords, higher y means lower visually
-                            if nose_y > avg_hip_y: 
-                                is_falling = True
-                    
-                    detections.append({
-                        "label": "person", 
-                        "confidence": conf,
-                        "bbox": (x1, y1, x2, y2),
-                        "is_falling": is_falling,
-                        "keypoints": kpts
-                    })
-
-        return detections
+        if self.inference_pool is not None:
+            return self.inference_pool.infer(
+                self.name,
+                self.weights_path,
+                frame_bgr,
+                predict_kwargs={"conf": self.confidence_threshold},
+                parse_kwargs={"rules": self.fall_rules},
+            )
+        return self._parse(self._predict([frame_bgr])[0])
 
     def state(self) -> dict[str, Any]:
         return {
-            "detections": self.latest_detections,
+            "detections": self.latest_detections.to_dicts(),
             "fall_present": self.fall_present
         }
 
     async def stop_processing(self) -> None:
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-        if self._forwarder is not None and self._owns_forwarder:
-            await self._forwarder.stop()
-        self._handler_registered = False
-        self._forwarder = None
-        self._owns_forwarder = False
+        await self._frame_hub.unsubscribe(self.name)
 
     async def close(self) -> None:
         await self.stop_processing()
+        if self._batcher is not None:
+            self._batcher = None
+            await self._batch_server.release(self._batch_key)
+        if self._model_lease is not None:
+            self._model_lease.release()
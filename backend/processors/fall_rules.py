@@ -0,0 +1,115 @@
+"""
+Fall heuristics over whole pose batches.
+
+Each rule looks at every person in a frame at once: it gets the (N, 4)
+boxes and the (N, 17, 2|3) COCO keypoints of a ``DetectionBatch`` and
+returns an (N,) bool mask of people it considers fallen. A person is
+flagged ``is_falling`` if any rule fires. New heuristics are small frozen
+dataclasses with a ``__call__``; they must be picklable because the
+inference worker processes run them too.
+
+Keypoints below ``min_confidence`` (or at the origin, which ultralytics uses
+for keypoints it could not place) never contribute to a rule.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Protocol, Sequence
+
+import numpy as np
+
+
+# COCO keypoint indices.
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 5, 6
+LEFT_HIP, RIGHT_HIP = 11, 12
+
+DEFAULT_FALL_RATIO_THRESHOLD = 1.2
+DEFAULT_KEYPOINT_MIN_CONFIDENCE = 0.5
+DEFAULT_TORSO_MAX_ANGLE_DEGREES = 60.0
+
+# Smallest positive float32: ultralytics puts unplaced keypoints at exactly 0.
+_PLACED = float(np.finfo(np.float32).tiny)
+
+
+class FallRule(Protocol):
+    def __call__(self, boxes: np.ndarray, keypoints: Optional[np.ndarray]) -> np.ndarray:
+        ...
+
+
+def visible_keypoints(keypoints: np.ndarray, min_confidence: float) -> np.ndarray:
+    """(N,) mask of people whose given (N, k, 2|3) keypoints are all placed and confident."""
+    # x > 0, y > 0 and (when there is a confidence channel) conf >= min, in one comparison.
+    floor = np.array([_PLACED, _PLACED, min_confidence], dtype=keypoints.dtype)[: keypoints.shape[-1]]
+    return (keypoints >= floor).all(axis=(1, 2))
+
+
+def _has_keypoints(keypoints: Optional[np.ndarray], *indices: int) -> bool:
+    return keypoints is not None and keypoints.ndim == 3 and keypoints.shape[1] > max(indices)
+
+
+@dataclass(frozen=True)
+class AspectRatioRule:
+    """Box much wider than tall (width / height above ``threshold``)."""
+
+    threshold: float = DEFAULT_FALL_RATIO_THRESHOLD
+
+    def __call__(self, boxes: np.ndarray, keypoints: Optional[np.ndarray]) -> np.ndarray:
+        # On whole pixels, like the drawn boxes.
+        boxes = boxes.astype(np.int64)
+        width = np.maximum(1, boxes[:, 2] - boxes[:, 0])
+        height = np.maximum(1, boxes[:, 3] - boxes[:, 1])
+        return width / height > self.threshold
+
+
+@dataclass(frozen=True)
+class HeadBelowHipsRule:
+    """Nose lower in the image than the midpoint of the hips."""
+
+    min_confidence: float = DEFAULT_KEYPOINT_MIN_CONFIDENCE
+
+    def __call__(self, boxes: np.ndarray, keypoints: Optional[np.ndarray]) -> np.ndarray:
+        if not _has_keypoints(keypoints, NOSE, LEFT_HIP, RIGHT_HIP):
+            return np.zeros(len(boxes), dtype=bool)
+        selected = keypoints[:, [NOSE, LEFT_HIP, RIGHT_HIP]]
+        nose_y, left_hip_y, right_hip_y = selected[:, :, 1].T
+        # In image coords, higher y means lower visually.
+        return visible_keypoints(selected, self.min_confidence) & (2 * nose_y > left_hip_y + right_hip_y)
+
+
+@dataclass(frozen=True)
+class TorsoAngleRule:
+    """Shoulders-to-hips line tilted more than ``max_angle_degrees`` from vertical."""
+
+    max_angle_degrees: float = DEFAULT_TORSO_MAX_ANGLE_DEGREES
+    min_confidence: float = DEFAULT_KEYPOINT_MIN_CONFIDENCE
+
+    def __call__(self, boxes: np.ndarray, keypoints: Optional[np.ndarray]) -> np.ndarray:
+        if not _has_keypoints(keypoints, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP):
+            return np.zeros(len(boxes), dtype=bool)
+        selected = keypoints[:, [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]]
+        # Hip midpoint minus shoulder midpoint, doubled (the ratio is all that matters).
+        dx, dy = np.abs(selected[:, 2:, :2].sum(axis=1) - selected[:, :2, :2].sum(axis=1)).T
+        # Angle from vertical above the limit (lying head-left or head-right),
+        # compared as |dx| > tan(limit) * |dy| to skip the arctan.
+        tilted = dx > np.tan(np.radians(self.max_angle_degrees)) * dy
+        return visible_keypoints(selected, self.min_confidence) & tilted
+
+
+def default_fall_rules(fall_ratio_threshold: float = DEFAULT_FALL_RATIO_THRESHOLD) -> tuple[FallRule, ...]:
+    return (
+        AspectRatioRule(fall_ratio_threshold),
+        HeadBelowHipsRule(),
+        TorsoAngleRule(),
+    )
+
+
+def evaluate_fall_rules(
+    boxes: np.ndarray,
+    keypoints: Optional[np.ndarray],
+    rules: Sequence[FallRule],
+) -> np.ndarray:
+    """(N,) mask of people flagged by any of ``rules``."""
+    falling = np.zeros(len(boxes), dtype=bool)
+    for rule in rules:
+        falling |= rule(boxes, keypoints)
+    return falling
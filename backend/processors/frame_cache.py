@@ -0,0 +1,172 @@
+"""
+Shared decoded-frame cache for video processors.
+
+Every processor attached to a call receives the same ``av.VideoFrame`` objects.
+Instead of each one running its own YUV -> BGR conversion, they ask the cache,
+which decodes a frame once (keyed by pts) and hands every caller the same
+read-only BGR ndarray. Grayscale and downscaled variants are computed lazily
+the first time somebody asks for them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import av
+import cv2
+import numpy as np
+
+
+DEFAULT_MAX_AGE_SECONDS = 2.0
+DEFAULT_MAX_ENTRIES = 16
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class DecodedFrame:
+    """
+    One decoded video frame plus its lazily computed variants.
+
+    The arrays handed out are read-only; callers that want to draw on the
+    frame must take their own copy.
+    """
+
+    __slots__ = ("pts", "time_base", "created_ts", "_bgr", "_gray", "_scaled", "_lock")
+
+    def __init__(self, pts: Optional[int], time_base: Any, bgr: np.ndarray) -> None:
+        self.pts = pts
+        self.time_base = time_base
+        self.created_ts = time.monotonic()
+        self._bgr = _readonly(bgr)
+        self._gray: Optional[np.ndarray] = None
+        self._scaled: dict[tuple[int, bool], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def bgr(self) -> np.ndarray:
+        return self._bgr
+
+    @property
+    def width(self) -> int:
+        return int(self._bgr.shape[1])
+
+    @property
+    def height(self) -> int:
+        return int(self._bgr.shape[0])
+
+    def gray(self) -> np.ndarray:
+        """Return the single-channel grayscale version of the frame."""
+        with self._lock:
+            if self._gray is None:
+                self._gray = _readonly(cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY))
+            return self._gray
+
+    def downscaled(self, width: int, gray: bool = False) -> np.ndarray:
+        """
+        Return the frame resized to ``width`` pixels wide (aspect preserved).
+
+        Args:
+            width: Target width in pixels. Widths >= the frame width return
+                the full-resolution array.
+            gray: Return the grayscale variant instead of BGR.
+        """
+        width = int(width)
+        source = self.gray() if gray else self._bgr
+        if width <= 0 or width >= source.shape[1]:
+            return source
+
+        key = (width, gray)
+        with self._lock:
+            scaled = self._scaled.get(key)
+            if scaled is None:
+                height = max(1, int(round(source.shape[0] * width / source.shape[1])))
+                scaled = _readonly(
+                    cv2.resize(source, (width, height), interpolation=cv2.INTER_AREA)
+                )
+                self._scaled[key] = scaled
+            return scaled
+
+
+class FrameCache:
+    """
+    Decode-once cache for ``av.VideoFrame`` objects, keyed by frame pts.
+
+    Entries older than ``max_age_seconds`` are evicted on every lookup, and
+    the cache never holds more than ``max_entries`` frames. ``hits`` counts
+    the YUV -> BGR conversions that were saved.
+    """
+
+    def __init__(
+        self,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.max_age_seconds = max(0.05, float(max_age_seconds))
+        self.max_entries = max(1, int(max_entries))
+
+        self._entries: "OrderedDict[Hashable, DecodedFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(frame: av.VideoFrame) -> Hashable:
+        # Frames without a pts cannot be matched across processors reliably;
+        # fall back to object identity so the same object still shares work.
+        if frame.pts is None:
+            return ("id", id(frame))
+        return ("pts", int(frame.pts))
+
+    def _evict_locked(self, now: float) -> None:
+        while self._entries:
+            _, oldest = next(iter(self._entries.items()))
+            expired = now - oldest.created_ts > self.max_age_seconds
+            if not expired and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, frame: av.VideoFrame) -> DecodedFrame:
+        """Return the decoded frame, converting it only on the first request."""
+        key = self.key(frame)
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Decode outside the lock so a slow conversion doesn't block lookups
+        # for other frames.
+        decoded = DecodedFrame(frame.pts, frame.time_base, frame.to_ndarray(format="bgr24"))
+        with self._lock:
+            # Another caller may have raced us; keep the first copy.
+            entry = self._entries.setdefault(key, decoded)
+            self._evict_locked(time.monotonic())
+            return entry
+
+    def bgr(self, frame: av.VideoFrame) -> np.ndarray:
+        """Shortcut for ``get(frame).bgr``."""
+        return self.get(frame).bgr
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,311 @@
+"""
+Single-ingest frame fan-out for video processors.
+
+Without a hub, every processor that receives ``shared_forwarder=None`` starts
+its own ``VideoForwarder`` on the same camera track, so the track gets read,
+buffered and rate-limited once per processor. ``FrameHub`` owns exactly one
+forwarder per input track and fans frames out to registered consumers, each
+with its own fps, bounded queue and delivery task. A slow consumer only ever
+lags itself.
+"""
+
+import asyncio
+import functools
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import aiortc
+import av
+from vision_agents.core.utils.video_forwarder import VideoForwarder
+
+
+LATEST_WINS = "latest"
+DROP_OLDEST = "drop_oldest"
+QUEUE_POLICIES = (LATEST_WINS, DROP_OLDEST)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Consumer:
+    name: str
+    handler: Callable[[av.VideoFrame], Any]
+    fps: float
+    policy: str
+    queue_size: int
+    source_key: int
+    queue: deque = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    last_accept_ts: float = 0.0
+    accepted: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    errors: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+
+
+@dataclass
+class _Source:
+    track: aiortc.VideoStreamTrack
+    forwarder: VideoForwarder
+    owns_forwarder: bool
+    dispatch: Callable[[av.VideoFrame], None]
+    dispatch_fps: float
+    consumers: set[str] = field(default_factory=set)
+    frames_in: int = 0
+
+
+class FrameHub:
+    """
+    Fan one forwarder per input track out to many frame consumers.
+
+    Consumers are identified by name; subscribing again with the same name
+    replaces the previous subscription (e.g. when the agent switches tracks).
+    """
+
+    def __init__(self, max_buffer: int = 5, name: str = "frame_hub") -> None:
+        self.max_buffer = max(1, int(max_buffer))
+        self.name = name
+        self._sources: dict[int, _Source] = {}
+        self._consumers: dict[str, _Consumer] = {}
+        self._lock = asyncio.Lock()
+
+    async def subscribe(
+        self,
+        track: aiortc.VideoStreamTrack,
+        handler: Callable[[av.VideoFrame], Any],
+        *,
+        fps: float,
+        name: str,
+        policy: str = LATEST_WINS,
+        queue_size: int = 1,
+        shared_forwarder: Optional[VideoForwarder] = None,
+    ) -> None:
+        """
+        Deliver frames from ``track`` to ``handler`` at up to ``fps``.
+
+        Args:
+            track: Input video track.
+            handler: Sync or async callable receiving each ``av.VideoFrame``.
+            fps: Maximum delivery rate for this consumer.
+            name: Unique consumer name.
+            policy: ``LATEST_WINS`` keeps only the newest frame;
+                ``DROP_OLDEST`` keeps up to ``queue_size`` frames and discards
+                the oldest when full.
+            queue_size: Queue bound for ``DROP_OLDEST``.
+            shared_forwarder: Existing forwarder for ``track`` (e.g. the
+                agent's); used instead of creating one.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"policy must be one of {QUEUE_POLICIES}, got {policy!r}")
+
+        async with self._lock:
+            if name in self._consumers:
+                await self._remove_consumer_locked(name)
+
+            key = id(track)
+            source = self._sources.get(key)
+            if source is None:
+                source = await self._open_source_locked(track, fps, shared_forwarder)
+            if fps > source.dispatch_fps:
+                await self._raise_source_fps_locked(source, fps)
+
+            consumer = _Consumer(
+                name=name,
+                handler=handler,
+                fps=float(fps),
+                policy=policy,
+                queue_size=1 if policy == LATEST_WINS else max(1, int(queue_size)),
+                source_key=key,
+            )
+            consumer.task = asyncio.create_task(
+                self._deliver_loop(consumer),
+                name=f"{self.name}_{name}",
+            )
+            self._consumers[name] = consumer
+            source.consumers.add(name)
+
+    async def unsubscribe(self, name: str) -> None:
+        async with self._lock:
+            await self._remove_consumer_locked(name)
+
+    async def close(self) -> None:
+        async with self._lock:
+            for name in list(self._consumers):
+                await self._remove_consumer_locked(name)
+
+    def subscribers(self) -> list[str]:
+        return list(self._consumers)
+
+    def stats(self) -> dict[str, Any]:
+        consumers: dict[str, Any] = {}
+        for name, consumer in self._consumers.items():
+            consumers[name] = {
+                "fps": consumer.fps,
+                "policy": consumer.policy,
+                "queue_depth": len(consumer.queue),
+                "accepted": consumer.accepted,
+                "delivered": consumer.delivered,
+                "dropped": consumer.dropped,
+                "errors": consumer.errors,
+                "last_lag_ms": consumer.last_lag * 1000.0,
+                "max_lag_ms": consumer.max_lag * 1000.0,
+                "avg_lag_ms": (
+                    consumer.total_lag / consumer.delivered * 1000.0 if consumer.delivered else 0.0
+                ),
+            }
+        return {
+            "sources": [
+                {
+                    "forwarder": source.forwarder.name,
+                    "owns_forwarder": source.owns_forwarder,
+                    "dispatch_fps": source.dispatch_fps,
+                    "frames_in": source.frames_in,
+                    "consumers": sorted(source.consumers),
+                }
+                for source in self._sources.values()
+            ],
+            "consumers": consumers,
+        }
+
+    async def _open_source_locked(
+        self,
+        track: aiortc.VideoStreamTrack,
+        fps: float,
+        shared_forwarder: Optional[VideoForwarder],
+    ) -> _Source:
+        owns_forwarder = shared_forwarder is None
+        forwarder = shared_forwarder
+        if forwarder is None:
+            forwarder = VideoForwarder(
+                input_track=track,
+                max_buffer=self.max_buffer,
+                fps=max(1.0, fps),
+                name=f"{self.name}_forwarder",
+            )
+            forwarder.start()
+
+        dispatch_fps = fps if forwarder.fps is None else min(fps, forwarder.fps)
+        key = id(track)
+        dispatch = functools.partial(self._dispatch, key)
+        forwarder.add_frame_handler(dispatch, fps=dispatch_fps, name=f"{self.name}_dispatch")
+        source = _Source(
+            track=track,
+            forwarder=forwarder,
+            owns_forwarder=owns_forwarder,
+            dispatch=dispatch,
+            dispatch_fps=dispatch_fps,
+        )
+        self._sources[key] = source
+        return source
+
+    async def _raise_source_fps_locked(self, source: _Source, fps: float) -> None:
+        forwarder = source.forwarder
+        if forwarder.fps is not None and fps > forwarder.fps:
+            if not source.owns_forwarder:
+                # Can't speed up somebody else's forwarder; consumers get what it produces.
+                fps = forwarder.fps
+            else:
+                await forwarder.stop()
+                forwarder = VideoForwarder(
+                    input_track=source.track,
+                    max_buffer=self.max_buffer,
+                    fps=max(1.0, fps),
+                    name=f"{self.name}_forwarder",
+                )
+                forwarder.start()
+                source.forwarder = forwarder
+                dispatch = functools.partial(self._dispatch, id(source.track))
+                forwarder.add_frame_handler(dispatch, fps=fps, name=f"{self.name}_dispatch")
+                source.dispatch = dispatch
+                source.dispatch_fps = fps
+                return
+
+        if fps <= source.dispatch_fps:
+            return
+        # Register the faster handler before removing the old one so the
+        # forwarder never sees zero handlers (which would stop it).
+        old_dispatch = source.dispatch
+        dispatch = functools.partial(self._dispatch, id(source.track))
+        forwarder.add_frame_handler(dispatch, fps=fps, name=f"{self.name}_dispatch")
+        await forwarder.remove_frame_handler(old_dispatch)
+        source.dispatch = dispatch
+        source.dispatch_fps = fps
+
+    async def _remove_consumer_locked(self, name: str) -> None:
+        consumer = self._consumers.pop(name, None)
+        if consumer is None:
+            return
+        if consumer.task is not None:
+            consumer.task.cancel()
+            try:
+                await consumer.task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("Frame consumer %s failed while stopping", name)
+        consumer.queue.clear()
+
+        source = self._sources.get(consumer.source_key)
+        if source is None:
+            return
+        source.consumers.discard(name)
+        if not source.consumers:
+            del self._sources[consumer.source_key]
+            await source.forwarder.remove_frame_handler(source.dispatch)
+            if source.owns_forwarder:
+                await source.forwarder.stop()
+
+    def _dispatch(self, source_key: int, frame: av.VideoFrame) -> None:
+        source = self._sources.get(source_key)
+        if source is None:
+            return
+        source.frames_in += 1
+        now = asyncio.get_running_loop().time()
+        for name in source.consumers:
+            consumer = self._consumers.get(name)
+            if consumer is None:
+                continue
+            min_interval = 1.0 / consumer.fps if consumer.fps > 0 else 0.0
+            if min_interval and now - consumer.last_accept_ts < min_interval:
+                continue
+            consumer.last_accept_ts = now
+            consumer.accepted += 1
+
+            if consumer.policy == LATEST_WINS:
+                consumer.dropped += len(consumer.queue)
+                consumer.queue.clear()
+            elif len(consumer.queue) >= consumer.queue_size:
+                consumer.queue.popleft()
+                consumer.dropped += 1
+            consumer.queue.append((now, frame))
+            consumer.wakeup.set()
+
+    async def _deliver_loop(self, consumer: _Consumer) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not consumer.queue:
+                consumer.wakeup.clear()
+                await consumer.wakeup.wait()
+                continue
+
+            enqueued_ts, frame = consumer.queue.popleft()
+            lag = loop.time() - enqueued_ts
+            consumer.last_lag = lag
+            consumer.max_lag = max(consumer.max_lag, lag)
+            consumer.total_lag += lag
+            consumer.delivered += 1
+            try:
+                result = consumer.handler(frame)
+                if asyncio.iscoroutine(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                consumer.errors += 1
+                logger.exception("Frame consumer %s failed", consumer.name)
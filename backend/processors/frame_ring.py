@@ -0,0 +1,325 @@
+"""
+Shared-memory ring of preallocated frame slots.
+
+Frames used to be copied at every hand-off: the camera returned a fresh copy
+per ``get_latest_frame`` call and the publisher allocated a new annotated
+frame for every output. ``SharedFrameRing`` keeps a fixed number of slots in
+one ``multiprocessing.shared_memory`` segment. A single writer fills a slot
+(directly, via ``reserve``/``commit``, or by copying with ``write``) and
+publishes it under a monotonically increasing sequence number. Readers pin a
+slot with ``acquire`` and get a read-only ndarray view of it, with no copy, in
+this process or any process that attached the ring. The writer never reuses
+a pinned slot; if every slot is pinned the write fails with ``RingOverrun``.
+
+A reader process that dies while holding a pin leaves that slot pinned.
+Size the ring with a spare slot per such reader.
+"""
+
+import logging
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+
+import numpy as np
+
+
+# Per-slot metadata, stored at the front of the segment so other processes see it.
+_SLOT_META = np.dtype([
+    ("seq", "<i8"),        # published sequence number; -1 = empty or being written
+    ("refs", "<i8"),       # readers currently pinning the slot
+    ("height", "<i4"),
+    ("width", "<i4"),
+    ("channels", "<i4"),
+    ("_pad", "<i4"),
+    ("pts", "<f8"),        # NaN when unknown
+    ("written_ts", "<f8"),
+])
+# Ring-wide counters: next sequence number, latest slot, writes, overruns.
+_RING_FIELDS = 4
+_NEXT_SEQ, _LATEST_SLOT, _WRITES, _OVERRUNS = range(_RING_FIELDS)
+_ALIGN = 64
+
+logger = logging.getLogger(__name__)
+
+
+class RingOverrun(RuntimeError):
+    """Raised by the writer when every slot is pinned by a reader."""
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameRef:
+    """
+    A pinned, read-only view of one ring slot.
+
+    Release it (or use it as a context manager) once done; until then the
+    writer will not overwrite the slot.
+    """
+
+    __slots__ = ("array", "seq", "pts", "written_ts", "_ring", "_slot")
+
+    def __init__(
+        self,
+        ring: "SharedFrameRing",
+        slot: int,
+        array: np.ndarray,
+        seq: int,
+        pts: Optional[float],
+        written_ts: float,
+    ) -> None:
+        self._ring = ring
+        self._slot = slot
+        self.array = array
+        self.seq = seq
+        self.pts = pts
+        self.written_ts = written_ts
+
+    def release(self) -> None:
+        """Unpin the slot; safe to call more than once."""
+        if self._ring is None:
+            return
+        ring, self._ring = self._ring, None
+        self.array = None
+        ring._unpin(self._slot)
+
+    def __enter__(self) -> "FrameRef":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class SharedFrameRing:
+    """
+    Single-writer, multi-reader ring of frame slots in shared memory.
+
+    Args:
+        slots: Number of preallocated slots.
+        slot_bytes: Capacity of each slot; frames up to this size (any shape)
+            fit without reallocating.
+        dtype: Element type of every frame in the ring.
+        process_shared: Guard metadata with a multiprocessing lock so the ring
+            can be handed to child processes (pass it as a ``Process`` arg).
+            Otherwise a cheaper thread lock is used and the ring is local to
+            this process.
+        name: Existing segment to attach to instead of creating one (used
+            when unpickling in a child process).
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        slot_bytes: int,
+        dtype: Any = np.uint8,
+        process_shared: bool = False,
+        name: Optional[str] = None,
+        _lock: Any = None,
+    ) -> None:
+        self.slots = max(2, int(slots))
+        self.slot_bytes = max(1, int(slot_bytes))
+        self.dtype = np.dtype(dtype)
+        self.process_shared = process_shared
+
+        if _lock is not None:
+            self._lock = _lock
+        elif process_shared:
+            import multiprocessing
+
+            self._lock = multiprocessing.get_context("spawn").Lock()
+        else:
+            self._lock = threading.Lock()
+
+        self._stride = _align(self.slot_bytes)
+        self._meta_bytes = _align(_RING_FIELDS * 8 + self.slots * _SLOT_META.itemsize)
+        self._owner = name is None
+        if self._owner:
+            self._shm = SharedMemory(create=True, size=self._meta_bytes + self.slots * self._stride)
+        else:
+            self._shm = SharedMemory(name=name)
+
+        buf = self._shm.buf
+        self._ring = np.ndarray((_RING_FIELDS,), dtype="<i8", buffer=buf)
+        self._meta = np.ndarray((self.slots,), dtype=_SLOT_META, buffer=buf, offset=_RING_FIELDS * 8)
+        if self._owner:
+            self._ring[:] = 0
+            self._ring[_LATEST_SLOT] = -1
+            self._meta["seq"] = -1
+            self._meta["refs"] = 0
+        self._cursor = 0
+        self._closed = False
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __getstate__(self) -> dict[str, Any]:
+        if not self.process_shared:
+            raise TypeError("SharedFrameRing must be created with process_shared=True to cross processes")
+        return {
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "dtype": self.dtype.str,
+            "name": self.name,
+            "lock": self._lock,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(
+            state["slots"],
+            state["slot_bytes"],
+            dtype=state["dtype"],
+            process_shared=True,
+            name=state["name"],
+            _lock=state["lock"],
+        )
+
+    def _slot_view(self, slot: int, shape: tuple[int, ...]) -> np.ndarray:
+        return np.ndarray(
+            shape,
+            dtype=self.dtype,
+            buffer=self._shm.buf,
+            offset=self._meta_bytes + slot * self._stride,
+        )
+
+    # ── Writer ──────────────────────────────────────────────────
+
+    def reserve(self, shape: tuple[int, ...]) -> tuple[int, np.ndarray]:
+        """
+        Claim the next free slot and return ``(slot, writable view)``.
+
+        Fill the view in place (e.g. ``cap.read(view)``) and then call
+        ``commit``; readers don't see the slot until then.
+
+        Raises:
+            ValueError: The frame doesn't fit in a slot.
+            RingOverrun: Every slot is pinned by a reader.
+        """
+        shape = tuple(int(dim) for dim in shape)
+        if not 2 <= len(shape) <= 3:
+            raise ValueError(f"frames must be (H, W) or (H, W, C), got {shape}")
+        nbytes = int(np.prod(shape)) * self.dtype.itemsize
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"frame of {nbytes} bytes does not fit a {self.slot_bytes}-byte slot")
+
+        with self._lock:
+            latest = int(self._ring[_LATEST_SLOT])
+            for step in range(self.slots):
+                slot = (self._cursor + step) % self.slots
+                # Keep the latest frame readable while the next one is written.
+                if slot == latest or self._meta[slot]["refs"] > 0:
+                    continue
+                self._meta[slot]["seq"] = -1
+                self._cursor = (slot + 1) % self.slots
+                break
+            else:
+                self._ring[_OVERRUNS] += 1
+                raise RingOverrun(f"all {self.slots} slots are pinned by readers")
+
+            meta = self._meta[slot]
+            meta["height"] = shape[0]
+            meta["width"] = shape[1]
+            meta["channels"] = shape[2] if len(shape) == 3 else 0
+        return slot, self._slot_view(slot, shape)
+
+    def commit(self, slot: int, pts: Optional[float] = None) -> int:
+        """Publish a reserved slot and return its sequence number."""
+        with self._lock:
+            seq = int(self._ring[_NEXT_SEQ])
+            self._ring[_NEXT_SEQ] = seq + 1
+            meta = self._meta[slot]
+            meta["pts"] = np.nan if pts is None else float(pts)
+            meta["written_ts"] = time.time()
+            meta["seq"] = seq
+            self._ring[_LATEST_SLOT] = slot
+            self._ring[_WRITES] += 1
+        return seq
+
+    def abort(self, slot: int) -> None:
+        """Give back a reserved slot without publishing it."""
+        with self._lock:
+            self._meta[slot]["seq"] = -1
+
+    def write(self, frame: np.ndarray, pts: Optional[float] = None) -> int:
+        """Copy ``frame`` into the next free slot and publish it."""
+        slot, view = self.reserve(frame.shape)
+        np.copyto(view, frame, casting="unsafe")
+        return self.commit(slot, pts)
+
+    # ── Readers ─────────────────────────────────────────────────
+
+    def latest_seq(self) -> int:
+        """Sequence number of the newest published frame, or -1 if none."""
+        with self._lock:
+            slot = int(self._ring[_LATEST_SLOT])
+            return int(self._meta[slot]["seq"]) if slot >= 0 else -1
+
+    def acquire(self, seq: Optional[int] = None) -> Optional[FrameRef]:
+        """
+        Pin and return the newest frame, or frame ``seq`` if it's still in the ring.
+
+        Returns ``None`` if there is no such frame. The returned view is
+        read-only and stays valid until ``FrameRef.release``.
+        """
+        with self._lock:
+            if seq is None:
+                slot = int(self._ring[_LATEST_SLOT])
+                if slot < 0:
+                    return None
+            else:
+                matches = np.flatnonzero(self._meta["seq"] == seq)
+                if seq < 0 or not matches.size:
+                    return None
+                slot = int(matches[0])
+            meta = self._meta[slot]
+            if meta["seq"] < 0:
+                return None
+            meta["refs"] += 1
+            shape = (int(meta["height"]), int(meta["width"]))
+            if meta["channels"]:
+                shape += (int(meta["channels"]),)
+            frame_seq = int(meta["seq"])
+            pts = None if np.isnan(meta["pts"]) else float(meta["pts"])
+            written_ts = float(meta["written_ts"])
+
+        view = self._slot_view(slot, shape)
+        view.flags.writeable = False
+        return FrameRef(self, slot, view, frame_seq, pts, written_ts)
+
+    def _unpin(self, slot: int) -> None:
+        if self._closed:
+            return
+        with self._lock:
+            meta = self._meta[slot]
+            meta["refs"] = max(0, int(meta["refs"]) - 1)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "slot_bytes": self.slot_bytes,
+                "latest_seq": int(self._ring[_NEXT_SEQ]) - 1,
+                "writes": int(self._ring[_WRITES]),
+                "overruns": int(self._ring[_OVERRUNS]),
+                "pinned": int(np.count_nonzero(self._meta["refs"])),
+            }
+
+    def close(self) -> None:
+        """Detach; the creating process also frees the segment."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ring = None
+        self._meta = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Outstanding FrameRef views keep the mapping alive until they are dropped.
+            logger.debug("SharedFrameRing %s closed with frames still referenced", self.name)
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
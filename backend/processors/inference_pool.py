@@ -0,0 +1,364 @@
+"""
+Out-of-process inference workers.
+
+The scheduler's inference threads all live in the server process, so YOLO
+pre/post-processing and result parsing compete for the GIL with the event
+loop, the encoders and each other. ``InferenceWorkerPool`` runs YOLO in
+separate processes instead. Each worker owns a shared-memory segment that
+the parent copies the frame into, so frames are never pickled; only the
+(small, array-backed) detection batches come back over the pipe.
+
+The pool exposes a blocking ``infer`` call and is meant to be driven from the
+``InferenceScheduler``'s threads, so priorities, deadlines and budgets still
+apply. Size the scheduler's ``max_workers`` to the pool size.
+
+A worker that dies mid-job fails only that job (``WorkerCrashed``) and is
+restarted in place.
+"""
+
+import atexit
+import importlib
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+
+# Task name -> (module, parse function). Workers import the parser lazily so
+# the pool itself doesn't drag in the processors.
+TASKS = {
+    "object_detection": ("processors.object_detection", "parse_object_result"),
+    "fall_detection": ("processors.fall_detection", "parse_pose_result"),
+}
+
+DEFAULT_SEGMENT_BYTES = 1280 * 720 * 3
+POLL_INTERVAL_SECONDS = 0.2
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised for a job whose worker process died (or timed out) while running it."""
+
+
+def _attach_segment(name: str) -> SharedMemory:
+    # The parent owns (and unlinks) the segment. Before 3.13 there is no
+    # ``track`` flag, but spawned workers share the parent's resource tracker,
+    # so registering the name again is harmless.
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def _worker_main(conn: Connection) -> None:
+    """Worker loop: read a frame from shared memory, run the model, send back parsed results."""
+    from ultralytics import YOLO
+
+    models: dict[str, Any] = {}
+    parsers: dict[str, Any] = {}
+    segments: dict[str, SharedMemory] = {}
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+
+            job_id, task, model_path, segment_name, shape, dtype, predict_kwargs, parse_kwargs = request
+            started = time.perf_counter()
+            try:
+                segment = segments.get(segment_name)
+                if segment is None:
+                    for stale in segments.values():
+                        stale.close()
+                    segments = {segment_name: _attach_segment(segment_name)}
+                    segment = segments[segment_name]
+                frame = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+                model = models.get(model_path)
+                if model is None:
+                    model = models[model_path] = YOLO(model_path)
+                parse = parsers.get(task)
+                if parse is None:
+                    module_name, function_name = TASKS[task]
+                    parse = parsers[task] = getattr(importlib.import_module(module_name), function_name)
+
+                results = model(frame, verbose=False, **predict_kwargs)
+                payload = parse(results[0], **parse_kwargs)
+                del frame
+                conn.send((job_id, True, payload, time.perf_counter() - started))
+            except Exception:
+                conn.send((job_id, False, traceback.format_exc(), time.perf_counter() - started))
+    finally:
+        for segment in segments.values():
+            segment.close()
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    conn: Optional[Connection] = None
+    segment: Optional[SharedMemory] = None
+    started_ts: float = 0.0
+    busy_seconds: float = 0.0
+    jobs: int = 0
+    errors: int = 0
+    restarts: int = 0
+    loaded_models: set[str] = field(default_factory=set)
+    job_ids: Iterator[int] = field(default_factory=itertools.count)
+
+
+class InferenceWorkerPool:
+    """
+    Fixed pool of worker processes running YOLO inference.
+
+    Workers start on first use rather than in the constructor: with the
+    ``spawn`` start method each child re-imports the server module, and a
+    pool that spawned on construction would spawn again from every child.
+
+    Args:
+        workers: Number of worker processes.
+        segment_bytes: Initial shared-memory size per worker; grown on demand
+            when a larger frame arrives.
+        timeout_seconds: Per-job limit after which the worker is killed and
+            restarted. ``None`` waits indefinitely (crashes are still caught).
+        load_timeout_seconds: Limit for a worker's first job on a model, which
+            includes process start-up and loading the weights.
+        start_method: multiprocessing start method. ``spawn`` avoids forking a
+            process that already runs threads and an event loop.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        timeout_seconds: Optional[float] = 10.0,
+        load_timeout_seconds: Optional[float] = 120.0,
+        start_method: str = "spawn",
+    ) -> None:
+        self.workers = max(1, int(workers))
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.timeout_seconds = timeout_seconds
+        self.load_timeout_seconds = load_timeout_seconds
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = [_Worker(index=index) for index in range(self.workers)]
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._pool_started_ts = 0.0
+
+    def infer(
+        self,
+        task: str,
+        model_path: str,
+        frame: np.ndarray,
+        predict_kwargs: Optional[dict[str, Any]] = None,
+        parse_kwargs: Optional[dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Run ``task`` on ``frame`` in a worker and return the parsed result.
+
+        Blocks until a worker is free and has finished; call it from an
+        inference thread, not the event loop.
+
+        Raises:
+            WorkerCrashed: The worker died or timed out during this job.
+            RuntimeError: The model or parser raised inside the worker.
+        """
+        if task not in TASKS:
+            raise ValueError(f"Unknown inference task {task!r}; expected one of {sorted(TASKS)}")
+        if self._closed:
+            raise RuntimeError("InferenceWorkerPool is closed")
+        self._ensure_started()
+
+        worker = self._idle.get()
+        try:
+            return self._run(worker, task, model_path, frame, predict_kwargs or {}, parse_kwargs or {})
+        finally:
+            self._idle.put(worker)
+
+    def _ensure_started(self) -> None:
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._pool_started_ts = time.monotonic()
+            for worker in self._workers:
+                self._spawn(worker)
+                self._idle.put(worker)
+            self._started = True
+            # Release the shared-memory segments even if nobody calls close().
+            atexit.register(self.close)
+            logger.info("InferenceWorkerPool: started %d workers", self.workers)
+
+    def _spawn(self, worker: _Worker) -> None:
+        if worker.segment is None:
+            worker.segment = SharedMemory(create=True, size=self.segment_bytes)
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn,),
+            name=f"inference-worker-{worker.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+        worker.started_ts = time.monotonic()
+
+    def _restart(self, worker: _Worker) -> None:
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=5.0)
+        if worker.conn is not None:
+            worker.conn.close()
+        worker.restarts += 1
+        worker.loaded_models.clear()
+        logger.warning(
+            "InferenceWorkerPool: restarting worker %d (exit code %s)",
+            worker.index,
+            worker.process.exitcode if worker.process is not None else None,
+        )
+        self._spawn(worker)
+
+    def _ensure_capacity(self, worker: _Worker, nbytes: int) -> None:
+        if worker.segment is not None and worker.segment.size >= nbytes:
+            return
+        # The worker notices the new segment name on the next request and reattaches.
+        if worker.segment is not None:
+            worker.segment.close()
+            worker.segment.unlink()
+        worker.segment = SharedMemory(create=True, size=nbytes)
+
+    def _run(
+        self,
+        worker: _Worker,
+        task: str,
+        model_path: str,
+        frame: np.ndarray,
+        predict_kwargs: dict[str, Any],
+        parse_kwargs: dict[str, Any],
+    ) -> Any:
+        frame = np.ascontiguousarray(frame)
+        self._ensure_capacity(worker, frame.nbytes)
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=worker.segment.buf)
+        view[...] = frame
+        del view
+
+        if not worker.process.is_alive():
+            # Died while idle; nothing was lost, just bring it back.
+            self._restart(worker)
+
+        job_id = next(worker.job_ids)
+        try:
+            worker.conn.send((
+                job_id,
+                task,
+                model_path,
+                worker.segment.name,
+                frame.shape,
+                frame.dtype.str,
+                predict_kwargs,
+                parse_kwargs,
+            ))
+        except (BrokenPipeError, OSError) as error:
+            worker.errors += 1
+            self._restart(worker)
+            raise WorkerCrashed(f"inference worker {worker.index} unreachable during {task}") from error
+
+        timeout = (
+            self.timeout_seconds if model_path in worker.loaded_models else self.load_timeout_seconds
+        )
+        waited = 0.0
+        while True:
+            try:
+                ready = worker.conn.poll(POLL_INTERVAL_SECONDS)
+            except (EOFError, OSError):
+                ready = False
+            if ready:
+                try:
+                    reply_id, ok, payload, busy = worker.conn.recv()
+                except (EOFError, OSError):
+                    ready = False
+                else:
+                    if reply_id != job_id:
+                        # Stale reply from a job we gave up on; keep waiting for ours.
+                        continue
+                    break
+            waited += POLL_INTERVAL_SECONDS
+            timed_out = timeout is not None and waited >= timeout
+            if timed_out or not worker.process.is_alive():
+                worker.errors += 1
+                reason = "timed out" if timed_out else f"exited with code {worker.process.exitcode}"
+                self._restart(worker)
+                raise WorkerCrashed(f"inference worker {worker.index} {reason} during {task}")
+
+        worker.jobs += 1
+        worker.busy_seconds += busy
+        worker.loaded_models.add(model_path)
+        if not ok:
+            worker.errors += 1
+            raise RuntimeError(f"{task} failed in inference worker {worker.index}:\n{payload}")
+        return payload
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        uptime = now - self._pool_started_ts if self._started else 0.0
+        workers = []
+        for worker in self._workers:
+            workers.append({
+                "index": worker.index,
+                "pid": worker.process.pid if worker.process is not None else None,
+                "alive": bool(worker.process is not None and worker.process.is_alive()),
+                "jobs": worker.jobs,
+                "errors": worker.errors,
+                "restarts": worker.restarts,
+                "busy_seconds": worker.busy_seconds,
+                "utilization": worker.busy_seconds / uptime if uptime > 0 else 0.0,
+                "segment_bytes": worker.segment.size if worker.segment is not None else 0,
+            })
+        return {
+            "workers": self.workers,
+            "started": self._started,
+            "idle": self._idle.qsize(),
+            "per_worker": workers,
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            if worker.conn is not None:
+                try:
+                    worker.conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            if worker.process is not None:
+                worker.process.join(timeout=5.0)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(timeout=5.0)
+            if worker.conn is not None:
+                worker.conn.close()
+            if worker.segment is not None:
+                worker.segment.close()
+                worker.segment.unlink()
+                worker.segment = None
+        logger.info("InferenceWorkerPool closed")
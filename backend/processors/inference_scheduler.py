@@ -0,0 +1,300 @@
+"""
+Central scheduler for CPU inference jobs.
+
+Processors used to call ``asyncio.to_thread`` directly and silently drop
+frames while busy, so the YOLO object, YOLO pose and Roboflow calls all raced
+for the default executor. ``InferenceScheduler`` runs every job on one
+bounded worker pool and decides what runs next:
+
+- lower ``priority`` values run first (fall detection before objects),
+- every job carries a deadline and is skipped if it is stale by the time a
+  worker is free,
+- each stream (by default, each owner) keeps at most one pending job; a
+  newer frame supersedes it,
+- an owner may be capped to a share of worker time (``budget``) over a
+  sliding window.
+
+Skipped jobs raise ``JobDropped`` in the submitter and are counted per owner.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Optional
+
+
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+
+DEFAULT_DEADLINE_SECONDS = 1.0
+DEFAULT_BUDGET_WINDOW_SECONDS = 10.0
+
+DROP_SUPERSEDED = "superseded"
+DROP_DEADLINE = "deadline"
+DROP_BUDGET = "budget"
+DROP_SHUTDOWN = "shutdown"
+
+logger = logging.getLogger(__name__)
+
+
+class JobDropped(Exception):
+    """Raised in the submitter when the scheduler skips its job."""
+
+    def __init__(self, owner: str, reason: str) -> None:
+        super().__init__(f"{owner} inference job dropped: {reason}")
+        self.owner = owner
+        self.reason = reason
+
+
+@dataclass
+class _Job:
+    owner: str
+    stream: Hashable
+    priority: int
+    deadline: float
+    seq: int
+    fn: Callable[..., Any]
+    args: tuple
+    future: asyncio.Future
+    submitted_ts: float
+
+    def sort_key(self) -> tuple[int, float, int]:
+        return (self.priority, self.deadline, self.seq)
+
+
+@dataclass
+class _Owner:
+    priority: int
+    deadline_seconds: float
+    budget: Optional[float]
+    pending: dict[Hashable, _Job] = field(default_factory=dict)
+    runs: deque = field(default_factory=deque)  # (end_ts, busy_seconds)
+    submitted: int = 0
+    completed: int = 0
+    errors: int = 0
+    dropped: dict[str, int] = field(
+        default_factory=lambda: {
+            DROP_SUPERSEDED: 0,
+            DROP_DEADLINE: 0,
+            DROP_BUDGET: 0,
+            DROP_SHUTDOWN: 0,
+        }
+    )
+    busy_seconds: float = 0.0
+    queue_seconds: float = 0.0
+
+
+class InferenceScheduler:
+    """
+    Priority/deadline scheduler over a fixed pool of inference threads.
+
+    Args:
+        max_workers: Number of inference threads shared by all processors.
+        budgets: Optional per-owner cap on worker time, as a fraction of one
+            worker over ``budget_window_seconds`` (e.g. ``0.5`` = half a core).
+        budget_window_seconds: Sliding window used for budget accounting.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        budgets: Optional[dict[str, float]] = None,
+        budget_window_seconds: float = DEFAULT_BUDGET_WINDOW_SECONDS,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.budget_window_seconds = max(1.0, float(budget_window_seconds))
+        self._budgets = dict(budgets or {})
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference",
+        )
+        self._owners: dict[str, _Owner] = {}
+        self._heap: list[tuple[tuple[int, float, int], _Job]] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._closed = False
+
+    def register(
+        self,
+        owner: str,
+        priority: int = PRIORITY_NORMAL,
+        deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+        budget: Optional[float] = None,
+    ) -> None:
+        """
+        Declare an owner's priority, default deadline and optional budget.
+
+        A budget passed to the constructor for this owner takes precedence
+        over ``budget`` so deployments can cap processors centrally.
+        """
+        budget = self._budgets.get(owner, budget)
+        state = self._owners.get(owner)
+        if state is None:
+            self._owners[owner] = _Owner(
+                priority=int(priority),
+                deadline_seconds=max(0.01, float(deadline_seconds)),
+                budget=budget,
+            )
+            return
+        state.priority = int(priority)
+        state.deadline_seconds = max(0.01, float(deadline_seconds))
+        state.budget = budget
+
+    async def submit(
+        self,
+        owner: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        deadline: Optional[float] = None,
+        stream: Optional[Hashable] = None,
+    ) -> Any:
+        """
+        Queue ``fn(*args)`` for ``owner`` and wait for its result.
+
+        Args:
+            owner: Registered owner name (unregistered owners get defaults).
+            fn: Blocking callable to run on an inference thread.
+            deadline: Absolute ``loop.time()`` after which the job is stale.
+                Defaults to now + the owner's ``deadline_seconds``.
+            stream: Key for superseding pending jobs. Processors of the same
+                kind in different calls share an owner (and its priority and
+                budget) but pass their own stream so they don't supersede
+                each other. Defaults to ``owner``.
+
+        Raises:
+            JobDropped: The job was superseded, missed its deadline, was over
+                budget, or the scheduler shut down.
+        """
+        if self._closed:
+            raise JobDropped(owner, DROP_SHUTDOWN)
+        if owner not in self._owners:
+            self.register(owner)
+        state = self._owners[owner]
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        job = _Job(
+            owner=owner,
+            stream=owner if stream is None else stream,
+            priority=state.priority,
+            deadline=deadline if deadline is not None else now + state.deadline_seconds,
+            seq=next(self._seq),
+            fn=fn,
+            args=args,
+            future=loop.create_future(),
+            submitted_ts=now,
+        )
+        state.submitted += 1
+
+        previous = state.pending.get(job.stream)
+        if previous is not None:
+            self._drop(previous, DROP_SUPERSEDED)
+        state.pending[job.stream] = job
+        heapq.heappush(self._heap, (job.sort_key(), job))
+        self._pump()
+        return await job.future
+
+    def _drop(self, job: _Job, reason: str) -> None:
+        state = self._owners[job.owner]
+        if state.pending.get(job.stream) is job:
+            del state.pending[job.stream]
+        if job.future.done():
+            return
+        state.dropped[reason] += 1
+        job.future.set_exception(JobDropped(job.owner, reason))
+
+    def _budget_usage(self, state: _Owner, now: float) -> float:
+        horizon = now - self.budget_window_seconds
+        while state.runs and state.runs[0][0] < horizon:
+            state.runs.popleft()
+        return sum(busy for _, busy in state.runs) / self.budget_window_seconds
+
+    def _pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._running < self.max_workers and self._heap:
+            _, job = heapq.heappop(self._heap)
+            state = self._owners[job.owner]
+            if job.future.done() or state.pending.get(job.stream) is not job:
+                # Superseded or cancelled by the caller.
+                continue
+
+            now = loop.time()
+            if now > job.deadline:
+                self._drop(job, DROP_DEADLINE)
+                continue
+            if state.budget is not None and self._budget_usage(state, time.monotonic()) >= state.budget:
+                self._drop(job, DROP_BUDGET)
+                continue
+
+            del state.pending[job.stream]
+            state.queue_seconds += now - job.submitted_ts
+            self._running += 1
+            exec_future = loop.run_in_executor(self._executor, self._run, job.fn, job.args)
+            exec_future.add_done_callback(lambda fut, job=job: self._on_done(job, fut))
+
+    @staticmethod
+    def _run(fn: Callable[..., Any], args: tuple) -> tuple[float, Any]:
+        start = time.monotonic()
+        result = fn(*args)
+        return time.monotonic() - start, result
+
+    def _on_done(self, job: _Job, exec_future: asyncio.Future) -> None:
+        self._running -= 1
+        state = self._owners[job.owner]
+        error = exec_future.exception() if not exec_future.cancelled() else None
+        if exec_future.cancelled():
+            self._drop(job, DROP_SHUTDOWN)
+        elif error is not None:
+            state.errors += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+        else:
+            busy, result = exec_future.result()
+            state.completed += 1
+            state.busy_seconds += busy
+            state.runs.append((time.monotonic(), busy))
+            if not job.future.done():
+                job.future.set_result(result)
+        if not self._closed:
+            self._pump()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        owners: dict[str, Any] = {}
+        for name, state in self._owners.items():
+            started = state.completed + state.errors
+            owners[name] = {
+                "priority": state.priority,
+                "deadline_ms": state.deadline_seconds * 1000.0,
+                "budget": state.budget,
+                "budget_usage": self._budget_usage(state, now),
+                "submitted": state.submitted,
+                "completed": state.completed,
+                "errors": state.errors,
+                "dropped": dict(state.dropped),
+                "pending": len(state.pending),
+                "avg_run_ms": state.busy_seconds / state.completed * 1000.0 if state.completed else 0.0,
+                "avg_queue_ms": state.queue_seconds / started * 1000.0 if started else 0.0,
+            }
+        return {
+            "workers": self.max_workers,
+            "running": self._running,
+            "queued": sum(len(state.pending) for state in self._owners.values()),
+            "owners": owners,
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        for _, job in self._heap:
+            self._drop(job, DROP_SHUTDOWN)
+        self._heap.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("InferenceScheduler closed: %s", self.stats()["owners"])
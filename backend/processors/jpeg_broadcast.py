@@ -0,0 +1,98 @@
+"""
+Latest-frame broadcast for MJPEG viewers.
+
+Every ``/video/stream`` client used to poll ``get_latest_jpeg()`` in a sleep
+loop, taking a lock each time, and resent the same JPEG when no new frame
+had arrived. ``JpegBroadcast`` holds only the newest encoded frame under a
+sequence number. Clients ``await wait_next(seq)`` on a condition and wake
+once per published frame, so each frame is encoded once and sent at most
+once per client. There are no per-client queues: a client that was still
+sending when newer frames arrived gets the newest one and skips the rest,
+so a slow viewer never builds up a backlog or holds back the others.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+
+class JpegBroadcast:
+    """
+    Single-producer, many-consumer holder for the latest JPEG.
+
+    Must be used from one event loop: ``publish`` and ``wait_next`` are
+    both called on it.
+    """
+
+    def __init__(self) -> None:
+        self._condition = asyncio.Condition()
+        self._seq = 0
+        self._jpeg: Optional[bytes] = None
+        self._pts: Optional[float] = None
+        self._closed = False
+
+        self.published = 0
+        self.deliveries = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest frame (0 before the first one)."""
+        return self._seq
+
+    @property
+    def latest(self) -> Optional[bytes]:
+        return self._jpeg
+
+    async def publish(self, jpeg: bytes, pts: Optional[float] = None) -> int:
+        async with self._condition:
+            self._seq += 1
+            self._jpeg = jpeg
+            self._pts = pts
+            self.published += 1
+            self._condition.notify_all()
+            return self._seq
+
+    async def wait_next(
+        self,
+        after_seq: int,
+        timeout: Optional[float] = None,
+    ) -> Optional[tuple[int, bytes]]:
+        """
+        The newest frame with a sequence number above ``after_seq``.
+
+        Returns immediately when one is already there, otherwise waits for
+        the next ``publish``. Returns None on timeout or once closed.
+        """
+        async with self._condition:
+            if self._seq <= after_seq and not self._closed:
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._seq > after_seq or self._closed),
+                        timeout,
+                    )
+                except asyncio.TimeoutError:
+                    return None
+            if self._closed or self._jpeg is None:
+                return None
+            if after_seq > 0:
+                self.skipped += self._seq - after_seq - 1
+            self.deliveries += 1
+            self.bytes_sent += len(self._jpeg)
+            return self._seq, self._jpeg
+
+    async def close(self) -> None:
+        """Wake every waiting client; their ``wait_next`` returns None from now on."""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "seq": self._seq,
+            "pts": self._pts,
+            "published": self.published,
+            "deliveries": self.deliveries,
+            "skipped": self.skipped,
+            "bytes_sent": self.bytes_sent,
+        }
@@ -0,0 +1,255 @@
+"""
+CPU inference backends for the ultralytics models.
+
+The processors always ran the PyTorch ``.pt`` weights. On CPU-only hosts the
+same models exported to ONNX Runtime or OpenVINO are usually faster, and
+faster still when quantized to INT8. ``prepare_weights`` turns a ``.pt`` path
+into weights for the requested backend: it exports them on first use, caches
+the result under ``MODEL_CACHE_DIR``, and returns a path that ``YOLO(...)``
+loads like any other model. Results (and therefore the detection dicts the
+processors build) keep the same format for every backend.
+
+INT8 uses static quantization, calibrated on frames the caller provides (a
+list of BGR frames or a directory of images), so the activation ranges match
+the cameras we actually run on.
+
+Environment:
+    YOLO_BACKEND: ``torch`` (default), ``onnxruntime`` or ``openvino``.
+    YOLO_INT8: ``1`` to quantize the exported model.
+    YOLO_CALIBRATION_DIR: Images used for INT8 calibration.
+    MODEL_CACHE_DIR: Where exported models are kept.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNXRUNTIME = "onnxruntime"
+BACKEND_OPENVINO = "openvino"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNXRUNTIME, BACKEND_OPENVINO)
+_ALIASES = {"pytorch": BACKEND_TORCH, "onnx": BACKEND_ONNXRUNTIME, "ort": BACKEND_ONNXRUNTIME, "ov": BACKEND_OPENVINO}
+
+DEFAULT_IMGSZ = 640
+MAX_CALIBRATION_FRAMES = 300
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+Calibration = Union[Sequence[np.ndarray], str, Path]
+
+logger = logging.getLogger(__name__)
+
+_export_locks: dict[str, threading.Lock] = {}
+_export_locks_guard = threading.Lock()
+
+
+def normalize_backend(backend: Optional[str]) -> str:
+    name = (backend or BACKEND_TORCH).strip().lower()
+    name = _ALIASES.get(name, name)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; expected one of {BACKENDS}")
+    return name
+
+
+def backend_from_env() -> tuple[str, bool, Optional[str]]:
+    """(backend, int8, calibration dir) from ``YOLO_BACKEND``/``YOLO_INT8``/``YOLO_CALIBRATION_DIR``."""
+    backend = normalize_backend(os.getenv("YOLO_BACKEND"))
+    int8 = os.getenv("YOLO_INT8", "").strip().lower() in {"1", "true", "yes"}
+    return backend, int8, os.getenv("YOLO_CALIBRATION_DIR") or None
+
+
+def cache_dir() -> Path:
+    default = Path.home() / ".cache" / "vision-hackathon" / "models"
+    return Path(os.getenv("MODEL_CACHE_DIR", str(default))).expanduser()
+
+
+def load_calibration_frames(source: Calibration, limit: int = MAX_CALIBRATION_FRAMES) -> list[np.ndarray]:
+    """BGR frames from a directory of images, or the given frames (capped at ``limit``)."""
+    if isinstance(source, (str, Path)):
+        paths = sorted(
+            path for path in Path(source).expanduser().iterdir()
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        )
+        frames = []
+        for path in paths[:limit]:
+            image = cv2.imread(str(path))
+            if image is not None:
+                frames.append(image)
+        return frames
+    return list(source)[:limit]
+
+
+def letterbox(frame_bgr: np.ndarray, imgsz: int = DEFAULT_IMGSZ) -> np.ndarray:
+    """Model input for one frame, preprocessed the way ultralytics does: (1, 3, imgsz, imgsz) RGB float32."""
+    height, width = frame_bgr.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(frame_bgr, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    chw = canvas[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(chw, dtype=np.float32)[None] / 255.0
+
+
+def _source_fingerprint(model_path: str) -> str:
+    path = Path(model_path)
+    if path.exists():
+        stat = path.stat()
+        return f"{path.resolve()}:{stat.st_size}:{int(stat.st_mtime)}"
+    # Not on disk yet (ultralytics downloads it by name); the name is the identity.
+    return model_path
+
+
+def _calibration_fingerprint(frames: Sequence[np.ndarray]) -> str:
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(str(frame.shape).encode())
+        digest.update(np.ascontiguousarray(frame).data)
+    return digest.hexdigest()[:12]
+
+
+def _export_lock(key: str) -> threading.Lock:
+    with _export_locks_guard:
+        return _export_locks.setdefault(key, threading.Lock())
+
+
+def prepare_weights(
+    model_path: str,
+    backend: Optional[str] = None,
+    int8: bool = False,
+    calibration: Optional[Calibration] = None,
+    imgsz: int = DEFAULT_IMGSZ,
+) -> str:
+    """
+    Return weights for ``backend``, exporting (and quantizing) them on first use.
+
+    ``torch`` returns ``model_path`` unchanged. Exported models are cached
+    by source weights, backend, input size and calibration set, so later
+    calls (and later runs) just return the cached path.
+
+    Raises:
+        ValueError: Unknown backend, or ``int8`` without calibration frames.
+    """
+    backend = normalize_backend(backend)
+    if backend == BACKEND_TORCH:
+        if int8:
+            logger.warning("INT8 needs the onnxruntime or openvino backend; running %s as torch fp32", model_path)
+        return model_path
+
+    frames: list[np.ndarray] = []
+    if int8:
+        frames = load_calibration_frames(calibration) if calibration is not None else []
+        if not frames:
+            raise ValueError("INT8 quantization needs calibration frames (pass frames or set YOLO_CALIBRATION_DIR)")
+
+    source_key = hashlib.sha1(_source_fingerprint(model_path).encode()).hexdigest()[:12]
+    variant = f"int8-{_calibration_fingerprint(frames)}" if int8 else "fp32"
+    stem = Path(model_path).stem
+    name = f"{stem}-{source_key}-{imgsz}-{variant}"
+    target = cache_dir() / backend / (f"{name}.onnx" if backend == BACKEND_ONNXRUNTIME else f"{name}_openvino_model")
+
+    with _export_lock(str(target)):
+        if target.exists():
+            return str(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=target.parent))
+        try:
+            exported = _export_fp32(model_path, backend, imgsz, workdir)
+            if int8:
+                exported = _quantize(exported, backend, frames, imgsz, workdir)
+            # Rename into place so a half-written export is never picked up.
+            os.replace(exported, target)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        logger.info("Exported %s for %s (%s) to %s", model_path, backend, variant, target)
+    return str(target)
+
+
+def _export_fp32(model_path: str, backend: str, imgsz: int, workdir: Path) -> Path:
+    from ultralytics import YOLO
+
+    # Export from a copy so ultralytics writes its output into the work dir,
+    # not next to the source weights.
+    source = YOLO(model_path)
+    local_copy = workdir / Path(source.ckpt_path or model_path).name
+    shutil.copy(source.ckpt_path or model_path, local_copy)
+    export_format = "onnx" if backend == BACKEND_ONNXRUNTIME else "openvino"
+    # Dynamic batch/shape so the micro-batcher can still send several frames per call.
+    exported = YOLO(str(local_copy)).export(format=export_format, imgsz=imgsz, dynamic=True)
+    return Path(exported)
+
+
+def _quantize(fp32_path: Path, backend: str, frames: Sequence[np.ndarray], imgsz: int, workdir: Path) -> Path:
+    inputs = [letterbox(frame, imgsz) for frame in frames]
+    if backend == BACKEND_ONNXRUNTIME:
+        return _quantize_onnx(fp32_path, inputs, workdir)
+    return _quantize_openvino(fp32_path, inputs, workdir)
+
+
+def _quantize_onnx(fp32_path: Path, inputs: list[np.ndarray], workdir: Path) -> Path:
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    input_name = onnx.load(str(fp32_path), load_external_data=False).graph.input[0].name
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self) -> None:
+            self._batches = iter(inputs)
+
+        def get_next(self) -> Optional[dict[str, np.ndarray]]:
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    int8_path = workdir / f"{fp32_path.stem}-int8.onnx"
+    quantize_static(
+        str(fp32_path),
+        str(int8_path),
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    # ultralytics reads class names, stride and task from the model metadata.
+    source = onnx.load(str(fp32_path), load_external_data=False)
+    quantized = onnx.load(str(int8_path))
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, str(int8_path))
+    return int8_path
+
+
+def _quantize_openvino(fp32_dir: Path, inputs: list[np.ndarray], workdir: Path) -> Path:
+    import nncf
+    import openvino as ov
+
+    xml_path = next(fp32_dir.glob("*.xml"))
+    model = ov.Core().read_model(str(xml_path))
+    quantized = nncf.quantize(
+        model,
+        nncf.Dataset(inputs),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(inputs),
+        # Box decoding is sensitive to quantization error; keep it in float.
+        ignored_scope=nncf.IgnoredScope(types=["Sigmoid"]),
+    )
+    int8_dir = workdir / f"{fp32_dir.name}-int8"
+    int8_dir.mkdir()
+    ov.save_model(quantized, str(int8_dir / xml_path.name))
+    for metadata in fp32_dir.glob("*.yaml"):
+        shutil.copy(metadata, int8_dir / metadata.name)
+    return int8_dir
@@ -0,0 +1,247 @@
+"""
+Process-wide registry of loaded models.
+
+Every ``create_agent`` call used to load its own copy of each model, so ten
+calls meant ten copies of the weights in RAM and ten cold loads. The registry
+keys loaded models by (model path, device, backend) and hands every session a
+lease on the same instance. Leases are reference counted; once the last one
+is released the model stays warm for ``idle_unload_seconds`` and is then
+dropped. ``acquire_async`` does the same from a coroutine, loading on a
+worker thread so a cold load never blocks the event loop.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+
+DEFAULT_IDLE_UNLOAD_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> Optional[int]:
+    # Linux only; other platforms just don't report the load-time RSS delta.
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _tensor_bytes(model: Any) -> Optional[int]:
+    """Parameter + buffer bytes of a torch-backed model, if we can find them."""
+    module = getattr(model, "model", model)
+    parameters = getattr(module, "parameters", None)
+    buffers = getattr(module, "buffers", None)
+    if not callable(parameters):
+        return None
+    try:
+        total = sum(p.numel() * p.element_size() for p in parameters())
+        if callable(buffers):
+            total += sum(b.numel() * b.element_size() for b in buffers())
+        return int(total)
+    except Exception:
+        return None
+
+
+@dataclass
+class _Entry:
+    key: tuple[str, str, str]
+    model: Any
+    lock: Optional[threading.Lock]
+    loaded_ts: float
+    load_seconds: float
+    tensor_bytes: Optional[int]
+    rss_delta_bytes: Optional[int]
+    refcount: int = 0
+    last_released_ts: float = field(default_factory=time.monotonic)
+    inferences: int = 0
+
+
+class ModelLease:
+    """
+    One holder's reference to a shared model.
+
+    Use ``infer`` rather than calling ``model`` directly so calls from
+    different sessions are serialized when the model isn't thread-safe.
+    """
+
+    def __init__(self, registry: "ModelRegistry", entry: _Entry) -> None:
+        self._registry = registry
+        self._entry = entry
+        self._released = False
+
+    @property
+    def model(self) -> Any:
+        return self._entry.model
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self._entry.key
+
+    def infer(self, *args: Any, **kwargs: Any) -> Any:
+        entry = self._entry
+        if entry.lock is None:
+            entry.inferences += 1
+            return entry.model(*args, **kwargs)
+        with entry.lock:
+            entry.inferences += 1
+            return entry.model(*args, **kwargs)
+
+    def release(self) -> None:
+        """Drop this lease; safe to call more than once."""
+        if self._released:
+            return
+        self._released = True
+        self._registry._release(self._entry)
+
+
+class ModelRegistry:
+    """
+    Shares loaded models across sessions with reference counting.
+
+    Args:
+        idle_unload_seconds: How long a model with no leases stays loaded.
+    """
+
+    def __init__(self, idle_unload_seconds: float = DEFAULT_IDLE_UNLOAD_SECONDS) -> None:
+        self.idle_unload_seconds = max(0.0, float(idle_unload_seconds))
+        self._entries: dict[tuple[str, str, str], _Entry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple[str, str, str], threading.Lock] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def acquire(
+        self,
+        model_path: str,
+        loader: Callable[[], Any],
+        device: str = "cpu",
+        backend: str = "torch",
+        thread_safe: bool = False,
+    ) -> ModelLease:
+        """
+        Return a lease on the model for (model_path, device, backend).
+
+        ``loader`` runs only if the model isn't already loaded. Pass
+        ``thread_safe=True`` for handles that may be called concurrently
+        (e.g. remote API clients) to skip the per-model inference lock.
+        """
+        key = (str(model_path), str(device), str(backend))
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Hold a per-key lock while loading so concurrent sessions wait for
+        # one load instead of each loading their own copy.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refcount += 1
+                    return ModelLease(self, entry)
+
+            rss_before = _rss_bytes()
+            started = time.monotonic()
+            model = loader()
+            load_seconds = time.monotonic() - started
+            rss_after = _rss_bytes()
+
+            entry = _Entry(
+                key=key,
+                model=model,
+                lock=None if thread_safe else threading.Lock(),
+                loaded_ts=time.time(),
+                load_seconds=load_seconds,
+                tensor_bytes=_tensor_bytes(model),
+                rss_delta_bytes=(
+                    rss_after - rss_before
+                    if rss_before is not None and rss_after is not None
+                    else None
+                ),
+                refcount=1,
+            )
+            with self._lock:
+                self._entries[key] = entry
+            logger.info("ModelRegistry: loaded %s in %.2fs", key, load_seconds)
+            return ModelLease(self, entry)
+
+    async def acquire_async(
+        self,
+        model_path: str,
+        loader: Callable[[], Any],
+        device: str = "cpu",
+        backend: str = "torch",
+        thread_safe: bool = False,
+    ) -> ModelLease:
+        """``acquire`` on a worker thread: the load (and any wait for another session's load) stays off the event loop."""
+        return await asyncio.to_thread(
+            self.acquire,
+            model_path,
+            loader,
+            device=device,
+            backend=backend,
+            thread_safe=thread_safe,
+        )
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.refcount = max(0, entry.refcount - 1)
+            if entry.refcount > 0:
+                return
+            entry.last_released_ts = time.monotonic()
+        self._schedule_unload()
+
+    def _schedule_unload(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.idle_unload_seconds + 0.1, self.unload_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def unload_idle(self) -> list[tuple[str, str, str]]:
+        """Unload models that have had no leases for ``idle_unload_seconds``."""
+        now = time.monotonic()
+        unloaded: list[tuple[str, str, str]] = []
+        waiting = False
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.refcount > 0:
+                    continue
+                if now - entry.last_released_ts >= self.idle_unload_seconds:
+                    del self._entries[key]
+                    unloaded.append(key)
+                else:
+                    waiting = True
+        for key in unloaded:
+            logger.info("ModelRegistry: unloaded idle model %s", key)
+        if unloaded:
+            gc.collect()
+        if waiting:
+            self._schedule_unload()
+        return unloaded
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "/".join(key): {
+                    "refcount": entry.refcount,
+                    "inferences": entry.inferences,
+                    "load_seconds": entry.load_seconds,
+                    "tensor_bytes": entry.tensor_bytes,
+                    "rss_delta_bytes": entry.rss_delta_bytes,
+                    "idle_seconds": (now - entry.last_released_ts) if entry.refcount == 0 else 0.0,
+                }
+                for key, entry in self._entries.items()
+            }
+
+
+MODEL_REGISTRY = ModelRegistry(
+    idle_unload_seconds=float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", str(DEFAULT_IDLE_UNLOAD_SECONDS)))
+)
@@ -0,0 +1,172 @@
+"""
+Motion / scene-change gate for the video processors.
+
+The nursery camera spends hours on an empty, still room, yet the object and
+pose models kept running at their full rate. ``MotionGate`` compares a small
+grayscale thumbnail of each frame (taken from the shared ``FrameCache``)
+against an adaptive background model. Processors ask ``should_run`` before
+inference; while nothing has changed since their last run they skip the
+frame and keep their previous detections. Every consumer still runs at least
+once per ``min_refresh_seconds`` so slow changes and model misses don't
+persist forever.
+
+One gate is shared by every processor of a session: each frame is analysed
+once, whichever processor asks first.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+import av
+import cv2
+import numpy as np
+
+from .frame_cache import FrameCache
+
+
+DEFAULT_THUMB_WIDTH = 160
+DEFAULT_BACKGROUND_ALPHA = 0.05
+DEFAULT_PIXEL_THRESHOLD = 25
+DEFAULT_MOTION_FRACTION = 0.005
+DEFAULT_SCENE_CUT_FRACTION = 0.5
+DEFAULT_MIN_REFRESH_SECONDS = 10.0
+
+
+@dataclass
+class _Consumer:
+    ran_motion_seq: int = -1
+    pending_motion_seq: int = -1
+    last_run_ts: float = 0.0
+    checked: int = 0
+    skipped: int = 0
+
+
+class MotionGate:
+    """
+    Decide per processor whether a frame is worth running inference on.
+
+    Args:
+        frame_cache: Session frame cache; the gate uses its grayscale thumbnails.
+        thumb_width: Thumbnail width the difference is computed on.
+        background_alpha: ``cv2.accumulateWeighted`` rate; higher adapts
+            faster to gradual changes (daylight, a moved blanket).
+        pixel_threshold: Gray-level difference for a pixel to count as changed.
+        motion_fraction: Share of changed pixels that counts as motion.
+        scene_cut_fraction: Share of changed pixels treated as a scene change
+            (lights on/off, camera moved); the background snaps to the new frame.
+        min_refresh_seconds: Longest a consumer may go without running.
+    """
+
+    def __init__(
+        self,
+        frame_cache: FrameCache,
+        thumb_width: int = DEFAULT_THUMB_WIDTH,
+        background_alpha: float = DEFAULT_BACKGROUND_ALPHA,
+        pixel_threshold: int = DEFAULT_PIXEL_THRESHOLD,
+        motion_fraction: float = DEFAULT_MOTION_FRACTION,
+        scene_cut_fraction: float = DEFAULT_SCENE_CUT_FRACTION,
+        min_refresh_seconds: float = DEFAULT_MIN_REFRESH_SECONDS,
+    ) -> None:
+        self.frame_cache = frame_cache
+        self.thumb_width = max(16, int(thumb_width))
+        self.background_alpha = min(1.0, max(0.0, float(background_alpha)))
+        self.pixel_threshold = int(pixel_threshold)
+        self.motion_fraction = float(motion_fraction)
+        self.scene_cut_fraction = float(scene_cut_fraction)
+        self.min_refresh_seconds = max(0.0, float(min_refresh_seconds))
+
+        self._lock = threading.Lock()
+        self._background: Optional[np.ndarray] = None
+        self._last_key: Optional[Hashable] = None
+        self._motion_seq = 0
+        self._consumers: dict[str, _Consumer] = {}
+
+        self.frames = 0
+        self.motion_frames = 0
+        self.scene_cuts = 0
+        self.last_changed_fraction = 0.0
+
+    def should_run(self, consumer: str, frame: av.VideoFrame) -> bool:
+        """
+        Return ``True`` if ``consumer`` should run inference on ``frame``.
+
+        Call ``mark_ran`` once the inference actually completed; a run that
+        was dropped or failed leaves the consumer due on the next frame.
+        """
+        self._analyse(frame)
+        now = time.monotonic()
+        with self._lock:
+            state = self._consumers.setdefault(consumer, _Consumer())
+            state.checked += 1
+            due = (
+                state.last_run_ts == 0.0
+                or self._motion_seq > state.ran_motion_seq
+                or now - state.last_run_ts >= self.min_refresh_seconds
+            )
+            if not due:
+                state.skipped += 1
+                return False
+            state.pending_motion_seq = self._motion_seq
+            return True
+
+    def mark_ran(self, consumer: str) -> None:
+        with self._lock:
+            state = self._consumers.setdefault(consumer, _Consumer())
+            state.ran_motion_seq = max(state.ran_motion_seq, state.pending_motion_seq)
+            state.last_run_ts = time.monotonic()
+
+    def _analyse(self, frame: av.VideoFrame) -> None:
+        key = self.frame_cache.key(frame)
+        with self._lock:
+            if key == self._last_key:
+                return
+            self._last_key = key
+
+        thumb = self.frame_cache.get(frame).downscaled(self.thumb_width, gray=True)
+        # Blur away sensor noise and compression artefacts before differencing.
+        thumb = cv2.GaussianBlur(thumb, (5, 5), 0).astype(np.float32)
+
+        with self._lock:
+            self.frames += 1
+            background = self._background
+            if background is None or background.shape != thumb.shape:
+                self._background = thumb
+                self._motion_seq += 1
+                return
+
+            diff = cv2.absdiff(thumb, background)
+            changed = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+            self.last_changed_fraction = changed
+            if changed >= self.scene_cut_fraction:
+                # Whole-scene change: adopt the new scene instead of reporting
+                # motion until the background slowly catches up.
+                self._background = thumb
+                self.scene_cuts += 1
+                self.motion_frames += 1
+                self._motion_seq += 1
+                return
+            if changed >= self.motion_fraction:
+                self.motion_frames += 1
+                self._motion_seq += 1
+            cv2.accumulateWeighted(thumb, background, self.background_alpha)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "motion_frames": self.motion_frames,
+                "scene_cuts": self.scene_cuts,
+                "last_changed_fraction": self.last_changed_fraction,
+                "consumers": {
+                    name: {
+                        "checked": state.checked,
+                        "skipped": state.skipped,
+                        "skipped_pct": (
+                            state.skipped / state.checked * 100.0 if state.checked else 0.0
+                        ),
+                    }
+                    for name, state in self._consumers.items()
+                },
+            }
@@ -1,4 +1,3 @@
-import asyncio
 import os
 from typing import Any, Optional
 
@@ -10,11 +9,35 @@ from vision_agents.core.processors import VideoProcessor
 from vision_agents.core.utils.video_forwarder import VideoForwarder
 
 from events.detection_events import ObjectDetectedEvent
-from .base import draw_bbox, format_yolo_detections
+from events.event_bus import EventBus
+from .base import draw_bbox
+from .batch_inference import BatchInferenceServer
+from .detection_feed import SECTION_OBJECTS, DetectionFeed
+from .detections import DetectionBatch
+from .frame_cache import FrameCache
+from .frame_hub import LATEST_WINS, FrameHub
+from .inference_pool import InferenceWorkerPool
+from .inference_scheduler import PRIORITY_NORMAL, InferenceScheduler, JobDropped
+from .model_backends import BACKEND_TORCH, Calibration, backend_from_env, normalize_backend, prepare_weights
+from .model_registry import MODEL_REGISTRY, ModelLease, ModelRegistry
+from .motion_gate import MotionGate
+from .tracker import MultiObjectTracker, frame_time
 
 EXCLUDED_YOLO_LABELS = {"person"}
 
 
+def parse_object_result(result: Any) -> DetectionBatch:
+    """Turn one ultralytics Results into a detection batch, minus excluded labels."""
+    detections = DetectionBatch.from_ultralytics(result)
+    excluded = [
+        class_id for class_id, label in detections.names.items()
+        if str(label).strip().lower() in EXCLUDED_YOLO_LABELS
+    ]
+    if not excluded or not len(detections):
+        return detections
+    return detections.select(~np.isin(detections.class_ids, excluded))
+
+
 class ObjectDetectionProcessor(VideoProcessor):
     """
     YOLO object detection processor (analysis-only).
@@ -27,28 +50,77 @@ class ObjectDetectionProcessor(VideoProcessor):
         fps: float = 1.0,
         model_path: str = "yolo11n.pt",
         confidence_threshold: float = 0.5,
+        frame_cache: Optional[FrameCache] = None,
+        frame_hub: Optional[FrameHub] = None,
+        scheduler: Optional[InferenceScheduler] = None,
+        batch_server: Optional[BatchInferenceServer] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        motion_gate: Optional[MotionGate] = None,
+        tracker: Optional[MultiObjectTracker] = None,
+        inference_pool: Optional[InferenceWorkerPool] = None,
+        backend: Optional[str] = None,
+        int8: Optional[bool] = None,
+        calibration: Optional[Calibration] = None,
+        weights_path: Optional[str] = None,
+        model_lease: Optional[ModelLease] = None,
+        detection_feed: Optional[DetectionFeed] = None,
+        event_bus: Optional[EventBus] = None,
     ) -> None:
         self.fps = float(fps)
         self.confidence_threshold = confidence_threshold
         self.model_path = model_path
+        # Pushes compact results to metadata-stream clients.
+        self.detection_feed = detection_feed
+        # Receives an ObjectDetectedEvent per inference.
+        self.event_bus = event_bus
+        self._frame_cache = frame_cache or FrameCache()
+        self._frame_hub = frame_hub or FrameHub()
+        self._motion_gate = motion_gate
+        # Assigns track ids and lets the publisher extrapolate boxes between runs.
+        self.tracker = tracker
+        self.scheduler = scheduler or InferenceScheduler(max_workers=1)
+        # Stale frames are skipped once they are two inference periods old.
+        self.scheduler.register(self.name, priority=PRIORITY_NORMAL, deadline_seconds=2.0 / self.fps)
 
-        print(f"Loading YOLO model from {model_path}...")
-        self.model = YOLO(model_path)
-        self.device = self._resolve_device()
-        try:
-            self.model.to(self.device)
-        except Exception:
-            # Some ultralytics backends may not support .to(); fallback to device arg in inference.
-            pass
-        print("YOLO model loaded.")
+        # torch / onnxruntime / openvino; unset arguments fall back to YOLO_BACKEND etc.
+        env_backend, env_int8, env_calibration = backend_from_env()
+        self.backend = normalize_backend(backend) if backend else env_backend
+        # Given weights_path was already prepared for this backend (off the event
+        # loop, see create_agent); otherwise export here, which blocks on first use.
+        self.weights_path = weights_path or prepare_weights(
+            model_path,
+            self.backend,
+            int8=env_int8 if int8 is None else int8,
+            calibration=env_calibration if calibration is None else calibration,
+        )
+        self.device = self._resolve_device(self.backend)
+        # With a worker pool the model lives in the worker processes only.
+        self.inference_pool = inference_pool
+        # Sessions share one instance per (path, device); the lease serializes inference.
+        # A given model_lease was acquired off the event loop (see acquire_model) and
+        # is ours to release; otherwise the model is loaded here, which blocks.
+        self._model_lease = model_lease
+        if self._model_lease is None and inference_pool is None:
+            self._model_lease = (model_registry or MODEL_REGISTRY).acquire(
+                self.weights_path,
+                loader=lambda: self._load_model(self.weights_path, self.device),
+                device=self.device,
+                backend=self.backend,
+            )
+        self.model = self._model_lease.model if self._model_lease is not None else None
+
+        # Share batches with every other caller running this model with the same settings.
+        # Keyed on the registry's model key, so only callers of the same loaded model batch together.
+        self._batch_server = batch_server
+        self._batch_key = None
+        self._batcher = None
+        if batch_server is not None and inference_pool is None:
+            self._batch_key = (*self._model_lease.key, confidence_threshold)
+            self._batcher = batch_server.batcher(self._batch_key, owner=self.name)
 
-        self.latest_detections: list[dict[str, Any]] = []
+        self.latest_detections = DetectionBatch.empty()
         self.latest_event: Optional[ObjectDetectedEvent] = None
 
-        self._forwarder: Optional[VideoForwarder] = None
-        self._owns_forwarder = False
-        self._handler_registered = False
-        self._processing_lock = asyncio.Lock()
         self._frame_number = 0
 
     async def process_video(
@@ -58,80 +130,127 @@ class ObjectDetectionProcessor(VideoProcessor):
         shared_forwarder: Optional[VideoForwarder] = None,
     ) -> None:
         _ = participant_id
-        # Rebind handler if process_video is called again (e.g., track switch).
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-            if self._owns_forwarder:
-                await self._forwarder.stop()
-            self._handler_registered = False
-            self._owns_forwarder = False
-
-        self._forwarder = shared_forwarder
-        if self._forwarder is None:
-            self._forwarder = VideoForwarder(
-                input_track=track,
-                max_buffer=5,
-                fps=max(1.0, self.fps),
-                name=f"{self.name}_forwarder",
-            )
-            await self._forwarder.start()
-            self._owns_forwarder = True
-
-        self._forwarder.add_frame_handler(
+        # Re-subscribing under the same name replaces the previous track (e.g., track switch).
+        await self._frame_hub.subscribe(
+            track,
             self._on_frame,
             fps=self.fps,
-            name=f"{self.name}_handler",
+            name=self.name,
+            policy=LATEST_WINS,
+            shared_forwarder=shared_forwarder,
         )
-        self._handler_registered = True
 
     async def _on_frame(self, frame: av.VideoFrame) -> None:
-        # Skip frame if previous inference is still running.
-        if self._processing_lock.locked():
+        if self._motion_gate is not None and not self._motion_gate.should_run(self.name, frame):
+            # Scene unchanged since the last run: keep the previous detections
+            # (re-confirmed so their tracks stay alive).
+            if self.tracker is not None:
+                self.latest_detections = self.tracker.update(self.latest_detections, frame_time(frame))
+                self._publish(frame)
+            return
+        frame_bgr = self._frame_cache.bgr(frame)
+        frame_number = self._frame_number
+        self._frame_number += 1
+        try:
+            if self._batcher is not None:
+                detections = await self._batcher.submit(frame_bgr, self._predict, postprocess=self._parse)
+            else:
+                detections = await self.scheduler.submit(
+                    self.name,
+                    self._detect,
+                    frame_number,
+                    frame_bgr,
+                    stream=self,
+                )
+        except JobDropped:
             return
+        if self._motion_gate is not None:
+            self._motion_gate.mark_ran(self.name)
+        if self.tracker is not None:
+            detections = self.tracker.update(detections, frame_time(frame))
 
-        async with self._processing_lock:
-            frame_bgr = frame.to_ndarray(format="bgr24")
-            frame_number = self._frame_number
-            self._frame_number += 1
-            detections = await asyncio.to_thread(
-                self._detect,
-                frame_number,
-                frame_bgr,
-            )
+        self.latest_detections = detections
+        self.latest_event = ObjectDetectedEvent(
+            frame_number=frame_number,
+            timestamp=frame_time(frame),
+            objects=detections,
+        )
+        self._publish(frame)
+        if self.event_bus is not None:
+            await self.event_bus.publish(self.latest_event)
 
-            self.latest_detections = detections
-            self.latest_event = ObjectDetectedEvent(
-                frame_number=frame_number,
-                objects=detections,
-            )
+    def _publish(self, frame: av.VideoFrame) -> None:
+        if self.detection_feed is not None:
+            self.detection_feed.publish_detections(SECTION_OBJECTS, self.latest_detections, frame_time(frame))
+
+    def _predict(self, frames: list[np.ndarray]) -> list[Any]:
+        # A list input runs as one batch and yields one Results per frame.
+        return self._model_lease.infer(
+            frames,
+            verbose=False,
+            conf=self.confidence_threshold,
+            device=self.device,
+        )
+
+    def _parse(self, result: Any) -> DetectionBatch:
+        return parse_object_result(result)
 
     def _detect(
         self,
         frame_number: int,
         frame_bgr: np.ndarray,
-    ) -> list[dict[str, Any]]:
+    ) -> DetectionBatch:
         _ = frame_number
-        results = self.model(
-            frame_bgr,
-            verbose=False,
-            conf=self.confidence_threshold,
-            device=self.device,
+        if self.inference_pool is not None:
+            return self.inference_pool.infer(
+                self.name,
+                self.weights_path,
+                frame_bgr,
+                predict_kwargs={"conf": self.confidence_threshold, "device": self.device},
+            )
+        return self._parse(self._predict([frame_bgr])[0])
+
+    @classmethod
+    async def acquire_model(
+        cls,
+        weights_path: str,
+        backend: str = BACKEND_TORCH,
+        model_registry: Optional[ModelRegistry] = None,
+    ) -> ModelLease:
+        """Lease the model for ``weights_path`` (from ``prepare_weights``), loading it on a worker thread."""
+        device = cls._resolve_device(backend)
+        return await (model_registry or MODEL_REGISTRY).acquire_async(
+            weights_path,
+            loader=lambda: cls._load_model(weights_path, device),
+            device=device,
+            backend=backend,
         )
-        detections = format_yolo_detections(results)
-        filtered = [
-            det for det in detections
-            if str(det.get("label", "")).strip().lower() not in EXCLUDED_YOLO_LABELS
-        ]
-        return filtered
 
     @staticmethod
-    def _resolve_device() -> str:
+    def _load_model(model_path: str, device: str) -> YOLO:
+        print(f"Loading YOLO model from {model_path}...")
+        model = YOLO(model_path, task="detect")
+        try:
+            model.to(device)
+        except Exception:
+            # Some ultralytics backends may not support .to(); fallback to device arg in inference.
+            pass
+        print("YOLO model loaded.")
+        return model
+
+    @staticmethod
+    def _resolve_device(backend: str = BACKEND_TORCH) -> str:
         env_device = os.getenv("YOLO_DEVICE", "").strip().lower()
         if env_device:
             return env_device
+        if backend != BACKEND_TORCH:
+            # Exported backends are for CPU-only hosts.
+            return "cpu"
         try:
             import torch
 
+            if torch.cuda.is_available():
+                return "cuda"
             if torch.backends.mps.is_available():
                 return "mps"
         except Exception:
@@ -155,16 +274,15 @@ class ObjectDetectionProcessor(VideoProcessor):
         return annotated_frame
 
     def state(self) -> dict[str, Any]:
-        return {"detections": self.latest_detections}
+        return {"detections": self.latest_detections.to_dicts()}
 
     async def stop_processing(self) -> None:
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-        if self._forwarder is not None and self._owns_forwarder:
-            await self._forwarder.stop()
-        self._handler_registered = False
-        self._forwarder = None
-        self._owns_forwarder = False
+        await self._frame_hub.unsubscribe(self.name)
 
     async def close(self) -> None:
         await self.stop_processing()
+        if self._batcher is not None:
+            self._batcher = None
+            await self._batch_server.release(self._batch_key)
+        if self._model_lease is not None:
+            self._model_lease.release()
@@ -0,0 +1,314 @@
+"""
+Cached overlay compositing for the published video.
+
+The publisher used to redraw every box with ``draw_bbox`` on every output
+frame: ``cv2.getTextSize``, the label background and an anti-aliased
+``cv2.putText`` for labels that change about once a second. The
+``OverlayCompositor`` keeps the annotation layer instead, as solid fills and
+patches covering only each item's outline and label:
+
+- labels come from a ``GlyphCache`` keyed by (text, color, scale);
+- outlines come from a per-thickness template: one reference outline is
+  rasterized and cut into a handful of opaque rectangles anchored to the
+  canvas edges, so a box of any size or position is a few solid-colour
+  slice fills and no drawing. Only boxes too small to have straight edges
+  are rasterized (and cached by size).
+
+Tracked boxes change position and size on every frame, so nothing is keyed
+on the box geometry. Every outgoing frame gets the fills and patches written
+into just the regions they cover, in draw order. The result matches
+``draw_bbox`` pixel for pixel, including boxes cut off by the frame edge.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+import cv2
+import numpy as np
+
+
+DEFAULT_MAX_GLYPHS = 512
+DEFAULT_MAX_SMALL_OUTLINES = 256
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+@dataclass(frozen=True)
+class BoxItem:
+    """One ``draw_bbox`` call: outline plus optional label."""
+
+    bbox: tuple[int, int, int, int]
+    label: str = ""
+    color: tuple[int, int, int] = (0, 255, 0)
+    thickness: int = 2
+    font_scale: float = 0.6
+
+
+# One write into the frame: (rows, cols, pixels, mask). ``pixels`` is a
+# patch the size of the region (solid fills are views of a shared colour
+# buffer); ``mask`` a matching (height, width, 1) bool mask, None when opaque.
+_Write = tuple[slice, slice, np.ndarray, Optional[np.ndarray]]
+
+
+@dataclass
+class _OutlineTemplate:
+    """A rectangle outline of one thickness as opaque rectangles on its canvas."""
+
+    band: int
+    # (top, bottom, left, right) per rectangle, each an (offset, anchor)
+    # pair: offset from the canvas origin, plus the canvas height or width
+    # when anchored (1) to the far edge.
+    rects: tuple[tuple[int, int, int, int, int, int, int, int], ...]
+
+
+class GlyphCache:
+    """
+    Pre-rendered label patches (background box + anti-aliased text).
+
+    A patch is exactly what ``draw_bbox`` paints for a label, with its top
+    left corner at ``(x1, y1 - text_height - 10)`` of the box.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_GLYPHS) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._glyphs: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, color: tuple[int, int, int], font_scale: float) -> np.ndarray:
+        key = (text, tuple(int(c) for c in color), float(font_scale))
+        with self._lock:
+            glyph = self._glyphs.get(key)
+            if glyph is not None:
+                self._glyphs.move_to_end(key)
+                self.hits += 1
+                return glyph
+            self.misses += 1
+
+        (tw, th), _ = cv2.getTextSize(text, _FONT, font_scale, 1)
+        # Same geometry as draw_bbox: a filled box (inclusive corners) from
+        # (x1, y1 - th - 10) to (x1 + tw + 4, y1), text baseline at y1 - 5.
+        glyph = np.empty((th + 11, tw + 5, 3), dtype=np.uint8)
+        glyph[:] = key[1]
+        cv2.putText(glyph, text, (2, th + 5), _FONT, font_scale, (0, 0, 0), 1, cv2.LINE_AA)
+        glyph.flags.writeable = False
+
+        with self._lock:
+            self._glyphs[key] = glyph
+            while len(self._glyphs) > self.max_entries:
+                self._glyphs.popitem(last=False)
+        return glyph
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._glyphs), "hits": self.hits, "misses": self.misses}
+
+
+class OverlayCompositor:
+    """
+    Holds the current annotation layer and stamps it onto frames.
+
+    Call ``update(items)`` with the items to draw (cheap when nothing
+    changed), then ``composite(frame)`` for each outgoing frame.
+
+    Args:
+        glyphs: Label cache; shared between compositors if given.
+        max_small_outlines: Rasterized outlines of boxes too small for the
+            template, kept for reuse.
+    """
+
+    def __init__(
+        self,
+        glyphs: Optional[GlyphCache] = None,
+        max_small_outlines: int = DEFAULT_MAX_SMALL_OUTLINES,
+    ) -> None:
+        self.glyphs = glyphs or GlyphCache()
+        self.max_small_outlines = max(1, int(max_small_outlines))
+        # (width, height, thickness) -> (height, width, 1) bool mask.
+        self._small_outlines: OrderedDict[tuple[int, int, int], np.ndarray] = OrderedDict()
+        self._solids: dict[tuple[int, int, int], np.ndarray] = {}
+        self._items: tuple[BoxItem, ...] = ()
+        # The layer for the last frame size seen by composite(), built lazily.
+        self._layer: list[_Write] = []
+        self._layer_shape: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+        self.updates = 0
+        self.unchanged_updates = 0
+        self.outline_renders = 0
+        self.composites = 0
+
+    def update(self, items: Sequence[BoxItem]) -> None:
+        items = tuple(items)
+        with self._lock:
+            self.updates += 1
+            if items == self._items:
+                self.unchanged_updates += 1
+                return
+            self._items = items
+            self._layer_shape = None
+
+    def composite(self, frame: np.ndarray) -> np.ndarray:
+        """Write the cached layer into ``frame`` (in place) and return it."""
+        shape = frame.shape[:2]
+        with self._lock:
+            self.composites += 1
+            if self._layer_shape != shape:
+                # Assembled from cached glyphs and outline templates; nothing is
+                # drawn unless a label or a tiny box size is new.
+                layer: list[_Write] = []
+                for item in self._items:
+                    self._add_item(layer, item, shape)
+                self._layer, self._layer_shape = layer, shape
+            layer = self._layer
+        for rows, cols, pixels, mask in layer:
+            if mask is None:
+                frame[rows, cols] = pixels
+            else:
+                np.copyto(frame[rows, cols], pixels, where=mask)
+        return frame
+
+    def _add_item(self, layer: list[_Write], item: BoxItem, shape: tuple[int, int]) -> None:
+        """Append the writes for one item to a frame of ``shape``."""
+        frame_height, frame_width = shape
+        x1, y1, x2, y2 = map(int, item.bbox)
+        color = tuple(map(int, item.color))
+        thickness = max(1, int(item.thickness))
+
+        # The outline's canvas: the box plus room for the thick line caps.
+        margin = thickness + 1
+        ox, oy = min(x1, x2) - margin, min(y1, y2) - margin
+        width = abs(x2 - x1) + 2 * margin + 1
+        height = abs(y2 - y1) + 2 * margin + 1
+        template = self._outline_template(thickness)
+
+        if width <= 2 * template.band or height <= 2 * template.band:
+            # Small box: no straight edges, so rasterize it (once per size).
+            mask = self._small_outline(x2 - x1, y2 - y1, thickness)
+            self._add_write(layer, shape, oy, ox, self._solid(color, height, width)[:height, :width], mask)
+        else:
+            solid = self._solid(color, height, width)
+            # Most boxes are fully in frame and need no cutting.
+            inside = ox >= 0 and oy >= 0 and ox + width <= frame_width and oy + height <= frame_height
+            for top, top_far, bottom, bottom_far, left, left_far, right, right_far in template.rects:
+                top += oy + top_far * height
+                bottom += oy + bottom_far * height
+                left += ox + left_far * width
+                right += ox + right_far * width
+                if inside:
+                    layer.append((slice(top, bottom), slice(left, right), solid[:bottom - top, :right - left], None))
+                else:
+                    self._add_write(layer, shape, top, left, solid[:bottom - top, :right - left], None)
+        if item.label:
+            glyph = self.glyphs.get(item.label, color, item.font_scale)
+            self._add_write(layer, shape, y1 + 1 - glyph.shape[0], x1, glyph, None)
+
+    @staticmethod
+    def _add_write(
+        layer: list[_Write], shape: tuple[int, int], top: int, left: int, pixels: np.ndarray, mask: Optional[np.ndarray]
+    ) -> None:
+        """Append ``pixels`` placed with its top left corner at (left, top), cut to the frame."""
+        bottom, right = top + pixels.shape[0], left + pixels.shape[1]
+        y0, y1, x0, x1 = max(0, top), min(shape[0], bottom), max(0, left), min(shape[1], right)
+        if y0 >= y1 or x0 >= x1:
+            return
+        if (y0, y1, x0, x1) != (top, bottom, left, right):
+            sy, sx = slice(y0 - top, y1 - top), slice(x0 - left, x1 - left)
+            pixels = pixels[sy, sx]
+            mask = None if mask is None else mask[sy, sx]
+        layer.append((slice(y0, y1), slice(x0, x1), pixels, mask))
+
+    def _small_outline(self, box_width: int, box_height: int, thickness: int) -> np.ndarray:
+        """Mask of a rectangle outline too small for the template, on its canvas."""
+        key = (box_width, box_height, thickness)
+        mask = self._small_outlines.get(key)
+        if mask is not None:
+            self._small_outlines.move_to_end(key)
+            return mask
+        margin = thickness + 1
+        ox, oy = min(0, box_width) - margin, min(0, box_height) - margin
+        raster = np.zeros((abs(box_height) + 2 * margin + 1, abs(box_width) + 2 * margin + 1), dtype=np.uint8)
+        cv2.rectangle(raster, (-ox, -oy), (box_width - ox, box_height - oy), 255, thickness)
+        mask = (raster > 0)[:, :, None]
+        mask.flags.writeable = False
+        self.outline_renders += 1
+        self._small_outlines[key] = mask
+        while len(self._small_outlines) > self.max_small_outlines:
+            self._small_outlines.popitem(last=False)
+        return mask
+
+    def _solid(self, color: tuple[int, int, int], height: int, width: int) -> np.ndarray:
+        """A read-only buffer of at least ``height`` x ``width`` filled with ``color``, sliced per write."""
+        buffer = self._solids.get(color)
+        if buffer is None or buffer.shape[0] < height or buffer.shape[1] < width:
+            shape = (height, width) if buffer is None else (max(height, buffer.shape[0]), max(width, buffer.shape[1]))
+            buffer = np.empty(shape + (3,), dtype=np.uint8)
+            buffer[:] = color
+            buffer.flags.writeable = False
+            self._solids[color] = buffer
+        return buffer
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _outline_template(thickness: int) -> _OutlineTemplate:
+        """Rasterize one reference outline and cut it into anchored opaque rectangles."""
+        margin = thickness + 1
+        band = 2 * margin + 1
+        size = 3 * band
+        raster = np.zeros((size, size), dtype=np.uint8)
+        cv2.rectangle(raster, (margin, margin), (size - 1 - margin, size - 1 - margin), 255, thickness)
+        covered = raster > 0
+
+        def anchored(position: int) -> tuple[int, int]:
+            # (anchor, offset): positions near the origin stay put, those near
+            # the far edge move with the canvas size.
+            if position <= band:
+                return 0, position
+            if position >= size - band:
+                return 1, position - size
+            raise RuntimeError(f"unexpected outline raster for thickness {thickness}")
+
+        def runs(y: int) -> tuple:
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], covered[y], [0])).astype(np.int8)))
+            return tuple((anchored(int(a)), anchored(int(b))) for a, b in zip(edges[::2], edges[1::2]))
+
+        # Rows above and below the straight sides vary (rounded caps); every
+        # row in between must be the same two side strips.
+        middle = runs(band)
+        if any(runs(y) != middle for y in range(band, size - band)):
+            raise RuntimeError(f"unexpected outline raster for thickness {thickness}")
+        rows = [(anchored(y), anchored(y + 1), runs(y)) for y in range(band)]
+        rows.append(((0, band), (1, -band), middle))
+        rows += [(anchored(y), anchored(y + 1), runs(y)) for y in range(size - band, size)]
+        # Neighbouring rows with the same spans become one rectangle.
+        groups = [rows[0]]
+        for top, bottom, spans in rows[1:]:
+            if spans == groups[-1][2]:
+                groups[-1] = (groups[-1][0], bottom, spans)
+            else:
+                groups.append((top, bottom, spans))
+
+        rects = tuple(
+            (top, top_far, bottom, bottom_far, left, left_far, right, right_far)
+            for (top_far, top), (bottom_far, bottom), spans in groups
+            for (left_far, left), (right_far, right) in spans
+        )
+        return _OutlineTemplate(band=band, rects=rects)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = {
+                "items": len(self._items),
+                "writes": len(self._layer),
+                "updates": self.updates,
+                "unchanged_updates": self.unchanged_updates,
+                "outline_renders": self.outline_renders,
+                "cached_small_outlines": len(self._small_outlines),
+                "composites": self.composites,
+            }
+        stats["glyphs"] = self.glyphs.stats()
+        return stats
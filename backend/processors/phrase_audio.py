@@ -0,0 +1,240 @@
+"""
+On-disk cache of synthesized audio for the fixed alert phrases.
+
+``join_call`` used to speak "Safety monitoring active." and "Fall detected"
+with ``agent.simple_response``: an LLM round trip and a live TTS synthesis
+each time, on the most time-critical message we have. The words never
+change, so ``PhraseAudioCache`` synthesizes each phrase once per TTS voice,
+keeps it on disk as raw PCM (s16 mono at ``DEFAULT_SAMPLE_RATE``) under
+``PHRASE_CACHE_DIR`` and in memory, and ``speak`` writes it straight onto
+the call's audio track. ``warm`` loads or synthesizes the known phrases up
+front. A phrase that is not cached (warm-up failed, new text) is spoken
+with live TTS instead and cached in the background for next time.
+
+``stats()`` reports hits and misses with the time from ``speak`` until the
+audio was queued on the track (cached) or fully synthesized (live).
+
+Environment:
+    PHRASE_CACHE_DIR: Where phrase audio is kept.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from getstream.video.rtc import PcmData
+
+from events.fall_alerts import DEFAULT_MESSAGE as FALL_ALERT_MESSAGE
+
+
+MONITORING_ACTIVE = "Safety monitoring active."
+DEFAULT_PHRASES = (MONITORING_ACTIVE, FALL_ALERT_MESSAGE)
+# The call's Opus rate, so the audio track doesn't resample on playback.
+DEFAULT_SAMPLE_RATE = 48000
+# TTS attributes that change how a phrase sounds, part of the cache key.
+VOICE_ATTRIBUTES = ("model", "model_id", "voice_id", "voice", "language")
+
+logger = logging.getLogger(__name__)
+
+
+def cache_dir() -> Path:
+    default = Path.home() / ".cache" / "vision-hackathon" / "phrases"
+    return Path(os.getenv("PHRASE_CACHE_DIR", str(default))).expanduser()
+
+
+def voice_key(tts: Any) -> str:
+    """Identity of a TTS voice: provider plus whichever voice settings it exposes."""
+    parts = [str(getattr(tts, "provider_name", type(tts).__name__))]
+    for attribute in VOICE_ATTRIBUTES:
+        value = getattr(tts, attribute, None)
+        if isinstance(value, (str, int, float)):
+            parts.append(f"{attribute}={value}")
+    return ";".join(parts)
+
+
+async def synthesize(tts: Any, text: str, sample_rate: int = DEFAULT_SAMPLE_RATE) -> PcmData:
+    """
+    Synthesize ``text`` without playing it: s16 mono at ``sample_rate``.
+
+    Uses the TTS's ``stream_audio`` directly, so no audio events reach the call.
+    """
+    response = await tts.stream_audio(text)
+    if isinstance(response, PcmData):
+        chunks = [response]
+    elif hasattr(response, "__aiter__"):
+        chunks = [chunk async for chunk in response]
+    else:
+        chunks = list(response)
+
+    native_rate = None
+    pieces = []
+    for chunk in chunks:
+        if not isinstance(chunk, PcmData):
+            raise TypeError(f"TTS stream_audio yielded {type(chunk).__name__}, expected PcmData")
+        native_rate = native_rate or chunk.sample_rate
+        if chunk.sample_rate != native_rate or chunk.channels != 1:
+            chunk = chunk.resample(target_sample_rate=native_rate, target_channels=1)
+        pieces.append(np.asarray(chunk.to_int16().samples, dtype=np.int16).reshape(-1))
+    if not pieces:
+        raise ValueError(f"TTS returned no audio for {text!r}")
+    # Resample once, over the whole phrase, so chunk boundaries don't click.
+    pcm = PcmData(sample_rate=native_rate, format="s16", samples=np.concatenate(pieces))
+    if native_rate != sample_rate:
+        pcm = pcm.resample(target_sample_rate=sample_rate, target_channels=1).to_int16()
+    return pcm
+
+
+class _Latency:
+    def __init__(self) -> None:
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self.total += seconds
+
+    def stats(self) -> dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "last_ms": self.last * 1000.0 if self.count else None,
+            "max_ms": self.max * 1000.0,
+            "mean_ms": self.total / self.count * 1000.0 if self.count else None,
+        }
+
+
+class PhraseAudioCache:
+    """
+    Phrase audio keyed by (TTS voice, text); shared by every call.
+
+    Args:
+        directory: On-disk cache (e.g. ``cache_dir()``); None keeps phrases in memory only.
+        sample_rate: Rate the audio is stored and played at.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, sample_rate: int = DEFAULT_SAMPLE_RATE) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.sample_rate = int(sample_rate)
+        self._audio: dict[str, PcmData] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._background: set[asyncio.Task] = set()
+
+        self.loaded = 0
+        self.synthesized = 0
+        self.synthesis_seconds = 0.0
+        self.errors = 0
+        self.hit_latency = _Latency()
+        self.miss_latency = _Latency()
+
+    def _key(self, tts: Any, text: str) -> str:
+        identity = f"{voice_key(tts)}\n{self.sample_rate}\n{text}"
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / f"{key}-{self.sample_rate}.pcm"
+
+    def get(self, tts: Any, text: str) -> Optional[PcmData]:
+        """Cached audio for ``text`` in ``tts``'s voice (memory only; see ``load``)."""
+        return self._audio.get(self._key(tts, text))
+
+    async def load(self, tts: Any, text: str) -> PcmData:
+        """Cached audio for ``text``, from memory, disk, or synthesized (and stored) on first use."""
+        key = self._key(tts, text)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pcm = self._audio.get(key)
+            if pcm is not None:
+                return pcm
+            path = self._path(key)
+            if path is not None and path.exists():
+                samples = await asyncio.to_thread(np.fromfile, path, dtype=np.int16)
+                pcm = PcmData(sample_rate=self.sample_rate, format="s16", samples=samples)
+                self.loaded += 1
+            else:
+                started = time.perf_counter()
+                pcm = await synthesize(tts, text, self.sample_rate)
+                self.synthesis_seconds += time.perf_counter() - started
+                self.synthesized += 1
+                if path is not None:
+                    await asyncio.to_thread(self._write, path, pcm)
+                logger.info("Cached %.0f ms of audio for %r", pcm.duration_ms, text)
+            self._audio[key] = pcm
+            return pcm
+
+    @staticmethod
+    def _write(path: Path, pcm: PcmData) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}-", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(np.ascontiguousarray(pcm.samples, dtype=np.int16).tobytes())
+            # Rename into place so a half-written file is never played.
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    async def warm(self, tts: Any, phrases: tuple[str, ...] = DEFAULT_PHRASES) -> int:
+        """Load (or synthesize) ``phrases``; returns how many are ready. Failures are logged, not raised."""
+        if tts is None:
+            return 0
+        ready = 0
+        for text in phrases:
+            try:
+                await self.load(tts, text)
+                ready += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("Failed to cache audio for %r", text)
+        return ready
+
+    async def speak(self, agent: Any, text: str) -> bool:
+        """
+        Play ``text`` on ``agent``'s audio track from the cache; returns False
+        when it fell back to live TTS, or to ``agent.simple_response`` when
+        there is no TTS or audio track to play it with.
+        """
+        started = time.perf_counter()
+        tts, track = agent.tts, agent.audio_track
+        pcm = self.get(tts, text) if tts is not None else None
+        if pcm is not None and track is not None:
+            await track.write(pcm, final=True)
+            self.hit_latency.add(time.perf_counter() - started)
+            return True
+
+        if tts is None or track is None:
+            # Still say it, the way join_call did before the cache.
+            await agent.simple_response(text)
+            self.miss_latency.add(time.perf_counter() - started)
+            return False
+        await tts.send(text)
+        self.miss_latency.add(time.perf_counter() - started)
+        # Cache it for next time, off the alert's path.
+        task = asyncio.get_running_loop().create_task(self.warm(tts, (text,)))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": str(self.directory) if self.directory is not None else None,
+            "phrases": len(self._audio),
+            "audio_ms": sum(pcm.duration_ms for pcm in self._audio.values()),
+            "loaded": self.loaded,
+            "synthesized": self.synthesized,
+            "synthesis_ms": self.synthesis_seconds * 1000.0,
+            "errors": self.errors,
+            "hits": self.hit_latency.stats(),
+            "misses": self.miss_latency.stats(),
+        }
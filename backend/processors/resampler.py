@@ -0,0 +1,204 @@
+"""
+Streaming polyphase resampler for incoming call audio.
+
+The cry detector used to FFT-resample every 10-20 ms packet on its own
+(``tf.signal.resample`` / ``scipy.signal.resample``). That is costly, and as
+each packet is treated as one period of a periodic signal, every packet
+boundary gets edge artifacts. ``StreamingResampler`` instead runs one FIR
+low-pass across the whole stream: the filter for a rate pair is designed
+once (cached per ``up/down`` ratio) and split into its polyphase branches,
+and the last input samples are carried over between packets, so a stream
+fed in any packet sizes comes out the same as the whole signal resampled at
+once. Multichannel input is mixed down to mono on the way in.
+
+The filter and output alignment are those of ``scipy.signal.resample_poly``
+(Kaiser-windowed sinc, beta 5, 10 zero crossings per side), so after
+``flush`` the output matches ``resample_poly`` on the concatenated input.
+"""
+
+import math
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+KAISER_BETA = 5.0
+# Filter half-length in zero crossings of the (up- or down-sampled) Nyquist.
+HALF_LENGTH_FACTOR = 10
+
+
+@lru_cache(maxsize=32)
+def polyphase_filter(up: int, down: int) -> tuple[np.ndarray, int, int]:
+    """
+    (cycle matrix, history, delay) for resampling by ``up/down`` (already reduced).
+
+    Every ``down`` inputs make ``up`` outputs with the same filter phases, so
+    one cycle's outputs are a single product: ``window @ matrix``, where
+    ``window`` is the ``matrix.shape[0]`` inputs starting ``history`` before
+    the cycle's first input. ``delay`` is how many leading outputs are filter
+    delay, not signal.
+    """
+    max_rate = max(up, down)
+    half_len = HALF_LENGTH_FACTOR * max_rate
+    numtaps = 2 * half_len + 1
+    cutoff = 1.0 / max_rate
+    m = np.arange(numtaps) - half_len
+    h = cutoff * np.sinc(cutoff * m) * np.kaiser(numtaps, KAISER_BETA)
+    h *= up / h.sum()
+    # Pad in front so output samples land on the filter's centre.
+    pre_pad = down - half_len % down
+    delay = (half_len + pre_pad) // down
+    h = np.concatenate([np.zeros(pre_pad), h])
+
+    # Output r of a cycle is sum(x[n] * h[r * down - n * up]) over the inputs n
+    # (relative to the cycle's first input) that the filter reaches.
+    history = -(-len(h) // up) - 1
+    span = history + 1 + (up - 1) * down // up
+    r = np.arange(up)[None, :]
+    s = np.arange(span)[:, None]
+    index = r * down + (history - s) * up
+    valid = (index >= 0) & (index < len(h))
+    matrix = np.where(valid, h[np.clip(index, 0, len(h) - 1)], 0.0)
+    return np.ascontiguousarray(matrix, dtype=np.float32), history, delay
+
+
+def mixdown(samples: np.ndarray, channels: int, out: np.ndarray) -> np.ndarray:
+    """
+    Mono float32 of ``samples`` written into ``out`` (which must have room);
+    returns the filled part of ``out``.
+
+    Accepts 1-D (mono or interleaved), (channels, n) planar or (n, channels).
+    """
+    samples = np.asarray(samples)
+    if channels > 1 and samples.ndim == 1:
+        samples = samples.reshape(-1, channels)
+    if samples.ndim == 2 and samples.shape[0] == channels and (channels > 1 or samples.shape[1] != 1):
+        axis = 0
+    elif samples.ndim == 2:
+        axis = 1
+    else:
+        samples = samples.reshape(-1)
+        out[:len(samples)] = samples
+        return out[:len(samples)]
+    mono = out[:samples.shape[1 - axis]]
+    # Sum then scale: cheaper than np.mean, and converts int PCM on the way.
+    np.add.reduce(samples, axis=axis, dtype=np.float32, out=mono)
+    if samples.shape[axis] > 1:
+        mono *= 1.0 / samples.shape[axis]
+    return mono
+
+
+class StreamingResampler:
+    """
+    Resample one continuous stream from ``src_rate`` to ``dst_rate``.
+
+    ``process`` returns the output available so far (behind the input by the
+    filter delay, plus up to one cycle of ``down`` inputs); ``flush`` returns
+    the rest at end of stream.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, channels: int = 1) -> None:
+        if src_rate <= 0 or dst_rate <= 0:
+            raise ValueError(f"sample rates must be positive, got {src_rate} -> {dst_rate}")
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.channels = max(1, int(channels))
+        g = math.gcd(self.src_rate, self.dst_rate)
+        self.up, self.down = self.dst_rate // g, self.src_rate // g
+        self._passthrough = self.up == self.down
+        if self._passthrough:
+            self._matrix, self._history, self._delay = None, 0, 0
+        else:
+            self._matrix, self._history, self._delay = polyphase_filter(self.up, self.down)
+        # Inputs not yet fully used, starting ``history`` before the next cycle; grown as needed.
+        self._staging = np.zeros(self._history + 4096, dtype=np.float32)
+        self._staged = self._history
+        self._inputs = 0
+        # Outputs made so far, counting the delay outputs that are dropped.
+        self._outputs = 0
+
+        self.input_samples = 0
+        self.output_samples = 0
+
+    def _reserve(self, count: int) -> np.ndarray:
+        """Room for ``count`` more inputs at the end of the staging buffer."""
+        needed = self._staged + count
+        if needed > len(self._staging):
+            grown = np.zeros(2 * needed, dtype=np.float32)
+            grown[:self._staged] = self._staging[:self._staged]
+            self._staging = grown
+        return self._staging[self._staged:needed]
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample one packet (any dtype; not rescaled) and return the new mono float32 output."""
+        samples = np.asarray(samples)
+        mono = mixdown(samples, self.channels, self._reserve(samples.size // self.channels))
+        self.input_samples += len(mono)
+        if self._passthrough:
+            self.output_samples += len(mono)
+            return mono.copy()
+        self._staged += len(mono)
+        self._inputs += len(mono)
+        return self._cycles()
+
+    def flush(self) -> np.ndarray:
+        """The remaining output, as if the stream were followed by silence; resets the stream."""
+        out = np.zeros(0, dtype=np.float32)
+        if not self._passthrough:
+            # Output length of the whole stream resampled at once.
+            end = self._delay + -(-self._inputs * self.up // self.down)
+            if self._outputs < end:
+                cycles = -(-(end - self._outputs) // self.up)
+                span = self._matrix.shape[0]
+                zeros = (cycles - 1) * self.down + span - (self._staged)
+                if zeros > 0:
+                    self._reserve(zeros)[:] = 0.0
+                    self._staged += zeros
+                out = self._cycles(limit=end)
+        self._staging[:] = 0.0
+        self._staged = self._history
+        self._inputs = self._outputs = 0
+        return out
+
+    def _cycles(self, limit: int = -1) -> np.ndarray:
+        """Outputs of every cycle whose inputs are all staged (up to output ``limit``)."""
+        span = self._matrix.shape[0]
+        cycles = (self._staged - span) // self.down + 1 if self._staged >= span else 0
+        if limit >= 0:
+            cycles = min(cycles, -(-(limit - self._outputs) // self.up))
+        if cycles <= 0:
+            return np.zeros(0, dtype=np.float32)
+        stride = self._staging.strides[0]
+        windows = np.lib.stride_tricks.as_strided(
+            self._staging, shape=(cycles, span), strides=(self.down * stride, stride), writeable=False
+        )
+        # Overlapping strided rows keep matmul off BLAS; the contiguous copy is far cheaper.
+        out = (np.ascontiguousarray(windows) @ self._matrix).reshape(-1)
+        first = self._outputs
+        self._outputs += len(out)
+        # Keep what the next cycles still need at the front.
+        used = cycles * self.down
+        self._staging[:self._staged - used] = self._staging[used:self._staged]
+        self._staged -= used
+        # Drop the filter delay from the front of the stream, and anything past ``limit``.
+        stop = len(out) if limit < 0 else max(0, min(len(out), limit - first))
+        out = out[max(0, self._delay - first):stop]
+        self.output_samples += len(out)
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "src_rate": self.src_rate,
+            "dst_rate": self.dst_rate,
+            "up": self.up,
+            "down": self.down,
+            "taps": self._matrix.shape[0] if self._matrix is not None else 1,
+            "input_samples": self.input_samples,
+            "output_samples": self.output_samples,
+        }
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int, channels: int = 1) -> np.ndarray:
+    """Resample a whole signal at once (mono float32)."""
+    resampler = StreamingResampler(src_rate, dst_rate, channels)
+    return np.concatenate([resampler.process(samples), resampler.flush()])
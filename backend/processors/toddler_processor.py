@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import os
 import time
@@ -6,15 +5,29 @@ from typing import Any, Optional
 
 import aiortc
 import av
+import numpy as np
 from roboflow import Roboflow
 from vision_agents.core.processors import VideoProcessor
 from vision_agents.core.utils.video_forwarder import VideoForwarder
 
+from events.detection_events import ObjectDetectedEvent, ToddlerDetectedEvent
+from events.event_bus import EventBus
+from .detection_feed import SECTION_TODDLERS, DetectionFeed
+from .detections import DetectionBatch
+from .frame_cache import FrameCache
+from .frame_hub import LATEST_WINS, FrameHub
+from .inference_scheduler import PRIORITY_HIGH, InferenceScheduler, JobDropped
+from .model_registry import MODEL_REGISTRY, ModelLease, ModelRegistry
+from .motion_gate import MotionGate
+from .tracker import MultiObjectTracker, frame_time
+
 
 DEFAULT_MODEL_ID = "toddler-detection-yxicj-sdfde/2"
 ERROR_LOG_THROTTLE_SECONDS = 10.0
 ALLOWED_CLASSES = {"toddler", "adult"}
 TODDLER_MIN_CONFIDENCE = 0.8
+# ObjectDetectedEvent.name of the toddler/adult detections on the event bus.
+PEOPLE_EVENT_NAME = "PeopleDetected"
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +41,15 @@ class ToddlerProcessor(VideoProcessor):
         api_key: Optional[str] = None,
         conf_threshold: float = 0.3,
         fps: int = 1,
+        frame_cache: Optional[FrameCache] = None,
+        frame_hub: Optional[FrameHub] = None,
+        scheduler: Optional[InferenceScheduler] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        model_lease: Optional[ModelLease] = None,
+        motion_gate: Optional[MotionGate] = None,
+        tracker: Optional[MultiObjectTracker] = None,
+        detection_feed: Optional[DetectionFeed] = None,
+        event_bus: Optional[EventBus] = None,
     ) -> None:
         key = api_key or os.getenv("ROBOFLOW_API_KEY")
         if not key:
@@ -36,22 +58,59 @@ class ToddlerProcessor(VideoProcessor):
         self.model_id = model_id
         self.conf_threshold = conf_threshold
         self.fps = max(1, int(fps))
+        self._frame_cache = frame_cache or FrameCache()
+        self._frame_hub = frame_hub or FrameHub()
+        self._motion_gate = motion_gate
+        # Assigns track ids and lets the publisher extrapolate boxes between runs.
+        self.tracker = tracker
+        # Pushes compact results to metadata-stream clients.
+        self.detection_feed = detection_feed
+        # Receives a ToddlerDetectedEvent (most confident toddler) per inference that sees one.
+        self.event_bus = event_bus
+        self.scheduler = scheduler or InferenceScheduler(max_workers=1)
+        # Stale frames are skipped once they are two inference periods old.
+        self.scheduler.register(self.name, priority=PRIORITY_HIGH, deadline_seconds=2.0 / self.fps)
 
-        project_name, version = self._parse_model_id(model_id)
         self._rf_confidence = max(1, int(conf_threshold * 100))
         self._rf_overlap = 30
 
-        rf = Roboflow(api_key=key)
-        self.model = rf.workspace().project(project_name).version(version).model
+        # A given model_lease was acquired off the event loop (see acquire_model)
+        # and is ours to release; otherwise the Roboflow lookup runs here, which blocks.
+        self._model_lease = model_lease or (model_registry or MODEL_REGISTRY).acquire(
+            **self._model_request(model_id, key)
+        )
+        self.model = self._model_lease.model
 
-        self._forwarder: Optional[VideoForwarder] = None
-        self._owns_forwarder = False
-        self._handler_registered = False
-        self._processing_lock = asyncio.Lock()
         self._last_error_log_ts = 0.0
 
         self.toddler_present: bool = False
-        self.last_predictions: list[dict[str, Any]] = []
+        self.last_predictions = DetectionBatch.from_dicts([])
+
+    @classmethod
+    async def acquire_model(
+        cls,
+        model_id: str = DEFAULT_MODEL_ID,
+        api_key: Optional[str] = None,
+        model_registry: Optional[ModelRegistry] = None,
+    ) -> ModelLease:
+        """Lease the Roboflow model handle, looking it up on a worker thread."""
+        key = api_key or os.getenv("ROBOFLOW_API_KEY")
+        if not key:
+            raise ValueError("ROBOFLOW_API_KEY is required for ToddlerProcessor")
+        return await (model_registry or MODEL_REGISTRY).acquire_async(**cls._model_request(model_id, key))
+
+    @classmethod
+    def _model_request(cls, model_id: str, api_key: str) -> dict[str, Any]:
+        project_name, version = cls._parse_model_id(model_id)
+        # The Roboflow handle is a hosted-API client: share it across sessions,
+        # but it is safe to call concurrently so skip the inference lock.
+        return {
+            "model_path": model_id,
+            "loader": lambda: Roboflow(api_key=api_key).workspace().project(project_name).version(version).model,
+            "device": "remote",
+            "backend": "roboflow",
+            "thread_safe": True,
+        }
 
     @staticmethod
     def _parse_model_id(model_id: str) -> tuple[str, int]:
@@ -95,98 +154,116 @@ class ToddlerProcessor(VideoProcessor):
         shared_forwarder: Optional[VideoForwarder] = None,
     ) -> None:
         _ = participant_id
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-            if self._owns_forwarder:
-                await self._forwarder.stop()
-            self._handler_registered = False
-            self._owns_forwarder = False
-
-        self._forwarder = shared_forwarder
-        if self._forwarder is None:
-            self._forwarder = VideoForwarder(
-                input_track=track,
-                max_buffer=5,
-                fps=max(1.0, float(self.fps)),
-                name=f"{self.name}_forwarder",
-            )
-            await self._forwarder.start()
-            self._owns_forwarder = True
-
-        self._forwarder.add_frame_handler(
+        # Re-subscribing under the same name replaces the previous track (e.g., track switch).
+        await self._frame_hub.subscribe(
+            track,
             self._on_frame,
             fps=float(self.fps),
-            name=f"{self.name}_handler",
+            name=self.name,
+            policy=LATEST_WINS,
+            shared_forwarder=shared_forwarder,
+        )
+
+    def _predict(self, image_bgr: np.ndarray) -> Any:
+        result = self._model_lease.model.predict(
+            image_bgr,
+            confidence=self._rf_confidence,
+            overlap=self._rf_overlap,
         )
-        self._handler_registered = True
+        return result.json()
 
     async def _on_frame(self, frame: av.VideoFrame) -> None:
-        if self._processing_lock.locked():
+        if self._motion_gate is not None and not self._motion_gate.should_run(self.name, frame):
+            # Scene unchanged since the last run: keep the previous detections
+            # (re-confirmed so their tracks stay alive).
+            if self.tracker is not None:
+                self.last_predictions = self.tracker.update(self.last_predictions, frame_time(frame))
+                self._publish(frame)
+            return
+        image_bgr = self._frame_cache.bgr(frame)
+        try:
+            result_json = await self.scheduler.submit(
+                self.name, self._predict, image_bgr, stream=self
+            )
+        except JobDropped:
+            return
+        except Exception as error:
+            now = time.time()
+            if now - self._last_error_log_ts >= ERROR_LOG_THROTTLE_SECONDS:
+                logger.exception("Toddler inference failed: %s", error)
+                self._last_error_log_ts = now
             return
+        if self._motion_gate is not None:
+            self._motion_gate.mark_ran(self.name)
 
-        async with self._processing_lock:
-            image_bgr = frame.to_ndarray(format="bgr24")
-            try:
-                result = await asyncio.to_thread(
-                    self.model.predict,
-                    image_bgr,
-                    confidence=self._rf_confidence,
-                    overlap=self._rf_overlap,
-                )
-                result_json = result.json()
-            except Exception as error:
-                now = time.time()
-                if now - self._last_error_log_ts >= ERROR_LOG_THROTTLE_SECONDS:
-                    logger.exception("Toddler inference failed: %s", error)
-                    self._last_error_log_ts = now
-                return
-
-            predictions = result_json.get("predictions", []) if isinstance(result_json, dict) else []
-            if not isinstance(predictions, list):
-                predictions = []
-
-            detections: list[dict[str, Any]] = []
-            for pred in predictions:
-                if not isinstance(pred, dict):
-                    continue
-                class_name = str(pred.get("class", "Unknown")).strip() or "Unknown"
-                class_lower = class_name.lower()
-                confidence = self._safe_float(pred.get("confidence"))
-                if class_lower not in ALLOWED_CLASSES:
-                    continue
-                min_conf = self.conf_threshold
-                if class_lower == "toddler":
-                    min_conf = max(min_conf, TODDLER_MIN_CONFIDENCE)
-                if confidence is None or confidence < min_conf:
-                    continue
-                bbox = self._prediction_to_bbox(pred)
-                if bbox is None:
-                    continue
-                detections.append(
-                    {
-                        "label": class_name,
-                        "confidence": confidence,
-                        "bbox": bbox,
-                    }
-                )
-
-            self.last_predictions = detections
-            self.toddler_present = any(det["label"].lower() == "toddler" for det in detections)
+        predictions = result_json.get("predictions", []) if isinstance(result_json, dict) else []
+        if not isinstance(predictions, list):
+            predictions = []
+
+        detections: list[dict[str, Any]] = []
+        for pred in predictions:
+            if not isinstance(pred, dict):
+                continue
+            class_name = str(pred.get("class", "Unknown")).strip() or "Unknown"
+            class_lower = class_name.lower()
+            confidence = self._safe_float(pred.get("confidence"))
+            if class_lower not in ALLOWED_CLASSES:
+                continue
+            min_conf = self.conf_threshold
+            if class_lower == "toddler":
+                min_conf = max(min_conf, TODDLER_MIN_CONFIDENCE)
+            if confidence is None or confidence < min_conf:
+                continue
+            bbox = self._prediction_to_bbox(pred)
+            if bbox is None:
+                continue
+            detections.append(
+                {
+                    "label": class_name,
+                    "confidence": confidence,
+                    "bbox": bbox,
+                }
+            )
+
+        batch = DetectionBatch.from_dicts(detections)
+        if self.tracker is not None:
+            batch = self.tracker.update(batch, frame_time(frame))
+
+        self.last_predictions = batch
+        is_toddler = np.array([label.lower() == "toddler" for label in batch.labels], dtype=bool)
+        self.toddler_present = bool(is_toddler.any())
+        self._publish(frame)
+        if self.event_bus is not None:
+            # Every result, empty ones included, so subscribers see people leave.
+            await self.event_bus.publish(ObjectDetectedEvent(
+                name=PEOPLE_EVENT_NAME,
+                timestamp=frame_time(frame),
+                objects=batch,
+            ))
+        if self.event_bus is not None and self.toddler_present:
+            toddlers = batch.select(is_toddler)
+            toddler = toddlers[int(np.argmax(toddlers.scores))]
+            await self.event_bus.publish(ToddlerDetectedEvent(
+                timestamp=frame_time(frame),
+                confidence=toddler.confidence,
+                bbox=toddler.bbox,
+            ))
+
+    def _publish(self, frame: av.VideoFrame) -> None:
+        if self.detection_feed is not None:
+            self.detection_feed.publish_detections(
+                SECTION_TODDLERS, self.last_predictions, frame_time(frame), present=self.toddler_present
+            )
 
     def state(self) -> dict[str, Any]:
         return {
             "toddler_present": self.toddler_present,
-            "detections": self.last_predictions,
+            "detections": self.last_predictions.to_dicts(),
         }
 
     async def stop_processing(self) -> None:
-        if self._forwarder is not None and self._handler_registered:
-            await self._forwarder.remove_frame_handler(self._on_frame)
-        if self._forwarder is not None and self._owns_forwarder:
-            await self._forwarder.stop()
-        self._handler_registered = False
-        self._forwarder = None
-        self._owns_forwarder = False
+        await self._frame_hub.unsubscribe(self.name)
 
     async def close(self) -> None:
         await self.stop_processing()
+        self._model_lease.release()
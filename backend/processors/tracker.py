@@ -0,0 +1,273 @@
+"""
+Lightweight multi-object tracking between sparse inference frames.
+
+The publisher draws at 10 fps while object boxes refresh at 1 fps and fall
+boxes at 2 fps, so the overlay used to show stale boxes that jumped on every
+inference, with no identity across frames. ``MultiObjectTracker`` keeps one
+constant-velocity Kalman filter per object and associates each new batch of
+detections ByteTrack-style: confident detections first, then the low
+confidence leftovers against the still-unmatched tracks. Tracks get
+persistent ids, and ``predict(ts)`` extrapolates every live box to the
+timestamp of whatever frame is being drawn.
+
+Time is in seconds (frame pts * time_base), not frames, because inference
+runs at irregular intervals.
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Optional
+
+import av
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from .base import center_distance_matrix, iou_matrix
+from .detections import NO_ID, DetectionBatch, as_batch
+
+
+DEFAULT_IOU_THRESHOLD = 0.3
+DEFAULT_MAX_CENTER_SHIFT = 1.5
+DEFAULT_HIGH_CONFIDENCE = 0.5
+DEFAULT_MAX_AGE_SECONDS = 3.0
+DEFAULT_MAX_EXTRAPOLATION_SECONDS = 1.0
+# Rewinding further than this means a new stream (track switch, pts reset).
+RESET_ON_REWIND_SECONDS = 1.0
+
+# Noise scales relative to box height: measurement jitter, position drift per
+# second, and how fast velocity may change per second.
+_STD_MEASUREMENT = 0.05
+_STD_POSITION = 0.05
+_STD_VELOCITY = 0.2
+
+
+def frame_time(frame: av.VideoFrame) -> float:
+    """Presentation time of ``frame`` in seconds (monotonic clock if it has no pts)."""
+    if frame.pts is not None and frame.time_base is not None:
+        return float(frame.pts * frame.time_base)
+    return time.monotonic()
+
+
+def _to_state(bbox: Any) -> np.ndarray:
+    x1, y1, x2, y2 = bbox
+    return np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0, max(1.0, x2 - x1), max(1.0, y2 - y1)])
+
+
+def _to_bbox(state: np.ndarray) -> tuple[int, int, int, int]:
+    cx, cy, w, h = state[:4]
+    w, h = max(1.0, w), max(1.0, h)
+    return (int(cx - w / 2.0), int(cy - h / 2.0), int(cx + w / 2.0), int(cy + h / 2.0))
+
+
+class _Track:
+    """Constant-velocity Kalman filter over (cx, cy, w, h) plus the last detection (a one-row batch)."""
+
+    _H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+    def __init__(self, track_id: int, detection: DetectionBatch, ts: float) -> None:
+        self.track_id = track_id
+        self.label = detection.labels[0]
+        self.detection = detection
+        self.last_ts = ts
+        self.hits = 1
+        self.misses = 0
+
+        measurement = _to_state(detection.boxes[0])
+        self.x = np.concatenate([measurement, np.zeros(4)])
+        h = measurement[3]
+        self.P = np.diag(np.concatenate([
+            np.full(4, (2 * _STD_MEASUREMENT * h) ** 2),
+            np.full(4, (10 * _STD_VELOCITY * h) ** 2),
+        ]))
+
+    def predict_state(self, ts: float, max_extrapolation: float) -> np.ndarray:
+        dt = min(max(0.0, ts - self.last_ts), max_extrapolation)
+        return self.x[:4] + self.x[4:] * dt
+
+    def _advance(self, ts: float) -> None:
+        dt = max(0.0, ts - self.last_ts)
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        h = max(1.0, self.x[3])
+        Q = np.diag(np.concatenate([
+            np.full(4, (_STD_POSITION * h) ** 2 * dt),
+            np.full(4, (_STD_VELOCITY * h) ** 2 * dt),
+        ]))
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+        self.last_ts = ts
+
+    def update(self, detection: DetectionBatch, ts: float) -> None:
+        self._advance(ts)
+        z = _to_state(detection.boxes[0])
+        R = np.eye(4) * (_STD_MEASUREMENT * max(1.0, z[3])) ** 2
+        S = self._H @ self.P @ self._H.T + R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self._H @ self.x)
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+        self.detection = detection
+        self.hits += 1
+        self.misses = 0
+
+    def mark_missed(self) -> None:
+        self.misses += 1
+
+
+class MultiObjectTracker:
+    """
+    IoU tracker with Kalman motion and ByteTrack-style two-stage matching.
+
+    Args:
+        iou_threshold: Minimum IoU between a predicted track box and a
+            detection of the same label to associate them.
+        high_confidence: Detections at or above this start new tracks and
+            are matched first; lower ones can only continue existing tracks.
+        max_center_shift: Fallback for boxes that moved too far to overlap
+            (fast motion at 1 fps, or a track with no velocity yet): a
+            confident detection may still continue a track if its center is
+            within this many box diagonals of the prediction.
+        max_age_seconds: Tracks unmatched for this long are dropped.
+        max_extrapolation_seconds: ``predict`` never extrapolates further
+            than this past the last update, so a box can't drift away.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+        high_confidence: float = DEFAULT_HIGH_CONFIDENCE,
+        max_center_shift: float = DEFAULT_MAX_CENTER_SHIFT,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        max_extrapolation_seconds: float = DEFAULT_MAX_EXTRAPOLATION_SECONDS,
+    ) -> None:
+        self.iou_threshold = float(iou_threshold)
+        self.high_confidence = float(high_confidence)
+        self.max_center_shift = float(max_center_shift)
+        self.max_age_seconds = float(max_age_seconds)
+        self.max_extrapolation_seconds = float(max_extrapolation_seconds)
+
+        self._tracks: list[_Track] = []
+        self._ids = itertools.count(1)
+        self._last_update_ts: Optional[float] = None
+        self.tracks_created = 0
+        # update() runs on the event loop today, but predict() may be called
+        # from encoder threads.
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tracks.clear()
+            self._last_update_ts = None
+
+    def update(self, detections: Any, ts: float) -> DetectionBatch:
+        """
+        Associate ``detections`` (from a frame at time ``ts``) with tracks.
+
+        Takes a ``DetectionBatch`` (or detection dicts) and returns it with a
+        ``track_id`` column (``None`` for low-confidence detections that
+        matched no track).
+        """
+        batch = as_batch(detections)
+        with self._lock:
+            if self._last_update_ts is not None and ts < self._last_update_ts - RESET_ON_REWIND_SECONDS:
+                self._tracks.clear()
+            self._last_update_ts = ts
+
+            confident = batch.scores >= self.high_confidence
+            high = np.flatnonzero(confident).tolist()
+            low = np.flatnonzero(~confident).tolist()
+
+            unmatched_tracks = list(range(len(self._tracks)))
+            matches_high, unmatched_tracks, unmatched_high = self._associate(unmatched_tracks, high, batch, ts)
+            matches_low, unmatched_tracks, _ = self._associate(unmatched_tracks, low, batch, ts)
+            matches_far, unmatched_tracks, unmatched_high = self._associate(
+                unmatched_tracks, unmatched_high, batch, ts, by_distance=True
+            )
+
+            # Unmatched low-confidence detections don't start tracks.
+            track_ids = np.full(len(batch), NO_ID, dtype=np.int64)
+            for track_index, det_index in matches_high + matches_low + matches_far:
+                track = self._tracks[track_index]
+                track.update(batch.select([det_index]), ts)
+                track_ids[det_index] = track.track_id
+            for track_index in unmatched_tracks:
+                self._tracks[track_index].mark_missed()
+            for det_index in unmatched_high:
+                track = _Track(next(self._ids), batch.select([det_index]), ts)
+                self._tracks.append(track)
+                self.tracks_created += 1
+                track_ids[det_index] = track.track_id
+
+            self._tracks = [
+                track for track in self._tracks
+                if track.misses == 0 or ts - track.last_ts <= self.max_age_seconds
+            ]
+            return batch.with_column("track_id", track_ids)
+
+    def predict(self, ts: float) -> DetectionBatch:
+        """
+        Boxes of the tracks seen in the latest update, extrapolated to ``ts``.
+
+        Each row is the track's last detection with its box replaced by the
+        predicted box and ``track_id`` set.
+        """
+        with self._lock:
+            visible = [track for track in self._tracks if not track.misses]
+            if not visible:
+                return DetectionBatch.from_dicts([])
+            predicted = DetectionBatch.concat([track.detection for track in visible])
+            boxes = np.array(
+                [_to_bbox(track.predict_state(ts, self.max_extrapolation_seconds)) for track in visible],
+                dtype=np.float32,
+            )
+            track_ids = np.array([track.track_id for track in visible], dtype=np.int64)
+            return predicted.with_boxes(boxes).with_column("track_id", track_ids)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "tracks": len(self._tracks),
+                "visible": sum(1 for track in self._tracks if not track.misses),
+                "created": self.tracks_created,
+            }
+
+    def _associate(
+        self,
+        track_indices: list[int],
+        det_indices: list[int],
+        detections: DetectionBatch,
+        ts: float,
+        by_distance: bool = False,
+    ) -> tuple[list[tuple[int, int]], list[int], list[int]]:
+        if not track_indices or not det_indices:
+            return [], track_indices, det_indices
+
+        # Cost is 1 - IoU, or the center shift in box diagonals; pairs with a
+        # different label (or beyond the threshold) can never match.
+        max_cost = self.max_center_shift if by_distance else 1.0 - self.iou_threshold
+        tracks = [self._tracks[index] for index in track_indices]
+        predicted = np.array([_to_bbox(track.predict_state(ts, self.max_age_seconds)) for track in tracks])
+        boxes = detections.boxes[det_indices]
+        if by_distance:
+            diagonals = np.maximum(1.0, np.hypot(predicted[:, 2] - predicted[:, 0], predicted[:, 3] - predicted[:, 1]))
+            cost = center_distance_matrix(predicted, boxes) / diagonals[:, None]
+        else:
+            cost = 1.0 - iou_matrix(predicted, boxes)
+        same_label = (
+            np.array([track.label for track in tracks], dtype=object)[:, None]
+            == detections.labels[det_indices][None, :]
+        )
+        cost = np.where(same_label, cost, max_cost + 1.0)
+
+        rows, cols = linear_sum_assignment(cost)
+        matches = []
+        matched_rows, matched_cols = set(), set()
+        for row, col in zip(rows, cols):
+            if cost[row, col] > max_cost:
+                continue
+            matches.append((track_indices[row], det_indices[col]))
+            matched_rows.add(row)
+            matched_cols.add(col)
+        unmatched_tracks = [index for row, index in enumerate(track_indices) if row not in matched_rows]
+        unmatched_dets = [index for col, index in enumerate(det_indices) if col not in matched_cols]
+        return matches, unmatched_tracks, unmatched_dets
@@ -1,4 +1,6 @@
 from .audio import router as audio_router
+from .detections import router as detections_router
+from .sessions import router as sessions_router
 from .video import router as video_router
 
-__all__ = ["video_router", "audio_router"]
+__all__ = ["video_router", "audio_router", "sessions_router", "detections_router"]
@@ -1,15 +1,15 @@
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from processor_registry import get_crying_detector
+from session_registry import Session, sessions
+from .sessions import require_session
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
 
-@router.get("/crying/status")
-async def crying_status() -> dict[str, Any]:
-    detector = get_crying_detector()
+def _crying_status(session: Optional[Session]) -> dict[str, Any]:
+    detector = session.crying_detector if session is not None else None
     if detector is None:
         return {
             "initialized": False,
@@ -25,3 +25,14 @@ async def crying_status() -> dict[str, Any]:
         }
     state = detector.state()
     return {"initialized": True, **state}
+
+
+@router.get("/{call_id}/crying/status")
+async def call_crying_status(session: Session = Depends(require_session)) -> dict[str, Any]:
+    return _crying_status(session)
+
+
+# Legacy call-less route: serves the most recently joined call.
+@router.get("/crying/status")
+async def crying_status() -> dict[str, Any]:
+    return _crying_status(sessions.latest())
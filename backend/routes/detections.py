@@ -0,0 +1,135 @@
+import asyncio
+from typing import Any, AsyncGenerator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from processors.detection_feed import DetectionFeed
+from session_registry import Session, sessions
+from .sessions import require_session
+
+router = APIRouter(prefix="/detections", tags=["detections"])
+
+# Quiet streams still send something this often, so proxies keep them open
+# and closed clients are noticed.
+KEEPALIVE_SECONDS = 15.0
+
+
+def _require_feed(session: Optional[Session]) -> DetectionFeed:
+    feed = session.detection_feed if session is not None else None
+    if feed is None:
+        raise HTTPException(status_code=503, detail="Detection feed not initialized")
+    return feed
+
+
+async def _messages(feed: DetectionFeed, after_seq: int = 0) -> AsyncGenerator[Optional[tuple[int, str]], None]:
+    """
+    (seq, JSON text) per change: a full ``snapshot`` first (or a ``delta``
+    when resuming after ``after_seq``), then only the sections that changed.
+    Yields None after ``KEEPALIVE_SECONDS`` without changes.
+    """
+    seq, sections = feed.delta(after_seq)
+    if after_seq == 0 or sections:
+        yield seq, feed.message("snapshot" if after_seq == 0 else "delta", seq, sections)
+    while True:
+        changed = await feed.wait_delta(seq, timeout=KEEPALIVE_SECONDS)
+        if changed is None:
+            if feed.closed:
+                return
+            yield None
+            continue
+        seq, sections = changed
+        yield seq, feed.message("delta", seq, sections)
+
+
+async def _sse(feed: DetectionFeed, after_seq: int) -> AsyncGenerator[bytes, None]:
+    feed.clients += 1
+    try:
+        async for message in _messages(feed, after_seq):
+            if message is None:
+                yield b": keepalive\n\n"
+                continue
+            seq, text = message
+            yield f"id: {seq}\ndata: {text}\n\n".encode("utf-8")
+    finally:
+        feed.clients -= 1
+
+
+def _stream_events(session: Optional[Session], last_event_id: Optional[str]) -> StreamingResponse:
+    feed = _require_feed(session)
+    # EventSource sends the last id it saw when it reconnects; resume from there.
+    after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    if after_seq > feed.seq:
+        # From before a restart: start over.
+        after_seq = 0
+    return StreamingResponse(
+        _sse(feed, after_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _serve_websocket(websocket: WebSocket, session: Optional[Session]) -> None:
+    feed = session.detection_feed if session is not None else None
+    if feed is None:
+        await websocket.close(code=1011, reason="Detection feed not initialized")
+        return
+    await websocket.accept()
+    feed.clients += 1
+    # Clients never need to send anything; reading only notices the close.
+    closed = asyncio.ensure_future(_wait_closed(websocket))
+    messages = _messages(feed).__aiter__()
+    try:
+        while True:
+            next_message = asyncio.ensure_future(messages.__anext__())
+            done, _ = await asyncio.wait({next_message, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                next_message.cancel()
+                await asyncio.gather(next_message, return_exceptions=True)
+                return
+            message = next_message.result()
+            await websocket.send_text('{"type":"keepalive"}' if message is None else message[1])
+    except (StopAsyncIteration, WebSocketDisconnect):
+        pass
+    finally:
+        feed.clients -= 1
+        closed.cancel()
+        await messages.aclose()
+
+
+async def _wait_closed(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        return
+
+
+@router.get("/{call_id}/events")
+async def call_detection_events(
+    session: Session = Depends(require_session),
+    last_event_id: Optional[str] = Header(None),
+) -> StreamingResponse:
+    return _stream_events(session, last_event_id)
+
+
+@router.websocket("/{call_id}/ws")
+async def call_detection_websocket(websocket: WebSocket, call_id: str) -> None:
+    await _serve_websocket(websocket, sessions.get(call_id))
+
+
+@router.get("/{call_id}/snapshot")
+async def call_detection_snapshot(session: Session = Depends(require_session)) -> dict[str, Any]:
+    seq, sections = _require_feed(session).delta(0)
+    return {"seq": seq, "sections": sections}
+
+
+# Call-less routes, like the video and audio ones: serve the most recently joined call.
+@router.get("/events")
+async def detection_events(last_event_id: Optional[str] = Header(None)) -> StreamingResponse:
+    return _stream_events(sessions.latest(), last_event_id)
+
+
+@router.websocket("/ws")
+async def detection_websocket(websocket: WebSocket) -> None:
+    await _serve_websocket(websocket, sessions.latest())
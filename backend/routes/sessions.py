@@ -0,0 +1,26 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from processors.model_registry import MODEL_REGISTRY
+from session_registry import Session, sessions
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+
+def require_session(call_id: str) -> Session:
+    """FastAPI dependency resolving the ``{call_id}`` path parameter to its session."""
+    session = sessions.get(call_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"No active session for call {call_id!r}")
+    return session
+
+
+@router.get("")
+async def list_sessions() -> dict[str, Any]:
+    return {"call_ids": sessions.call_ids(), "models": MODEL_REGISTRY.stats()}
+
+
+@router.get("/{call_id}")
+async def session_stats(call_id: str) -> dict[str, Any]:
+    return require_session(call_id).stats()
@@ -1,79 +1,151 @@
 import asyncio
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from video_stream_registry import get_publisher
+from session_registry import Session, sessions
+from .sessions import require_session
 
 router = APIRouter(prefix="/video", tags=["video"])
 
 BOUNDARY = "frame"
 
 
-async def _mjpeg_generator() -> AsyncGenerator[bytes, None]:
-    while True:
-        publisher = get_publisher()
-        if publisher is None or not hasattr(publisher, "get_latest_jpeg"):
-            await asyncio.sleep(0.1)
-            continue
+def _mjpeg_part(frame: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        "Content-Type: image/jpeg\r\n"
+        f"Content-Length: {len(frame)}\r\n\r\n"
+    ).encode("ascii") + frame + b"\r\n"
 
-        frame = await publisher.get_latest_jpeg()
-        if frame is None:
-            await asyncio.sleep(0.03)
-            continue
 
-        yield (
-            f"--{BOUNDARY}\r\n"
-            "Content-Type: image/jpeg\r\n"
-            f"Content-Length: {len(frame)}\r\n\r\n"
-        ).encode("ascii") + frame + b"\r\n"
-        await asyncio.sleep(0.03)
-
-
-async def _get_frame_with_timeout(
+async def _mjpeg_generator(
     publisher: Any,
-    timeout_seconds: float = 5.0,
-) -> bytes | None:
-    deadline = asyncio.get_running_loop().time() + max(0.1, timeout_seconds)
-    while asyncio.get_running_loop().time() < deadline:
-        frame = await publisher.get_latest_jpeg()
-        if frame is not None:
-            return frame
-        await asyncio.sleep(0.05)
-    return None
-
-
-@router.get("/status")
-async def stream_status() -> dict[str, bool]:
-    publisher = get_publisher()
-    if publisher is None or not hasattr(publisher, "get_latest_jpeg"):
+    broadcast: Any,
+    first: tuple[int, bytes],
+    subscriber_id: Optional[int] = None,
+    fps: Optional[float] = None,
+) -> AsyncGenerator[bytes, None]:
+    # Each frame is sent once: the next wait is for a newer sequence number.
+    # A client still busy sending while frames are published gets only the
+    # newest one afterwards, so slow clients skip frames instead of queueing.
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / fps if fps else 0.0
+    try:
+        seq, frame = first
+        while True:
+            sent_at = loop.time()
+            yield _mjpeg_part(frame)
+            if interval:
+                # Per-client fps cap.
+                await asyncio.sleep(sent_at + interval - loop.time())
+            latest = await broadcast.wait_next(seq)
+            if latest is None:
+                return
+            seq, frame = latest
+    finally:
+        _unsubscribe(publisher, subscriber_id)
+
+
+def _unsubscribe(publisher: Any, subscriber_id: Optional[int]) -> None:
+    # Idempotent: called from the generator and again as the response's
+    # background task (which also covers a stream that never started).
+    if subscriber_id is not None:
+        publisher.remove_jpeg_subscriber(subscriber_id)
+
+
+async def _stream_status(session: Optional[Session]) -> dict[str, Any]:
+    if session is None or not hasattr(session.publisher, "get_latest_jpeg"):
         return {
             "publisher_initialized": False,
             "has_frame": False,
         }
 
-    frame = await publisher.get_latest_jpeg()
+    frame = await session.publisher.get_latest_jpeg()
+    stats = session.stats()
     return {
         "publisher_initialized": True,
         "has_frame": frame is not None,
+        "call_id": session.call_id,
+        "frame_cache": stats["frame_cache"],
+        "frame_hub": stats["frame_hub"],
+        "inference": stats.get("inference"),
+        "frame_ring": (
+            session.publisher.frame_ring.stats()
+            if getattr(session.publisher, "frame_ring", None) is not None
+            else None
+        ),
+        "jpeg": session.publisher.jpeg_stats() if hasattr(session.publisher, "jpeg_stats") else None,
+        "overlay": (
+            session.publisher.overlay.stats()
+            if getattr(session.publisher, "overlay", None) is not None
+            else None
+        ),
     }
 
 
-@router.get("/stream")
-async def stream_video() -> StreamingResponse:
-    publisher = get_publisher()
-    if publisher is None or not hasattr(publisher, "get_latest_jpeg"):
+async def _stream_video(
+    session: Optional[Session],
+    fps: Optional[float] = None,
+    width: Optional[int] = None,
+    quality: Optional[int] = None,
+) -> StreamingResponse:
+    if session is None or not hasattr(session.publisher, "jpeg_broadcast"):
         raise HTTPException(status_code=503, detail="Video publisher not initialized")
-
-    first_frame = await _get_frame_with_timeout(publisher, timeout_seconds=5.0)
-    if first_frame is None:
+    publisher = session.publisher
+
+    # The publisher only encodes JPEGs while someone is subscribed, once
+    # per frame for each distinct width / quality.
+    subscriber_id = None
+    broadcast = publisher.jpeg_broadcast
+    if hasattr(publisher, "add_jpeg_subscriber"):
+        try:
+            subscriber_id = publisher.add_jpeg_subscriber(fps, width=width, quality=quality)
+        except ValueError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        broadcast = publisher.jpeg_broadcast_for(subscriber_id)
+    first = await broadcast.wait_next(0, timeout=5.0)
+    if first is None:
+        _unsubscribe(publisher, subscriber_id)
         raise HTTPException(
             status_code=503,
             detail="No video frames available yet. Join a call and publish camera video first.",
         )
 
     return StreamingResponse(
-        _mjpeg_generator(),
+        _mjpeg_generator(publisher, broadcast, first, subscriber_id, fps),
         media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        background=BackgroundTask(_unsubscribe, publisher, subscriber_id),
     )
+
+
+@router.get("/{call_id}/status")
+async def call_stream_status(session: Session = Depends(require_session)) -> dict[str, Any]:
+    return await _stream_status(session)
+
+
+@router.get("/{call_id}/stream")
+async def call_stream_video(
+    session: Session = Depends(require_session),
+    fps: Optional[float] = Query(None, gt=0, description="Frames per second wanted (default: publisher fps)."),
+    width: Optional[int] = Query(None, gt=0, description="Frame width in pixels, keeping the aspect ratio (default: full size)."),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="JPEG quality (default: 80)."),
+) -> StreamingResponse:
+    return await _stream_video(session, fps, width, quality)
+
+
+# Legacy call-less routes: serve the most recently joined call.
+@router.get("/status")
+async def stream_status() -> dict[str, Any]:
+    return await _stream_status(sessions.latest())
+
+
+@router.get("/stream")
+async def stream_video(
+    fps: Optional[float] = Query(None, gt=0, description="Frames per second wanted (default: publisher fps)."),
+    width: Optional[int] = Query(None, gt=0, description="Frame width in pixels, keeping the aspect ratio (default: full size)."),
+    quality: Optional[int] = Query(None, ge=1, le=100, description="JPEG quality (default: 80)."),
+) -> StreamingResponse:
+    return await _stream_video(sessions.latest(), fps, width, quality)
@@ -5,80 +5,248 @@ from dotenv import load_dotenv
 
 from vision_agents.core import Agent, AgentLauncher, Runner, User
 from vision_agents.plugins import cartesia, gemini, getstream
+from events.event_bus import EventBus
+from events.fall_alerts import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_HOLD_SECONDS, FallAlerter
+from events.world_digest import (
+    DEFAULT_CADENCE_SECONDS,
+    DEFAULT_MIN_INTERVAL_SECONDS,
+    DEFAULT_TOKENS_PER_MINUTE,
+    WorldDigest,
+)
 from processors.object_detection import ObjectDetectionProcessor
 from processors.toddler_processor import ToddlerProcessor
 from processors.fall_detection import FallDetectionProcessor
 from processors.combined_video_publisher import CombinedVideoPublisher
 from processors.crying_audio_detector import CryingAudioDetector
-from processor_registry import set_crying_detector
-from routes import video_router, audio_router
-from video_stream_registry import set_publisher
+from processors.detection_feed import DetectionFeed
+from processors.batch_inference import BatchInferenceServer
+from processors.frame_cache import FrameCache
+from processors.frame_hub import FrameHub
+from processors.inference_pool import InferenceWorkerPool
+from processors.inference_scheduler import InferenceScheduler
+from processors.model_backends import backend_from_env, prepare_weights
+from processors.motion_gate import MotionGate
+from processors.phrase_audio import MONITORING_ACTIVE, PhraseAudioCache, cache_dir as phrase_cache_dir
+from processors.tracker import MultiObjectTracker
+from routes import video_router, audio_router, sessions_router, detections_router
+from session_registry import Session, sessions
 
 
 load_dotenv()
 
+# Process-wide: every call's processors share the CPU inference pool. Fall
+# detection outranks the rest and the object/toddler models are capped so they
+# can't starve it.
+inference_scheduler = InferenceScheduler(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+    budgets={"object_detection": 0.5, "toddler_processor": 0.5},
+)
+# With INFERENCE_MAX_BATCH > 1, YOLO frames from all calls are micro-batched per model.
+_max_batch = int(os.getenv("INFERENCE_MAX_BATCH", "1"))
+batch_server = (
+    BatchInferenceServer(
+        scheduler=inference_scheduler,
+        max_batch_size=_max_batch,
+        max_wait_ms=float(os.getenv("INFERENCE_BATCH_WAIT_MS", "8")),
+    )
+    if _max_batch > 1
+    else None
+)
+# With INFERENCE_MODE=process, YOLO runs in worker processes instead of the
+# scheduler's threads (which then only wait on the workers). Batching is
+# skipped in this mode.
+inference_pool = (
+    InferenceWorkerPool(workers=inference_scheduler.max_workers)
+    if os.getenv("INFERENCE_MODE", "thread").strip().lower() == "process"
+    else None
+)
+
+OBJECT_MODEL_PATH = "yolo11n.pt"
+POSE_MODEL_PATH = "yolo11n-pose.pt"
+
+# Process-wide: the fixed alert phrases are synthesized once and played from
+# disk/memory on every call.
+phrase_cache = PhraseAudioCache(phrase_cache_dir())
+
 
 async def create_agent(**kwargs) -> Agent:
     _ = kwargs
-    object_processor = ObjectDetectionProcessor(fps=1.0, confidence_threshold=0.5)
-    fall_processor = FallDetectionProcessor(fps=2.0)
-    toddler_processor = ToddlerProcessor(fps=1) if os.getenv("ROBOFLOW_API_KEY") else None
+    # One ingest and one decode per incoming frame, shared by every video processor below.
+    frame_cache = FrameCache()
+    frame_hub = FrameHub()
+    shared = {"frame_cache": frame_cache, "frame_hub": frame_hub}
+    # Skip inference while the room is still; MOTION_GATE=0 runs every sampled frame.
+    motion_gate = (
+        MotionGate(
+            frame_cache,
+            min_refresh_seconds=float(os.getenv("MOTION_MIN_REFRESH_SECONDS", "10")),
+        )
+        if os.getenv("MOTION_GATE", "1") != "0"
+        else None
+    )
+    # Compact detection / cry state pushed to /detections stream clients.
+    detection_feed = DetectionFeed()
+    # Processors publish their detection events here for alerting and other subscribers.
+    event_bus = EventBus()
+    inference = {
+        **shared,
+        "scheduler": inference_scheduler,
+        "motion_gate": motion_gate,
+        "detection_feed": detection_feed,
+        "event_bus": event_bus,
+    }
+    yolo = {**inference, "batch_server": batch_server, "inference_pool": inference_pool}
+    # Exporting for onnxruntime / openvino (first run only) takes a while:
+    # do it on a thread rather than in the processors' constructors.
+    backend, int8, calibration = backend_from_env()
+    object_weights = await asyncio.to_thread(
+        prepare_weights, OBJECT_MODEL_PATH, backend, int8=int8, calibration=calibration
+    )
+    pose_weights = await asyncio.to_thread(
+        prepare_weights, POSE_MODEL_PATH, backend, int8=int8, calibration=calibration
+    )
+    # Likewise the model loads (YOLO() plus .to(device), the Roboflow lookup);
+    # the processors take over the leases and release them on close.
+    object_lease = pose_lease = None
+    if inference_pool is None:
+        object_lease = await ObjectDetectionProcessor.acquire_model(object_weights, backend)
+        pose_lease = await FallDetectionProcessor.acquire_model(pose_weights, backend)
+    toddler_lease = await ToddlerProcessor.acquire_model() if os.getenv("ROBOFLOW_API_KEY") else None
+    # Each processor tracks its own detections; the publisher draws the tracks
+    # predicted to every output frame.
+    object_processor = ObjectDetectionProcessor(
+        fps=1.0,
+        model_path=OBJECT_MODEL_PATH,
+        confidence_threshold=0.5,
+        tracker=MultiObjectTracker(),
+        backend=backend,
+        weights_path=object_weights,
+        model_lease=object_lease,
+        **yolo,
+    )
+    fall_processor = FallDetectionProcessor(
+        fps=2.0,
+        model_path=POSE_MODEL_PATH,
+        tracker=MultiObjectTracker(),
+        backend=backend,
+        weights_path=pose_weights,
+        model_lease=pose_lease,
+        **yolo,
+    )
+    toddler_processor = (
+        ToddlerProcessor(
+            fps=1,
+            tracker=MultiObjectTracker(high_confidence=0.3),
+            model_lease=toddler_lease,
+            **inference,
+        )
+        if toddler_lease is not None
+        else None
+    )
     
     combined_publisher = CombinedVideoPublisher(
         object_processor=object_processor,
         toddler_processor=toddler_processor,
         fall_processor=fall_processor,
         fps=10.0,
+        **shared,
     )
-    set_publisher(combined_publisher)
+    crying_detector = CryingAudioDetector(detection_feed=detection_feed, event_bus=event_bus)
 
     processors: list = [object_processor, fall_processor]
     if toddler_processor is not None:
         processors.append(toddler_processor)
     processors.append(combined_publisher)
-  
-    if(crying_detector):
-        print("initialised crying detector")
+    processors.append(crying_detector)
 
     tts_engine = cartesia.TTS() if os.getenv("CARTESIA_API_KEY") else None
+    # Loads the alert phrases (synthesizing them on the very first run) before the call starts.
+    await phrase_cache.warm(tts_engine)
 
     agent = Agent(
         edge=getstream.Edge(),
         agent_user=User(name="Safety Monitor", id="agent"),
         instructions=(
             "You are a child safety monitoring AI. "
-            "Alert on dangers and analyze incoming events concisely."
+            "Alert on dangers and analyze incoming events concisely. "
+            "'Room update:' messages summarize what the cameras see; "
+            "reply in one short sentence, and only warn when something is dangerous."
         ),
         llm=gemini.LLM(model="gemini-2.5-flash-lite"),
         tts=tts_engine,
         processors=processors
     )
 
+    # The call id is only known in join_call; stage the session until then.
+    await sessions.stage(
+        agent,
+        Session(
+            publisher=combined_publisher,
+            processors={processor.name: processor for processor in processors},
+            frame_cache=frame_cache,
+            frame_hub=frame_hub,
+            crying_detector=crying_detector,
+            motion_gate=motion_gate,
+            detection_feed=detection_feed,
+            event_bus=event_bus,
+            phrase_cache=phrase_cache,
+        ),
+    )
     return agent
 
 
 async def join_call(agent: Agent, call_type: str, call_id: str, **kwargs) -> None:
     _ = kwargs
     # Stream edge transport relies on agent user initialization before call creation.
-    await agent.create_user()
-    call = await agent.create_call(call_type, call_id)
-    async with agent.join(call):
-        await agent.simple_response("Safety monitoring active.")
-        fall_processor = getattr(agent, "_fall_processor", None)
-        fall_announced = False
-        try:
-            while True:
-                await asyncio.sleep(0.25)
-                if fall_processor is None:
-                    continue
-                fall_now = bool(fall_processor.state().get("fall_detected", False))
-                if fall_now and not fall_announced:
-                    await agent.simple_response("Fall detected")
-                    fall_announced = True
-                elif not fall_now and fall_announced:
-                    fall_announced = False
-        finally:
-            await agent.finish()
+    session = await sessions.bind(agent.id, call_id)
+    try:
+        await agent.create_user()
+        call = await agent.create_call(call_type, call_id)
+        async with agent.join(call):
+            # Announce falls as soon as the fall processor reports one,
+            # instead of polling its state. Attached before the greeting, and
+            # seeded with the current state, so a fall that is already in
+            # progress is announced too.
+            alerter = None
+            if session is not None and session.event_bus is not None:
+                alerter = FallAlerter(
+                    lambda message: phrase_cache.speak(agent, message),
+                    debounce_seconds=float(os.getenv("FALL_ALERT_DEBOUNCE_SECONDS", DEFAULT_DEBOUNCE_SECONDS)),
+                    hold_seconds=float(os.getenv("FALL_ALERT_HOLD_SECONDS", DEFAULT_HOLD_SECONDS)),
+                )
+                fall_processor = session.processor("fall_detection")
+                alerter.attach(
+                    session.event_bus,
+                    initial=getattr(fall_processor, "fall_state_event", None),
+                )
+                session.fall_alerter = alerter
+            # Fixed phrases are played from the phrase cache: no LLM or TTS round trip.
+            await phrase_cache.speak(agent, MONITORING_ACTIVE)
+            # Keep the LLM up to date with a coalesced digest of the detections
+            # instead of every event; LLM_DIGEST=0 turns it off.
+            digest = None
+            if session is not None and session.event_bus is not None and os.getenv("LLM_DIGEST", "1") != "0":
+                digest = WorldDigest(
+                    lambda prompt: agent.llm.simple_response(text=prompt, processors=agent.processors),
+                    replay=agent.say,
+                    cadence_seconds=float(os.getenv("LLM_DIGEST_CADENCE_SECONDS", DEFAULT_CADENCE_SECONDS)),
+                    min_interval_seconds=float(
+                        os.getenv("LLM_DIGEST_MIN_INTERVAL_SECONDS", DEFAULT_MIN_INTERVAL_SECONDS)
+                    ),
+                    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)),
+                )
+                digest.attach(session.event_bus)
+                session.world_digest = digest
+            try:
+                await agent.finish()
+            finally:
+                if alerter is not None:
+                    await alerter.close()
+                if digest is not None:
+                    await digest.close()
+    finally:
+        if session is not None:
+            await sessions.release(call_id, session)
 
 
 if __name__ == "__main__":
@@ -90,4 +258,6 @@ if __name__ == "__main__":
     )
     runner.fast_api.include_router(video_router)
     runner.fast_api.include_router(audio_router)
+    runner.fast_api.include_router(sessions_router)
+    runner.fast_api.include_router(detections_router)
     runner.cli()
@@ -0,0 +1,182 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from events.event_bus import EventBus
+from events.fall_alerts import FallAlerter
+from events.world_digest import WorldDigest
+from processors.crying_audio_detector import CryingAudioDetector
+from processors.detection_feed import DetectionFeed
+from processors.frame_cache import FrameCache
+from processors.frame_hub import FrameHub
+from processors.motion_gate import MotionGate
+from processors.phrase_audio import PhraseAudioCache
+
+
+logger = logging.getLogger(__name__)
+
+# create_agent is followed by join_call right away; a session staged longer
+# than this was never going to be bound.
+STAGED_TIMEOUT_SECONDS = 60.0
+
+
+@dataclass
+class Session:
+    """
+    Everything one call owns: its publisher, processors and per-call state.
+
+    Process-wide resources (inference scheduler, batch server) are shared and
+    are not released with the session.
+    """
+
+    publisher: Any
+    processors: dict[str, Any]
+    frame_cache: FrameCache
+    frame_hub: FrameHub
+    crying_detector: Optional[CryingAudioDetector] = None
+    motion_gate: Optional[MotionGate] = None
+    detection_feed: Optional[DetectionFeed] = None
+    event_bus: Optional[EventBus] = None
+    # Process-wide, like the inference scheduler; not released with the session.
+    phrase_cache: Optional[PhraseAudioCache] = None
+    # The agent running the processors; set by SessionRegistry.stage.
+    agent: Any = None
+    # Set by join_call once the agent is in the call.
+    fall_alerter: Optional[FallAlerter] = None
+    world_digest: Optional[WorldDigest] = None
+    call_id: Optional[str] = None
+    created_ts: float = field(default_factory=time.time)
+    bound_ts: Optional[float] = None
+    state: dict[str, Any] = field(default_factory=dict)
+
+    def processor(self, name: str) -> Optional[Any]:
+        return self.processors.get(name)
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {
+            "call_id": self.call_id,
+            "created_ts": self.created_ts,
+            "bound_ts": self.bound_ts,
+            "processors": sorted(self.processors),
+            "frame_cache": self.frame_cache.stats(),
+            "frame_hub": self.frame_hub.stats(),
+            "motion_gate": self.motion_gate.stats() if self.motion_gate is not None else None,
+            "detection_feed": self.detection_feed.stats() if self.detection_feed is not None else None,
+            "event_bus": self.event_bus.stats() if self.event_bus is not None else None,
+            "fall_alerts": self.fall_alerter.stats() if self.fall_alerter is not None else None,
+            "llm_digest": self.world_digest.stats() if self.world_digest is not None else None,
+            "phrase_audio": self.phrase_cache.stats() if self.phrase_cache is not None else None,
+        }
+        # The scheduler and worker pool are process-wide, so any processor's reference will do.
+        for processor in self.processors.values():
+            scheduler = getattr(processor, "scheduler", None)
+            if scheduler is not None and "inference" not in stats:
+                stats["inference"] = scheduler.stats()
+            pool = getattr(processor, "inference_pool", None)
+            if pool is not None and "inference_pool" not in stats:
+                stats["inference_pool"] = pool.stats()
+        stats["trackers"] = {
+            name: processor.tracker.stats()
+            for name, processor in self.processors.items()
+            if getattr(processor, "tracker", None) is not None
+        }
+        return stats
+
+    async def close(self) -> None:
+        # The processors are the agent's: Agent.close() closes them when the
+        # call ends. Only a session whose agent never closed (one that never
+        # joined) closes them here, so each is closed exactly once.
+        closing = {} if getattr(self.agent, "closed", False) else dict(self.processors)
+        if self.crying_detector is not None and self.crying_detector not in self.processors.values():
+            closing["crying_detector"] = self.crying_detector
+        for name, processor in closing.items():
+            try:
+                await processor.close()
+            except Exception:
+                logger.exception("Failed to close processor %s for call %s", name, self.call_id)
+        await self.frame_hub.close()
+        self.frame_cache.clear()
+        if self.event_bus is not None:
+            await self.event_bus.close()
+        if self.detection_feed is not None:
+            # Ends every metadata stream still open on this call.
+            self.detection_feed.close()
+
+
+class SessionRegistry:
+    """
+    Sessions keyed by call id.
+
+    ``create_agent`` builds a session before the call id is known, so it is
+    first staged under the agent id and bound to its call in ``join_call``.
+    Staged sessions whose agent was closed without joining (the launcher's
+    warm-up agent) or that were never bound are closed on the next ``stage``.
+    """
+
+    def __init__(self) -> None:
+        self._staged: dict[str, Session] = {}
+        self._sessions: dict[str, Session] = {}
+
+    async def stage(self, agent: Any, session: Session) -> None:
+        await self.discard_orphans()
+        session.agent = agent
+        self._staged[agent.id] = session
+
+    async def bind(self, agent_id: str, call_id: str) -> Optional[Session]:
+        """
+        Register ``agent_id``'s staged session for ``call_id``. A session
+        already registered for the call (a rejoin) is closed and replaced.
+        """
+        session = self._staged.pop(agent_id, None)
+        if session is None:
+            return None
+        session.call_id = call_id
+        session.bound_ts = time.time()
+        previous = self._sessions.get(call_id)
+        self._sessions[call_id] = session
+        if previous is not None and previous is not session:
+            logger.warning("Call %s already had a session; closing it", call_id)
+            await previous.close()
+        return session
+
+    def get(self, call_id: str) -> Optional[Session]:
+        return self._sessions.get(call_id)
+
+    def latest(self) -> Optional[Session]:
+        """Most recently bound session (backs the call-less legacy routes)."""
+        if not self._sessions:
+            return None
+        return max(self._sessions.values(), key=lambda session: session.bound_ts or 0.0)
+
+    def call_ids(self) -> list[str]:
+        return list(self._sessions)
+
+    async def release(self, call_id: str, session: Session) -> None:
+        """Close ``session`` and unregister it, unless it was already replaced by a newer one for the call."""
+        if self._sessions.get(call_id) is not session:
+            return
+        del self._sessions[call_id]
+        await session.close()
+        logger.info("Released session for call %s", call_id)
+
+    async def discard_staged(self, agent_id: str) -> None:
+        session = self._staged.pop(agent_id, None)
+        if session is not None:
+            await session.close()
+
+    async def discard_orphans(self, max_age_seconds: float = STAGED_TIMEOUT_SECONDS) -> int:
+        """Close staged sessions that will never be bound; returns how many."""
+        now = time.time()
+        orphans = [
+            agent_id
+            for agent_id, session in self._staged.items()
+            if getattr(session.agent, "closed", False) or now - session.created_ts > max_age_seconds
+        ]
+        for agent_id in orphans:
+            logger.info("Discarding session staged for agent %s, which never joined a call", agent_id)
+            await self.discard_staged(agent_id)
+        return len(orphans)
+
+
+sessions = SessionRegistry()
@@ -0,0 +1,53 @@
+import numpy as np
+
+from processors.audio_ring import AudioRing
+from processors.crying_audio_detector import CryingAudioDetector
+
+
+def check_ring():
+    ring = AudioRing(8)
+    ring.write(np.arange(6, dtype=np.int16))
+    ring.consume(4)
+    # Wraps around the end of the storage, still read as one view.
+    ring.write(np.arange(6, 12, dtype=np.int16))
+    window = ring.window(8)
+    assert np.array_equal(window, np.arange(4, 12))
+    assert np.shares_memory(window, ring._data)
+
+    # Overflow drops the oldest samples.
+    ring.write(np.array([12, 13], dtype=np.int16), scale=0.5)
+    assert np.array_equal(ring.window(8), [6, 7, 8, 9, 10, 11, 6, 6.5])
+    assert ring.stats()["overrun_samples"] == 2
+
+
+def check_detector_layouts():
+    detector = CryingAudioDetector()
+    rng = np.random.default_rng(0)
+    stereo = rng.integers(-20000, 20000, (1600, 2)).astype(np.int16)
+    expected = stereo.mean(axis=1) / 32768
+
+    # Mono at the model rate takes the direct path.
+    detector._write_packet(stereo[:, 0].copy(), 16000, 1)
+    assert np.allclose(detector._ring.window(1600), stereo[:, 0] / 32768)
+    detector._ring.clear()
+
+    # Interleaved 1-D stereo at the model rate is mixed down, not written as double-length mono.
+    detector._write_packet(stereo.reshape(-1), 16000, 2)
+    assert detector._ring.size == 1600
+    assert np.allclose(detector._ring.window(1600), expected, atol=1e-6)
+    detector._ring.clear()
+
+    # Planar stereo too.
+    detector._write_packet(np.ascontiguousarray(stereo.T), 16000, 2)
+    assert np.allclose(detector._ring.window(1600), expected, atol=1e-6)
+
+
+def test():
+    print("Testing AudioRing and the cry detector's packet layouts...")
+    check_ring()
+    check_detector_layouts()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+from processors.batch_inference import BatchInferenceServer
+from processors.inference_scheduler import InferenceScheduler, JobDropped
+
+
+class FakeModel:
+    """Stands in for a YOLO model: one result per frame, records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, frames):
+        self.batches.append(len(frames))
+        return [frame * 10 for frame in frames]
+
+
+async def check_batching():
+    model = FakeModel()
+    server = BatchInferenceServer(scheduler=InferenceScheduler(max_workers=1), max_batch_size=4, max_wait_ms=50)
+    batcher = server.batcher(("yolo11n.pt", "cpu", 0.5), owner="object_detection")
+    # Same key: every caller shares the batcher (and its batches).
+    assert server.batcher(("yolo11n.pt", "cpu", 0.5), owner="object_detection") is batcher
+
+    results = await asyncio.gather(*(batcher.submit(frame, model) for frame in range(6)))
+    # A full batch flushes at once; the rest goes after the wait.
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert model.batches == [4, 2], model.batches
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["requests"] == 6 and stats["batch_sizes"] == {2: 1, 4: 1}
+
+    # The batcher goes with the last caller that asked for it.
+    await server.release(("yolo11n.pt", "cpu", 0.5))
+    assert server.stats()
+    await server.release(("yolo11n.pt", "cpu", 0.5))
+    assert server.stats() == {}
+    assert server.batcher(("yolo11n.pt", "cpu", 0.5), owner="object_detection") is not batcher
+    await server.close()
+    await server.scheduler.close()
+
+
+async def check_own_models():
+    server = BatchInferenceServer(max_batch_size=2, max_wait_ms=20)
+    batcher = server.batcher("key", owner="object_detection")
+    first, second = FakeModel(), FakeModel()
+    # A batch runs through one of its own callers' models, never an earlier caller's.
+    await batcher.submit(1, first)
+    await asyncio.gather(batcher.submit(2, second), batcher.submit(3, second))
+    assert first.batches == [1] and second.batches == [2]
+    await server.close()
+
+
+async def check_postprocess_errors():
+    model = FakeModel()
+    server = BatchInferenceServer(max_batch_size=4, max_wait_ms=20)
+    batcher = server.batcher("key", owner="fall_detection")
+
+    def fail(result):
+        raise ValueError("bad result")
+
+    ok, bad = await asyncio.gather(
+        batcher.submit(1, model, postprocess=lambda result: result + 1),
+        batcher.submit(2, model, postprocess=fail),
+        return_exceptions=True,
+    )
+    # One caller's failing post-processing doesn't fail the others in the batch.
+    assert ok == 11 and isinstance(bad, ValueError)
+    assert model.batches == [2]
+
+    def broken(frames):
+        return []
+
+    # A model returning the wrong number of results fails every caller.
+    results = await asyncio.gather(
+        *(server.batcher("broken", owner="fall_detection").submit(frame, broken) for frame in range(2)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    await server.close()
+
+
+async def check_streams():
+    scheduler = InferenceScheduler(max_workers=1)
+    release = threading.Event()
+    blocker = asyncio.create_task(scheduler.submit("blocker", release.wait, 5.0))
+    await asyncio.sleep(0.01)
+
+    # Two calls' processors share an owner but not a stream: neither supersedes the other.
+    first = asyncio.create_task(scheduler.submit("object_detection", int, "1", stream="call-a"))
+    second = asyncio.create_task(scheduler.submit("object_detection", int, "2", stream="call-b"))
+    again = asyncio.create_task(scheduler.submit("object_detection", int, "3", stream="call-b"))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["owners"]["object_detection"]["pending"] == 2
+    release.set()
+    results = await asyncio.gather(blocker, first, second, again, return_exceptions=True)
+    assert results[1] == 1 and isinstance(results[2], JobDropped) and results[3] == 3
+    await scheduler.close()
+
+
+def test():
+    print("Testing MicroBatcher batching, error isolation and per-stream scheduling...")
+    asyncio.run(check_batching())
+    asyncio.run(check_own_models())
+    asyncio.run(check_postprocess_errors())
+    asyncio.run(check_streams())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,110 @@
+import asyncio
+from fractions import Fraction
+
+import av
+import cv2
+import numpy as np
+
+from processors.combined_video_publisher import JPEG_QUALITY, MAX_JPEG_RENDITIONS, CombinedVideoPublisher
+
+
+def make_frame(pts):
+    frame = av.VideoFrame.from_ndarray(np.full((180, 320, 3), 90, dtype=np.uint8), format="bgr24")
+    frame.pts = pts
+    frame.time_base = Fraction(1, 30)
+    return frame
+
+
+async def next_jpeg(publisher, subscriber_id, after=0):
+    seq, jpeg = await publisher.jpeg_broadcast_for(subscriber_id).wait_next(after, timeout=5.0)
+    return seq, cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+
+async def check_early_rendition():
+    publisher = CombinedVideoPublisher(object_processor=None, fps=30.0)
+    try:
+        # Keyed before the first frame, wider than the camera turns out to be:
+        # it gets the full-size JPEG without a second encode.
+        wide = publisher.add_jpeg_subscriber(width=640)
+        full = publisher.add_jpeg_subscriber()
+        await publisher._on_frame(make_frame(0))
+        _, image = await next_jpeg(publisher, wide)
+        assert image.shape == (180, 320, 3)
+        await publisher._jpeg_task
+        assert publisher.jpeg_broadcast_for(wide).latest == publisher.jpeg_broadcast_for(full).latest
+        assert publisher.jpeg_stats()["renditions"][f"640@q{JPEG_QUALITY}"]["mean_encode_ms"] == 0.0
+    finally:
+        await publisher.close()
+
+
+async def check_renditions():
+    publisher = CombinedVideoPublisher(object_processor=None, fps=30.0)
+    try:
+        # Before the first frame the output width stands in for the frame's.
+        early = publisher.add_jpeg_subscriber(width=1280)
+        assert publisher.jpeg_broadcast_for(early) is publisher.jpeg_broadcast
+        publisher.remove_jpeg_subscriber(early)
+
+        await publisher._on_frame(make_frame(0))
+
+        # Keying uses the width recorded at commit; no frame slot is pinned.
+        ring, acquired = publisher.frame_ring, []
+        acquire = ring.acquire
+        ring.acquire = lambda *args: acquired.append(args) or acquire(*args)
+
+        # Viewers asking for the same (width, quality) share one rendition;
+        # a width at or above the frame's is the full-size one.
+        full = publisher.add_jpeg_subscriber()
+        also_full = publisher.add_jpeg_subscriber(width=1000)
+        small = publisher.add_jpeg_subscriber(width=160, quality=50)
+        small_too = publisher.add_jpeg_subscriber(width=160, quality=50)
+        assert publisher.jpeg_broadcast_for(full) is publisher.jpeg_broadcast_for(also_full)
+        assert publisher.jpeg_broadcast_for(small) is publisher.jpeg_broadcast_for(small_too)
+        assert set(publisher.jpeg_stats()["renditions"]) == {f"full@q{JPEG_QUALITY}", "160@q50"}
+        assert acquired == []
+
+        # One resize and one encode per rendition per frame, at its own size.
+        await publisher._on_frame(make_frame(1))
+        _, image = await next_jpeg(publisher, full)
+        assert image.shape == (180, 320, 3)
+        _, image = await next_jpeg(publisher, small)
+        assert image.shape == (90, 160, 3)
+        await publisher._jpeg_task
+        renditions = publisher.jpeg_stats()["renditions"]
+        assert renditions["160@q50"]["encodes"] == 1 and renditions["160@q50"]["subscribers"] == 2
+
+        # A rendition is collected when its last viewer leaves; the default stays.
+        publisher.remove_jpeg_subscriber(small)
+        assert "160@q50" in publisher.jpeg_stats()["renditions"]
+        publisher.remove_jpeg_subscriber(small_too)
+        publisher.remove_jpeg_subscriber(full)
+        publisher.remove_jpeg_subscriber(also_full)
+        stats = publisher.jpeg_stats()
+        assert list(stats["renditions"]) == [f"full@q{JPEG_QUALITY}"] and stats["renditions_collected"] == 1
+
+        # There is a limit on distinct renditions.
+        ids = [publisher.add_jpeg_subscriber(width=100 + index) for index in range(MAX_JPEG_RENDITIONS - 1)]
+        try:
+            publisher.add_jpeg_subscriber(width=50)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("rendition limit not enforced")
+        # ...but joining an existing one is always fine.
+        ids.append(publisher.add_jpeg_subscriber(width=100))
+        for subscriber_id in ids:
+            publisher.remove_jpeg_subscriber(subscriber_id)
+        assert len(publisher.jpeg_stats()["renditions"]) == 1
+    finally:
+        await publisher.close()
+
+
+def test():
+    print("Testing CombinedVideoPublisher JPEG renditions...")
+    asyncio.run(check_renditions())
+    asyncio.run(check_early_rendition())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
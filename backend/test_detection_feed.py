@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from processors.detection_feed import SECTION_CRY, SECTION_OBJECTS, DetectionFeed
+
+
+async def check_feed():
+    feed = DetectionFeed()
+
+    # Nothing published yet: times out.
+    assert await feed.wait_delta(0, timeout=0.02) is None
+
+    # A waiting client wakes on the next change.
+    waiter = asyncio.create_task(feed.wait_delta(0))
+    await asyncio.sleep(0)
+    feed.publish(SECTION_OBJECTS, {"detections": []}, pts=0.5)
+    assert await waiter == (1, {SECTION_OBJECTS: {"pts": 0.5, "data": {"detections": []}}})
+
+    # The same data again is not news.
+    assert not feed.publish(SECTION_OBJECTS, {"detections": []}, pts=0.6)
+    assert await feed.wait_delta(1, timeout=0.02) is None
+
+    # A client that fell behind gets the newest value of each changed section only.
+    for score in (0.1, 0.2, 0.3):
+        feed.publish(SECTION_CRY, {"score": score})
+    seq, sections = await feed.wait_delta(1)
+    assert seq == 4 and sections == {SECTION_CRY: {"pts": None, "data": {"score": 0.3}}}
+
+    # Published from another thread (like the cry detector's worker).
+    waiter = asyncio.create_task(feed.wait_delta(4, timeout=2.0))
+    await asyncio.sleep(0)
+    thread = threading.Thread(target=feed.publish, args=(SECTION_CRY, {"score": 0.9}))
+    thread.start()
+    assert await waiter == (5, {SECTION_CRY: {"pts": None, "data": {"score": 0.9}}})
+    thread.join()
+
+    # Closing wakes every waiting client with None.
+    waiters = [asyncio.create_task(feed.wait_delta(5)) for _ in range(3)]
+    await asyncio.sleep(0)
+    feed.close()
+    assert await asyncio.wait_for(asyncio.gather(*waiters), 1.0) == [None, None, None]
+    assert await feed.wait_delta(0) is None
+
+
+def test():
+    print("Testing DetectionFeed wait_delta...")
+    asyncio.run(check_feed())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,136 @@
+import pickle
+
+import numpy as np
+
+from processors.detections import NO_ID, Detection, DetectionBatch, as_batch
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class FakeResult:
+    """The parts of an ``ultralytics`` Results a batch is built from."""
+
+    def __init__(self, data, names, keypoints=None):
+        self.boxes = FakeBoxes(data)
+        self.names = names
+        self.keypoints = None if keypoints is None else FakeBoxes(keypoints)
+
+
+def check_from_ultralytics():
+    result = FakeResult(
+        [[10, 20, 50, 80, 0.75, 0], [100, 100, 140, 160, 0.5, 2]],
+        {0: "person", 1: "bicycle", 2: "car"},
+        keypoints=np.ones((2, 17, 3)),
+    )
+    batch = DetectionBatch.from_ultralytics(result)
+    assert len(batch) == 2 and batch.labels.tolist() == ["person", "car"]
+    assert batch.keys() == ("label", "confidence", "bbox", "class_id", "keypoints")
+    first = batch.to_dicts()[0]
+    assert first["label"] == "person" and first["confidence"] == 0.75 and first["bbox"] == (10, 20, 50, 80)
+    assert first["class_id"] == 0 and len(first["keypoints"]) == 17
+    # The dict form is built once per batch.
+    assert batch.to_dicts() is batch.to_dicts()
+
+    empty = DetectionBatch.from_ultralytics(FakeResult(np.empty((0, 6)), {0: "person"}))
+    assert len(empty) == 0 and not empty and empty.to_dicts() == []
+
+
+def check_dicts_round_trip():
+    dicts = [
+        {"label": "cup", "confidence": 0.5, "bbox": (1, 2, 3, 4), "track_id": 7, "is_falling": False},
+        {"label": "dog", "bbox": (5, 6, 7, 8), "track_id": None, "is_falling": True},
+        {"label": "no box"},
+    ]
+    batch = DetectionBatch.from_dicts(dicts)
+    # Entries without a bbox are dropped, a missing confidence counts as 1.0.
+    assert len(batch) == 2
+    assert batch.column("track_id").tolist() == [7, NO_ID]
+    assert batch.column("is_falling").dtype == bool
+    assert batch.to_dicts() == [
+        {"label": "cup", "confidence": 0.5, "bbox": (1, 2, 3, 4), "is_falling": False, "track_id": 7},
+        {"label": "dog", "confidence": 1.0, "bbox": (5, 6, 7, 8), "is_falling": True, "track_id": None},
+    ]
+    assert as_batch(batch) is batch and len(as_batch(None)) == 0
+
+    # Confidences parsed from JSON read back exactly; model outputs stay float32.
+    roboflow = DetectionBatch.from_dicts([{"label": "toddler", "confidence": 0.9, "bbox": (0, 0, 5, 5)}])
+    assert roboflow.to_dicts()[0]["confidence"] == 0.9 and roboflow[0].confidence == 0.9
+    model = DetectionBatch(np.zeros((1, 4)), np.array([0.9], dtype=np.float32), np.array([0]))
+    assert model.scores.dtype == np.float32
+
+
+def check_views():
+    batch = DetectionBatch.from_dicts(
+        [{"label": "cup", "confidence": 0.5, "bbox": (1, 2, 3, 4), "track_id": None}]
+    )
+    det = batch[0]
+    assert isinstance(det, Detection) and batch[-1].index == 0
+    # Views read like the old dicts.
+    assert det["bbox"] == (1, 2, 3, 4) and det.get("label") == "cup"
+    assert det["track_id"] is None and det.get("missing", "x") == "x"
+    assert dict(det) == det.to_dict() == batch.to_dicts()[0]
+    try:
+        batch[1]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("out-of-range index accepted")
+
+
+def check_derived_batches():
+    names = {0: "person", 1: "cup"}
+    a = DetectionBatch(
+        np.array([[0, 0, 10, 10], [20, 20, 30, 30]]), np.array([0.9, 0.4]), np.array([0, 1]), names,
+        columns={"track_id": np.array([1, 2])},
+    )
+    b = DetectionBatch(np.array([[5, 5, 6, 6]]), np.array([0.8]), np.array([1]), names)
+
+    picked = a.select(a.scores > 0.5)
+    assert picked.labels.tolist() == ["person"] and picked.column("track_id").tolist() == [1]
+    # Derived batches leave the original alone.
+    falling = a.with_column("is_falling", np.array([True, False]))
+    assert "is_falling" in falling.keys() and "is_falling" not in a.keys()
+    try:
+        a.with_column("is_falling", [True])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("column of the wrong length accepted")
+    moved = a.with_boxes(np.array([[1, 1, 2, 2], [3, 3, 4, 4]]))
+    assert moved[1]["bbox"] == (3, 3, 4, 4) and a[1]["bbox"] == (20, 20, 30, 30)
+    assert a.with_labels("thing").labels.tolist() == ["thing", "thing"]
+
+    # Concatenation keeps only the columns every batch has.
+    both = DetectionBatch.concat([a, b])
+    assert len(both) == 3 and both.labels.tolist() == ["person", "cup", "cup"]
+    assert "track_id" not in both.keys()
+    assert DetectionBatch.concat([a]) is a and len(DetectionBatch.concat([])) == 0
+
+
+def check_pickle():
+    batch = DetectionBatch.from_dicts([{"label": "cup", "confidence": 0.5, "bbox": (1, 2, 3, 4), "track_id": 3}])
+    batch.to_dicts()
+    # Batches cross the inference-pool pipe; the dict cache stays behind.
+    copy = pickle.loads(pickle.dumps(batch))
+    assert copy._dicts is None
+    assert copy.to_dicts() == batch.to_dicts()
+
+
+def test():
+    print("Testing DetectionBatch construction, views and dict conversion...")
+    check_from_ultralytics()
+    check_dicts_round_trip()
+    check_views()
+    check_derived_batches()
+    check_pickle()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
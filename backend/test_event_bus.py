@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+
+from events.event_bus import BLOCK, COALESCE, DROP_OLDEST, EventBus
+
+
+@dataclass
+class Reading:
+    sensor: str
+    value: int
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.events = []
+
+    async def __call__(self, event):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.events.append(event)
+
+
+async def settle(bus, *recorders, count=None, timeout=2.0):
+    """Wait until every recorder's queue is drained (and, given ``count``, that many were delivered)."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        depths = [subscriber["depth"] for subscriber in bus.stats()["subscribers"].values()]
+        if not any(depths) and (count is None or all(len(r.events) >= count for r in recorders)):
+            await asyncio.sleep(0.05)
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"bus did not settle: {bus.stats()}")
+
+
+async def check_drop_oldest():
+    bus = EventBus()
+    slow = Recorder(delay=0.05)
+    bus.subscribe("slow", slow, policy=DROP_OLDEST, maxsize=2)
+    for value in range(10):
+        await bus.publish(Reading("a", value))
+    await settle(bus, slow)
+    # Published faster than handled: only the newest two were kept.
+    assert [event.value for event in slow.events] == [8, 9], slow.events
+    assert bus.stats()["subscribers"]["slow"]["dropped"] == 8
+    await bus.close()
+
+
+async def check_coalesce():
+    bus = EventBus()
+    slow = Recorder(delay=0.05)
+    bus.subscribe("slow", slow, policy=COALESCE, maxsize=8, coalesce_key=lambda event: event.sensor)
+    await bus.publish(Reading("a", 0))
+    await asyncio.sleep(0)
+    for value in range(1, 20):
+        await bus.publish(Reading("a", value))
+        await bus.publish(Reading("b", value))
+    await settle(bus, slow)
+    # One event per key while the handler was busy, each the newest for its key.
+    assert [(event.sensor, event.value) for event in slow.events] == [("a", 0), ("a", 19), ("b", 19)], slow.events
+    assert bus.stats()["subscribers"]["slow"]["coalesced"] == 36
+    await bus.close()
+
+
+async def check_block():
+    bus = EventBus()
+    slow = Recorder(delay=0.01)
+    fast = Recorder()
+    bus.subscribe("slow", slow, policy=BLOCK, maxsize=2)
+    bus.subscribe("fast", fast, event_types=(Reading,), policy=DROP_OLDEST)
+    for value in range(20):
+        await bus.publish(Reading("a", value))
+    await settle(bus, slow, fast, count=20)
+    # Every event, in order: the publisher waited for room instead.
+    assert [event.value for event in slow.events] == list(range(20))
+    assert [event.value for event in fast.events] == list(range(20))
+    stats = bus.stats()["subscribers"]["slow"]
+    assert stats["blocked"] > 0 and stats["dropped"] == 0
+    await bus.close()
+
+
+async def check_threadsafe():
+    bus = EventBus()
+    received = Recorder()
+    bus.subscribe("received", received)
+    thread = threading.Thread(target=lambda: [bus.publish_threadsafe(Reading("t", value)) for value in range(5)])
+    thread.start()
+    thread.join()
+    await settle(bus, received, count=5)
+    assert [event.value for event in received.events] == list(range(5))
+    assert bus.stats()["published"] == 5
+    await bus.close()
+
+
+async def check_filters_and_errors():
+    bus = EventBus()
+    strings = Recorder()
+
+    def fail(event):
+        raise RuntimeError("subscriber bug")
+
+    bus.subscribe("strings", strings, event_types=(str,))
+    bus.subscribe("failing", fail)
+    await bus.publish(Reading("a", 1))
+    await bus.publish("hello")
+    await settle(bus, strings, count=1)
+    # Only the matching type reaches a filtered subscriber; a failing handler doesn't stop the bus.
+    assert strings.events == ["hello"]
+    assert bus.stats()["subscribers"]["failing"]["errors"] == 2
+    await bus.close()
+    assert bus.subscribers() == []
+
+
+def test():
+    print("Testing EventBus overflow policies and thread hand-off...")
+    asyncio.run(check_drop_oldest())
+    asyncio.run(check_coalesce())
+    asyncio.run(check_block())
+    asyncio.run(check_threadsafe())
+    asyncio.run(check_filters_and_errors())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from events.detection_events import FallStateChangedEvent
+from events.event_bus import EventBus
+from events.fall_alerts import FallAlerter
+
+DEBOUNCE = 0.05
+HOLD = 0.2
+
+
+class Speaker:
+    def __init__(self):
+        self.spoken = []
+
+    async def say(self, text):
+        self.spoken.append(text)
+
+
+def fall(present):
+    return FallStateChangedEvent(fall_present=present, confidence=0.8, detected_at=time.monotonic())
+
+
+async def check_debounce_and_hold():
+    speaker = Speaker()
+    alerter = FallAlerter(speaker.say, debounce_seconds=DEBOUNCE, hold_seconds=HOLD)
+
+    # A fall shorter than the debounce time is not announced.
+    alerter.on_event(fall(True))
+    await asyncio.sleep(DEBOUNCE / 5)
+    alerter.on_event(fall(False))
+    await asyncio.sleep(DEBOUNCE * 2)
+    assert speaker.spoken == [] and alerter.debounced == 1
+
+    # One that lasts is announced once, after the debounce time.
+    alerter.on_event(fall(True))
+    await asyncio.sleep(DEBOUNCE / 5)
+    assert speaker.spoken == []
+    await asyncio.sleep(DEBOUNCE * 2)
+    assert speaker.spoken == ["Fall detected"]
+
+    # Flickering within the hold time is the same fall.
+    for _ in range(3):
+        alerter.on_event(fall(False))
+        await asyncio.sleep(HOLD / 4)
+        alerter.on_event(fall(True))
+        await asyncio.sleep(DEBOUNCE * 2)
+    assert speaker.spoken == ["Fall detected"] and alerter.held == 3
+
+    # Gone for longer than the hold time: the next fall is announced again.
+    alerter.on_event(fall(False))
+    await asyncio.sleep(HOLD * 1.5)
+    assert not alerter.announced
+    alerter.on_event(fall(True))
+    await asyncio.sleep(DEBOUNCE * 2)
+    assert speaker.spoken == ["Fall detected", "Fall detected"], speaker.spoken
+    assert alerter.stats()["alerts"] == 2
+    await alerter.close()
+
+
+async def check_bus():
+    speaker = Speaker()
+    bus = EventBus()
+    alerter = FallAlerter(speaker.say, hold_seconds=HOLD)
+    alerter.attach(bus)
+    # No debounce: announced on the first transition.
+    await bus.publish(fall(True))
+    await asyncio.sleep(0.02)
+    assert speaker.spoken == ["Fall detected"]
+    await alerter.close()
+
+    # Attached while a fall is already in progress (no transition coming).
+    speaker = Speaker()
+    alerter = FallAlerter(speaker.say, hold_seconds=HOLD)
+    alerter.attach(bus, initial=fall(True))
+    await asyncio.sleep(0.02)
+    assert speaker.spoken == ["Fall detected"]
+    await alerter.close()
+    await bus.close()
+
+
+def test():
+    print("Testing FallAlerter debounce, hold and re-arm...")
+    asyncio.run(check_debounce_and_hold())
+    asyncio.run(check_bus())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
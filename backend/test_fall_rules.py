@@ -0,0 +1,106 @@
+import pickle
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from processors.fall_detection import parse_pose_result
+from processors.fall_rules import (
+    AspectRatioRule,
+    HeadBelowHipsRule,
+    TorsoAngleRule,
+    default_fall_rules,
+    evaluate_fall_rules,
+)
+
+
+def parse_per_person(result, fall_ratio_threshold):
+    """The per-person parser the vectorized rules replaced (aspect ratio + head below hips)."""
+    detections = []
+    for box, keypoints in zip(result.boxes, result.keypoints):
+        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+        kpts = keypoints.data[0].tolist()
+        is_falling = max(1, x2 - x1) / max(1, y2 - y1) > fall_ratio_threshold
+        nose_y, l_hip_y, r_hip_y = kpts[0][1], kpts[11][1], kpts[12][1]
+        if nose_y > 0 and l_hip_y > 0 and r_hip_y > 0 and nose_y > (l_hip_y + r_hip_y) / 2:
+            is_falling = True
+        detections.append({"bbox": (x1, y1, x2, y2), "is_falling": is_falling})
+    return detections
+
+
+def synthetic_result(rng, people):
+    """A pose Results with ``people`` random upright or lying skeletons."""
+    boxes, keypoints = [], []
+    for _ in range(people):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 400)
+        w, h = rng.uniform(60, 200), rng.uniform(150, 300)
+        if rng.random() < 0.3:
+            w, h = h, w
+        keypoints.append(np.column_stack([
+            rng.uniform(x, x + w, 17),
+            rng.uniform(y, y + h, 17),
+            rng.uniform(0.0, 1.0, 17),
+        ]))
+        boxes.append([x, y, x + w, y + h, rng.uniform(0.5, 1.0), 0])
+    return Results(
+        np.zeros((720, 1280, 3), dtype=np.uint8),
+        path="synthetic",
+        names={0: "person"},
+        boxes=torch.tensor(np.array(boxes).reshape(-1, 6), dtype=torch.float32),
+        keypoints=torch.tensor(np.array(keypoints).reshape(-1, 17, 3), dtype=torch.float32),
+    )
+
+
+def skeleton(shoulders, hips, nose, confidence=0.9):
+    points = np.zeros((17, 3), dtype=np.float32)
+    points[0] = (*nose, confidence)
+    points[5], points[6] = (shoulders[0] - 10, shoulders[1], confidence), (shoulders[0] + 10, shoulders[1], confidence)
+    points[11], points[12] = (hips[0] - 10, hips[1], confidence), (hips[0] + 10, hips[1], confidence)
+    return points
+
+
+def check_parity():
+    # Without confidence masking, the old two rules flag exactly the people
+    # the per-person parser did.
+    old_rules = (AspectRatioRule(1.2), HeadBelowHipsRule(min_confidence=0.0))
+    for seed in range(10):
+        rng = np.random.default_rng(seed)
+        for people in (1, 5, 20):
+            result = synthetic_result(rng, people)
+            old = parse_per_person(result, 1.2)
+            new = parse_pose_result(result, rules=old_rules)
+            assert [det["bbox"] for det in old] == [det["bbox"] for det in new]
+            assert [det["is_falling"] for det in old] == new.column("is_falling").tolist(), seed
+
+
+def check_rules():
+    boxes = np.array([[0, 0, 40, 100]] * 4, dtype=np.float32)
+    keypoints = np.stack([
+        skeleton(shoulders=(20, 20), hips=(20, 60), nose=(20, 10)),  # standing
+        skeleton(shoulders=(20, 50), hips=(60, 55), nose=(10, 50)),  # lying on its side
+        skeleton(shoulders=(20, 60), hips=(20, 20), nose=(20, 80)),  # upside down
+        skeleton(shoulders=(20, 50), hips=(60, 55), nose=(10, 50), confidence=0.2),  # unsure
+    ])
+    assert TorsoAngleRule()(boxes, keypoints).tolist() == [False, True, False, False]
+    assert HeadBelowHipsRule()(boxes, keypoints).tolist() == [False, False, True, False]
+    assert evaluate_fall_rules(boxes, keypoints, default_fall_rules()).tolist() == [False, True, True, False]
+
+    # Wide boxes fall by aspect ratio alone, with or without keypoints.
+    wide = np.array([[0, 0, 100, 40], [0, 0, 40, 100]], dtype=np.float32)
+    assert evaluate_fall_rules(wide, None, default_fall_rules()).tolist() == [True, False]
+    assert evaluate_fall_rules(wide, None, default_fall_rules(fall_ratio_threshold=3.0)).tolist() == [False, False]
+    assert evaluate_fall_rules(np.empty((0, 4)), None, default_fall_rules()).shape == (0,)
+
+    # Process-mode workers get the same rules.
+    assert pickle.loads(pickle.dumps(default_fall_rules())) == default_fall_rules()
+
+
+def test():
+    print("Testing vectorized fall rules against the per-person parser...")
+    check_parity()
+    check_rules()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
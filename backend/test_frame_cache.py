@@ -0,0 +1,62 @@
+import time
+
+import av
+import numpy as np
+
+from processors.frame_cache import FrameCache
+
+
+def make_frame(pts, value=0):
+    image = np.full((48, 64, 3), value, dtype=np.uint8)
+    frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+    frame.pts = pts
+    return frame
+
+
+def check_decode_once():
+    cache = FrameCache()
+    frame = make_frame(1, value=100)
+    first = cache.bgr(frame)
+    # A second processor asking for the same pts gets the same array, not a new decode.
+    assert cache.bgr(make_frame(1, value=100)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.shape == (48, 64, 3)
+    assert not first.flags.writeable
+    assert cache.bgr(make_frame(2)) is not first
+    assert cache.misses == 2
+
+
+def check_variants():
+    decoded = FrameCache().get(make_frame(1, value=100))
+    gray = decoded.gray()
+    assert gray.shape == (48, 64) and decoded.gray() is gray
+    small = decoded.downscaled(32)
+    assert small.shape == (24, 32, 3) and decoded.downscaled(32) is small
+    assert decoded.downscaled(32, gray=True).shape == (24, 32)
+    # Never upscaled.
+    assert decoded.downscaled(640) is decoded.bgr
+
+
+def check_eviction():
+    cache = FrameCache(max_entries=2)
+    for pts in range(4):
+        cache.get(make_frame(pts))
+    assert cache.stats()["entries"] == 2 and cache.evictions == 2
+
+    cache = FrameCache(max_age_seconds=0.05)
+    cache.get(make_frame(1))
+    time.sleep(0.1)
+    cache.get(make_frame(2))
+    assert cache.stats()["entries"] == 1 and cache.evictions == 1
+
+
+def test():
+    print("Testing FrameCache decode-once sharing and eviction...")
+    check_decode_once()
+    check_variants()
+    check_eviction()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,115 @@
+import asyncio
+
+import av
+import numpy as np
+
+from processors.frame_hub import DROP_OLDEST, LATEST_WINS, FrameHub
+
+
+class QueueTrack:
+    """A camera track fed by the test: ``recv`` returns whatever was pushed."""
+
+    kind = "video"
+    readyState = "live"
+
+    def __init__(self):
+        self.frames = asyncio.Queue()
+        self.reads = 0
+
+    async def recv(self):
+        frame = await self.frames.get()
+        self.reads += 1
+        return frame
+
+    def push(self, pts):
+        frame = av.VideoFrame.from_ndarray(np.zeros((16, 16, 3), dtype=np.uint8), format="bgr24")
+        frame.pts = pts
+        self.frames.put_nowait(frame)
+
+
+class Consumer:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.pts = []
+
+    async def __call__(self, frame):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.pts.append(frame.pts)
+
+
+async def wait_for(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def check_fan_out():
+    hub = FrameHub()
+    track = QueueTrack()
+    fast, latest_gate, queued_gate = Consumer(), asyncio.Event(), asyncio.Event()
+    latest, queued = Consumer(latest_gate), Consumer(queued_gate)
+    await hub.subscribe(track, fast, fps=100, name="fast")
+    await hub.subscribe(track, latest, fps=100, name="latest", policy=LATEST_WINS)
+    await hub.subscribe(track, queued, fps=100, name="queued", policy=DROP_OLDEST, queue_size=2)
+
+    # One forwarder reads the track for every consumer.
+    stats = hub.stats()
+    assert len(stats["sources"]) == 1
+    assert stats["sources"][0]["consumers"] == ["fast", "latest", "queued"]
+
+    for pts in range(6):
+        track.push(pts)
+        await wait_for(lambda: len(fast.pts) == pts + 1)
+        # Space the frames out past the 100 fps limit.
+        await asyncio.sleep(0.015)
+    # The blocked consumers don't hold up the fast one.
+    assert fast.pts == list(range(6))
+    assert track.reads == 6
+
+    latest_gate.set()
+    queued_gate.set()
+    await wait_for(lambda: latest.pts and latest.pts[-1] == 5 and queued.pts and queued.pts[-1] == 5)
+    # Each got the frame it was blocked on, then: the newest only / the newest two.
+    assert latest.pts == [0, 5], latest.pts
+    assert queued.pts == [0, 4, 5], queued.pts
+    stats = hub.stats()["consumers"]
+    assert stats["latest"]["dropped"] == 4 and stats["queued"]["dropped"] == 3
+
+    # The source goes away with its last consumer.
+    await hub.unsubscribe("fast")
+    assert len(hub.stats()["sources"]) == 1
+    await hub.close()
+    assert hub.stats() == {"sources": [], "consumers": {}}
+
+
+async def check_resubscribe_and_rate():
+    hub = FrameHub()
+    track = QueueTrack()
+    first, second = Consumer(), Consumer()
+    await hub.subscribe(track, first, fps=1, name="processor")
+    # Same name (a track switch): replaces the previous subscription.
+    await hub.subscribe(track, second, fps=1, name="processor")
+    assert hub.subscribers() == ["processor"]
+
+    track.push(0)
+    await wait_for(lambda: second.pts == [0])
+    # Within a second of the last accepted frame: not delivered at 1 fps.
+    track.push(1)
+    await wait_for(lambda: track.reads == 2)
+    await asyncio.sleep(0.05)
+    assert first.pts == [] and second.pts == [0]
+    await hub.close()
+
+
+def test():
+    print("Testing FrameHub fan-out, queue policies and rate limits...")
+    asyncio.run(check_fan_out())
+    asyncio.run(check_resubscribe_and_rate())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,93 @@
+import multiprocessing
+
+import numpy as np
+
+from processors.frame_ring import RingOverrun, SharedFrameRing
+
+
+def frame(value, shape=(4, 6, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def read_in_child(ring, results):
+    with ring.acquire() as ref:
+        results.put((ref.seq, int(ref.array.sum()), ref.array.shape))
+    ring.close()
+
+
+def check_pinning():
+    ring = SharedFrameRing(slots=3, slot_bytes=4 * 6 * 3)
+    assert ring.acquire() is None and ring.latest_seq() == -1
+    assert ring.write(frame(1), pts=0.1) == 0
+
+    pinned = ring.acquire()
+    assert pinned.seq == 0 and pinned.pts == 0.1 and int(pinned.array[0, 0, 0]) == 1
+    assert not pinned.array.flags.writeable
+    # The writer keeps going without ever touching the pinned slot.
+    for value in range(2, 12):
+        ring.write(frame(value))
+    assert int(pinned.array.max()) == 1 and pinned.seq == 0
+    assert ring.latest_seq() == 10
+
+    # Pin another one: the last free slot takes one more frame, and then, with
+    # the latest frame kept readable, there is nowhere left to write.
+    second = ring.acquire()
+    assert second.seq == 10
+    assert ring.write(frame(99)) == 11
+    try:
+        ring.write(frame(100))
+    except RingOverrun:
+        pass
+    else:
+        raise AssertionError("wrote over a pinned slot")
+    assert ring.stats()["overruns"] == 1 and ring.stats()["pinned"] == 2
+
+    # Releasing (twice is fine) frees the slot again.
+    pinned.release()
+    pinned.release()
+    assert ring.write(frame(12)) == 12
+    # An older frame can still be fetched by sequence number while it's in the ring.
+    with ring.acquire(10) as ref:
+        assert int(ref.array.max()) == 11
+    assert ring.acquire(3) is None
+    second.release()
+
+    # Frames of any shape that fit are written in place; bigger ones are refused.
+    slot, view = ring.reserve((2, 3))
+    view[...] = 7
+    seq = ring.commit(slot)
+    with ring.acquire(seq) as ref:
+        assert ref.array.shape == (2, 3) and int(ref.array.sum()) == 42
+    try:
+        ring.reserve((10, 10, 3))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("oversized frame accepted")
+    ring.close()
+
+
+def check_cross_process():
+    ring = SharedFrameRing(slots=2, slot_bytes=4 * 6 * 3, process_shared=True)
+    ring.write(frame(5), pts=1.0)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    child = context.Process(target=read_in_child, args=(ring, results))
+    child.start()
+    # The child reads the frame straight out of the shared segment.
+    assert results.get(timeout=30) == (0, 5 * 4 * 6 * 3, (4, 6, 3))
+    child.join(timeout=30)
+    assert child.exitcode == 0
+    assert ring.stats()["pinned"] == 0
+    ring.close()
+
+
+def test():
+    print("Testing SharedFrameRing pinning, overruns and cross-process reads...")
+    check_pinning()
+    check_cross_process()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
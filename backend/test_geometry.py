@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+from processors.base import (
+    bbox_center,
+    bbox_overlap_ratio,
+    calculate_distance,
+    center_distance_matrix,
+    iou_matrix,
+    is_inside_zone,
+    points_in_polygons,
+)
+
+
+# Reference answers, computed one pair at a time the way the scalar helpers used to.
+
+def iou_pair(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    intersection = (x2 - x1) * (y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def distance_pair(a, b):
+    c1 = ((a[0] + a[2]) // 2, (a[1] + a[3]) // 2)
+    c2 = ((b[0] + b[2]) // 2, (b[1] + b[3]) // 2)
+    return float(np.sqrt((c1[0] - c2[0]) ** 2 + (c1[1] - c2[1]) ** 2))
+
+
+def inside_pair(point, polygon):
+    pts = np.array(polygon, dtype=np.float32)
+    return cv2.pointPolygonTest(pts, (float(point[0]), float(point[1])), False) >= 0
+
+
+def random_boxes(rng, n):
+    xy = rng.integers(0, 1200, size=(n, 2))
+    wh = rng.integers(1, 300, size=(n, 2))
+    return [tuple(int(v) for v in (x, y, x + w, y + h)) for (x, y), (w, h) in zip(xy, wh)]
+
+
+def random_polygons(rng, k):
+    polygons = []
+    for _ in range(k):
+        center = rng.integers(200, 1000, size=2)
+        vertices = int(rng.integers(3, 10))
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radii = rng.uniform(80, 300, vertices)
+        polygons.append([(int(center[0] + r * np.cos(t)), int(center[1] + r * np.sin(t))) for r, t in zip(radii, angles)])
+    return polygons
+
+
+def check_parity():
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        boxes = random_boxes(rng, 25)
+        others = random_boxes(rng, 7)
+        polygons = random_polygons(rng, 5)
+        # Box centers, random points and every vertex (the on-edge rule).
+        points = (
+            [bbox_center(box) for box in boxes]
+            + [tuple(int(v) for v in point) for point in rng.integers(0, 1300, size=(50, 2))]
+            + [vertex for polygon in polygons for vertex in polygon]
+        )
+
+        iou = iou_matrix(boxes, others)
+        assert iou.shape == (25, 7)
+        assert np.allclose(iou, [[iou_pair(a, b) for b in others] for a in boxes])
+        assert np.allclose(center_distance_matrix(boxes, others), [[distance_pair(a, b) for b in others] for a in boxes])
+        inside = points_in_polygons(points, polygons)
+        assert np.array_equal(inside, [[inside_pair(p, z) for z in polygons] for p in points]), seed
+
+        # The scalar helpers are the same computation.
+        assert bbox_overlap_ratio(boxes[0], others[0]) == iou[0, 0]
+        assert calculate_distance(boxes[1], others[2]) == distance_pair(boxes[1], others[2])
+        assert is_inside_zone(points[0], polygons[0]) == bool(inside[0, 0])
+
+
+def check_edge_cases():
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    # A concave "U": the notch is outside.
+    u_shape = [(0, 0), (30, 0), (30, 30), (20, 30), (20, 10), (10, 10), (10, 30), (0, 30)]
+    inside = points_in_polygons([(5, 5), (10, 5), (10, 10), (11, 5), (15, 20), (5, 20)], [square, u_shape])
+    assert inside.tolist() == [
+        [True, True],
+        [True, True],
+        [True, True],
+        [False, True],
+        [False, False],
+        [False, True],
+    ]
+    # Empty inputs give empty (or all-False) results of the right shape.
+    assert iou_matrix([], [(0, 0, 1, 1)]).shape == (0, 1)
+    assert points_in_polygons([], [square]).shape == (0, 1)
+    assert points_in_polygons([(5, 5)], [[], square]).tolist() == [[False, True]]
+    # Zero-area boxes don't divide by zero.
+    assert bbox_overlap_ratio((5, 5, 5, 5), (5, 5, 5, 5)) == 0.0
+    assert bbox_center((1, 1, 4, 4)) == (2, 2)
+
+
+def test():
+    print("Testing vectorized IoU, distance and point-in-zone against the scalar versions...")
+    check_parity()
+    check_edge_cases()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
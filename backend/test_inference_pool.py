@@ -0,0 +1,76 @@
+import numpy as np
+
+from processors.inference_pool import InferenceWorkerPool, WorkerCrashed
+
+
+# Built from the bundled config (random weights), so no download is needed.
+MODEL = "yolo11n.yaml"
+
+
+class KillAfterSend:
+    """Wraps a worker's pipe so the worker dies right after taking a job."""
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.conn = worker.conn
+
+    def send(self, request):
+        self.conn.send(request)
+        self.worker.process.kill()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def check_pool():
+    pool = InferenceWorkerPool(workers=1, timeout_seconds=30.0)
+    frame = np.zeros((96, 128, 3), dtype=np.uint8)
+    try:
+        # Frames go through shared memory; parsed detections come back.
+        assert pool.infer("object_detection", MODEL, frame, predict_kwargs={"conf": 0.5}).to_dicts() == []
+        stats = pool.stats()["per_worker"][0]
+        assert stats["alive"] and stats["jobs"] == 1 and stats["restarts"] == 0
+
+        # Larger frames grow the worker's segment.
+        pool.infer("object_detection", MODEL, np.zeros((720, 1280, 3), dtype=np.uint8))
+        assert pool.stats()["per_worker"][0]["segment_bytes"] >= 720 * 1280 * 3
+
+        # A worker that died while idle is restarted before the next job.
+        pid = stats["pid"]
+        pool._workers[0].process.kill()
+        pool._workers[0].process.join()
+        assert len(pool.infer("object_detection", MODEL, frame)) == 0
+        stats = pool.stats()["per_worker"][0]
+        assert stats["restarts"] == 1 and stats["pid"] != pid
+
+        # A worker that dies mid-job fails only that job and comes back for the next one.
+        pool._workers[0].conn = KillAfterSend(pool._workers[0])
+        try:
+            pool.infer("object_detection", MODEL, frame)
+        except WorkerCrashed:
+            pass
+        else:
+            raise AssertionError("the killed worker's job did not fail")
+        assert len(pool.infer("object_detection", MODEL, frame)) == 0
+        stats = pool.stats()["per_worker"][0]
+        assert stats["restarts"] == 2 and stats["errors"] == 1 and stats["alive"]
+
+        try:
+            pool.infer("unknown", MODEL, frame)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("unknown task accepted")
+    finally:
+        pool.close()
+    assert not pool.stats()["per_worker"][0]["alive"]
+
+
+def test():
+    print("Testing InferenceWorkerPool jobs and worker restarts...")
+    check_pool()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+from processors.inference_scheduler import (
+    DROP_BUDGET,
+    DROP_DEADLINE,
+    DROP_SHUTDOWN,
+    DROP_SUPERSEDED,
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+    InferenceScheduler,
+    JobDropped,
+)
+
+
+async def dropped(job):
+    try:
+        await job
+    except JobDropped as exc:
+        return exc.reason
+    raise AssertionError("job was not dropped")
+
+
+async def occupy(scheduler, owner="blocker"):
+    """Hold the only worker until the returned event is set."""
+    release = threading.Event()
+    job = asyncio.create_task(scheduler.submit(owner, release.wait, 5.0))
+    await asyncio.sleep(0.01)
+    return release, job
+
+
+async def check_priority_and_supersede():
+    scheduler = InferenceScheduler(max_workers=1)
+    scheduler.register("objects", priority=PRIORITY_LOW)
+    scheduler.register("fall", priority=PRIORITY_CRITICAL)
+    release, blocker = await occupy(scheduler)
+
+    order = []
+    stale = asyncio.create_task(scheduler.submit("objects", order.append, "objects-1"))
+    await asyncio.sleep(0)
+    # A newer frame from the same owner replaces the one still waiting.
+    newer = asyncio.create_task(scheduler.submit("objects", order.append, "objects-2"))
+    fall = asyncio.create_task(scheduler.submit("fall", order.append, "fall"))
+    assert await dropped(stale) == DROP_SUPERSEDED
+
+    release.set()
+    await asyncio.gather(blocker, newer, fall)
+    # Fall detection outranks objects even though it was queued later.
+    assert order == ["fall", "objects-2"], order
+    stats = scheduler.stats()["owners"]
+    assert stats["objects"]["dropped"][DROP_SUPERSEDED] == 1 and stats["objects"]["completed"] == 1
+    await scheduler.close()
+
+
+async def check_deadline():
+    scheduler = InferenceScheduler(max_workers=1)
+    scheduler.register("objects", deadline_seconds=0.05)
+    release, blocker = await occupy(scheduler)
+    job = asyncio.create_task(scheduler.submit("objects", time.sleep, 0))
+    # Still queued when its deadline passes: skipped once a worker frees up.
+    await asyncio.sleep(0.1)
+    release.set()
+    assert await dropped(job) == DROP_DEADLINE
+    await blocker
+    await scheduler.close()
+
+
+async def check_budget():
+    scheduler = InferenceScheduler(max_workers=1, budgets={"objects": 0.02}, budget_window_seconds=1.0)
+    # 50 ms of a 1 s window is over a 2% budget.
+    await scheduler.submit("objects", time.sleep, 0.05)
+    assert await dropped(scheduler.submit("objects", time.sleep, 0)) == DROP_BUDGET
+    # Other owners are unaffected.
+    await scheduler.submit("fall", time.sleep, 0)
+    assert scheduler.stats()["owners"]["objects"]["budget"] == 0.02
+    await scheduler.close()
+
+
+async def check_errors_and_close():
+    scheduler = InferenceScheduler(max_workers=1)
+
+    def fail():
+        raise RuntimeError("model failed")
+
+    try:
+        await scheduler.submit("objects", fail)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("error was not raised in the submitter")
+    assert scheduler.stats()["owners"]["objects"]["errors"] == 1
+
+    release, blocker = await occupy(scheduler)
+    queued = asyncio.create_task(scheduler.submit("objects", time.sleep, 0))
+    await asyncio.sleep(0)
+    await scheduler.close()
+    assert await dropped(queued) == DROP_SHUTDOWN
+    assert await dropped(scheduler.submit("objects", time.sleep, 0)) == DROP_SHUTDOWN
+    release.set()
+    await asyncio.gather(blocker, return_exceptions=True)
+
+
+def test():
+    print("Testing InferenceScheduler priorities, supersede, deadlines and budgets...")
+    asyncio.run(check_priority_and_supersede())
+    asyncio.run(check_deadline())
+    asyncio.run(check_budget())
+    asyncio.run(check_errors_and_close())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
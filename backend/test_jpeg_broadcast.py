@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from processors.jpeg_broadcast import JpegBroadcast
+
+
+async def check_broadcast():
+    broadcast = JpegBroadcast()
+
+    # Nothing published yet: times out.
+    assert await broadcast.wait_next(0, timeout=0.02) is None
+
+    # A waiting client wakes on the next frame.
+    waiter = asyncio.create_task(broadcast.wait_next(0))
+    await asyncio.sleep(0)
+    await broadcast.publish(b"frame1", pts=0.1)
+    assert await waiter == (1, b"frame1")
+
+    # A client that fell behind gets only the newest frame.
+    for index in range(2, 6):
+        await broadcast.publish(f"frame{index}".encode())
+    assert await broadcast.wait_next(1) == (5, b"frame5")
+    assert broadcast.skipped == 3
+    # Already has the newest: waits, and times out.
+    assert await broadcast.wait_next(5, timeout=0.02) is None
+
+    # Published from another thread (handed to the loop), still wakes the waiter.
+    loop = asyncio.get_running_loop()
+    waiter = asyncio.create_task(broadcast.wait_next(5, timeout=2.0))
+    await asyncio.sleep(0)
+    thread = threading.Thread(
+        target=lambda: asyncio.run_coroutine_threadsafe(broadcast.publish(b"frame6"), loop).result()
+    )
+    thread.start()
+    assert await waiter == (6, b"frame6")
+    thread.join()
+
+    # Closing wakes every waiting client with None.
+    waiters = [asyncio.create_task(broadcast.wait_next(6)) for _ in range(3)]
+    await asyncio.sleep(0)
+    await broadcast.close()
+    assert await asyncio.wait_for(asyncio.gather(*waiters), 1.0) == [None, None, None]
+    assert await broadcast.wait_next(0) is None
+    assert broadcast.stats()["published"] == 6
+
+
+def test():
+    print("Testing JpegBroadcast wait_next...")
+    asyncio.run(check_broadcast())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+from processors.model_registry import ModelRegistry
+from processors.object_detection import ObjectDetectionProcessor
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        time.sleep(self.delay)
+        return lambda frame: frame * 2
+
+
+def check_sharing():
+    registry = ModelRegistry(idle_unload_seconds=0.3)
+    loader = Loader(delay=0.05)
+    leases = []
+
+    def acquire():
+        leases.append(registry.acquire("yolo11n.pt", loader, device="cpu"))
+
+    # Sessions created at the same time wait for one load instead of each loading a copy.
+    threads = [threading.Thread(target=acquire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.loads == 1
+    assert len({id(lease.model) for lease in leases}) == 1
+    assert leases[0].infer(21) == 42
+    # A different device is a different model.
+    other = registry.acquire("yolo11n.pt", loader, device="cuda:0")
+    assert loader.loads == 2
+    other.release()
+
+    stats = registry.stats()["yolo11n.pt/cpu/torch"]
+    assert stats["refcount"] == 4 and stats["inferences"] == 1
+    return registry, loader, leases
+
+
+def check_idle_unload(registry, loader, leases):
+    for lease in leases[:3]:
+        lease.release()
+    # Releasing twice doesn't drop anybody else's reference.
+    leases[0].release()
+    assert registry.stats()["yolo11n.pt/cpu/torch"]["refcount"] == 1
+
+    # Idle past the timeout: only the unleased model goes, a leased one never does.
+    time.sleep(0.35)
+    assert registry.unload_idle() == [("yolo11n.pt", "cuda:0", "torch")]
+    assert list(registry.stats()) == ["yolo11n.pt/cpu/torch"]
+
+    # Last lease released: kept warm for the idle timeout, then unloaded by the timer.
+    leases[3].release()
+    assert registry.unload_idle() == []
+    assert "yolo11n.pt/cpu/torch" in registry.stats()
+    deadline = time.monotonic() + 2.0
+    while registry.stats() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert registry.stats() == {}
+
+    # The next session loads it again.
+    lease = registry.acquire("yolo11n.pt", loader)
+    assert loader.loads == 3
+    lease.release()
+
+
+def check_thread_safe():
+    registry = ModelRegistry()
+    lease = registry.acquire("toddler/2", lambda: str.upper, device="remote", backend="roboflow", thread_safe=True)
+    assert lease.key == ("toddler/2", "remote", "roboflow")
+    assert lease.infer("ok") == "OK"
+    lease.release()
+
+
+async def check_async_acquire():
+    registry = ModelRegistry()
+    threads = []
+
+    def slow_load():
+        threads.append(threading.current_thread())
+        time.sleep(0.2)
+        return str.upper
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    lease = await registry.acquire_async("toddler/2", slow_load, device="remote", backend="roboflow")
+    ticker.cancel()
+    # The load ran on a worker thread while the event loop kept going.
+    assert threads[0] is not threading.main_thread() and ticks >= 10
+    assert lease.infer("ok") == "OK"
+    lease.release()
+
+    # create_agent loads the model off the loop and hands the lease to the processor,
+    # which then releases it on close (the bundled config builds without a download).
+    lease = await ObjectDetectionProcessor.acquire_model("yolo11n.yaml", model_registry=registry)
+    processor = ObjectDetectionProcessor(weights_path="yolo11n.yaml", model_lease=lease, model_registry=registry)
+    assert processor.model is lease.model
+    assert registry.stats()["/".join(lease.key)]["refcount"] == 1
+    await processor.close()
+    assert registry.stats()["/".join(lease.key)]["refcount"] == 0
+
+
+def test():
+    print("Testing ModelRegistry sharing, refcounts and idle unload...")
+    check_idle_unload(*check_sharing())
+    check_thread_safe()
+    asyncio.run(check_async_acquire())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,91 @@
+import time
+
+import av
+import numpy as np
+
+from processors.frame_cache import FrameCache
+from processors.motion_gate import MotionGate
+
+
+class Camera:
+    """A still gray room; ``move`` puts a bright square somewhere in it."""
+
+    def __init__(self):
+        self.pts = 0
+
+    def frame(self, square_at=None, level=80):
+        image = np.full((120, 160, 3), level, dtype=np.uint8)
+        if square_at is not None:
+            x, y = square_at
+            image[y:y + 30, x:x + 30] = 255
+        frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+        frame.pts = self.pts
+        self.pts += 1
+        return frame
+
+
+def run(gate, consumer, frame):
+    due = gate.should_run(consumer, frame)
+    if due:
+        gate.mark_ran(consumer)
+    return due
+
+
+def check_gate():
+    camera = Camera()
+    gate = MotionGate(FrameCache(), min_refresh_seconds=60)
+
+    # The first frame always runs; a still room after that does not.
+    assert run(gate, "objects", camera.frame())
+    assert [run(gate, "objects", camera.frame()) for _ in range(5)] == [False] * 5
+
+    # Something moves: frames with motion run.
+    assert run(gate, "objects", camera.frame(square_at=(10, 10)))
+    assert run(gate, "objects", camera.frame(square_at=(90, 60)))
+
+    # Every consumer keeps its own place: one that hasn't run since the motion is still due.
+    assert run(gate, "fall", camera.frame())
+    # A run that never completed (dropped job) leaves the consumer due.
+    assert gate.should_run("toddler", camera.frame())
+    assert gate.should_run("toddler", camera.frame())
+
+    stats = gate.stats()
+    assert stats["motion_frames"] >= 2
+    assert stats["consumers"]["objects"]["skipped"] == 5
+
+
+def check_scene_cut_and_refresh():
+    camera = Camera()
+    gate = MotionGate(FrameCache(), min_refresh_seconds=0.2)
+    assert run(gate, "objects", camera.frame())
+    # Lights on: the whole scene changes once and becomes the new background.
+    assert run(gate, "objects", camera.frame(level=200))
+    assert gate.scene_cuts == 1
+    assert not run(gate, "objects", camera.frame(level=200))
+
+    # Nothing moves, but the refresh interval forces a run now and then.
+    time.sleep(0.25)
+    assert run(gate, "objects", camera.frame(level=200))
+    assert not run(gate, "objects", camera.frame(level=200))
+
+
+def check_shared_analysis():
+    camera = Camera()
+    gate = MotionGate(FrameCache())
+    frame = camera.frame()
+    # Each frame is analysed once, whichever processor asks first.
+    for consumer in ("objects", "fall", "toddler"):
+        gate.should_run(consumer, frame)
+    assert gate.frames == 1
+
+
+def test():
+    print("Testing MotionGate skips, motion, scene cuts and refresh...")
+    check_gate()
+    check_scene_cut_and_refresh()
+    check_shared_analysis()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,92 @@
+import numpy as np
+
+from processors.base import draw_bbox
+from processors.overlay import BoxItem, GlyphCache, OverlayCompositor
+
+
+WIDTH, HEIGHT = 320, 240
+
+
+def drawn(background, items):
+    expected = background.copy()
+    for item in items:
+        draw_bbox(expected, item.bbox, label=item.label, color=item.color, thickness=item.thickness, font_scale=item.font_scale)
+    return expected
+
+
+def random_items(rng, n):
+    items = []
+    for i in range(n):
+        # Some boxes hang off the frame edges, some are tiny.
+        x, y = int(rng.integers(-40, WIDTH)), int(rng.integers(-40, HEIGHT))
+        w, h = int(rng.integers(0, 150)), int(rng.integers(0, 150))
+        label = "" if i % 4 == 3 else f"{['cup', 'toddler', 'scissors'][i % 3]} 0.{rng.integers(50, 99)}"
+        color = [(0, 255, 0), (0, 165, 255), (0, 0, 255)][i % 3]
+        items.append(BoxItem((x, y, x + w, y + h), label, color, int(rng.integers(1, 5)), [0.6, 0.4][i % 2]))
+    return items
+
+
+def check_matches_draw_bbox():
+    for seed in range(30):
+        rng = np.random.default_rng(seed)
+        background = rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+        items = random_items(rng, 8)
+        compositor = OverlayCompositor()
+        compositor.update(items)
+        assert np.array_equal(compositor.composite(background.copy()), drawn(background, items)), seed
+
+
+def check_reuse():
+    background = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    glyphs = GlyphCache()
+    compositor = OverlayCompositor(glyphs)
+    items = [BoxItem((10, 40, 60, 90), "cup 0.91"), BoxItem((100, 100, 180, 200), "toddler", (0, 165, 255))]
+    compositor.update(items)
+    compositor.update(list(items))
+    assert compositor.stats()["unchanged_updates"] == 1
+
+    moved = [BoxItem((30, 50, 80, 100), "cup 0.91"), items[1]]
+    compositor.update(moved)
+    assert np.array_equal(compositor.composite(background.copy()), drawn(background, moved))
+
+    # A second frame size gets the layer cut to it.
+    small = np.zeros((60, 70, 3), dtype=np.uint8)
+    assert np.array_equal(compositor.composite(small.copy()), drawn(small, moved))
+    assert glyphs.stats()["entries"] == 2
+
+
+def check_tracked_boxes():
+    # Tracker predictions move and resize every box on every frame: nothing is
+    # re-rendered, labels come from the glyph cache, and the pixels still match.
+    rng = np.random.default_rng(1)
+    background = rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    compositor = OverlayCompositor()
+    for step in range(60):
+        items = [
+            BoxItem((10 + step, 40 + step // 2, 80 + 2 * step, 120 + step), "cup #1 0.91"),
+            BoxItem((200 - step, 30, 260 - step // 3, 90 + step), "toddler #2", (0, 165, 255)),
+            BoxItem((150, 150 - step, 210 + step, 230), "FALL DETECTED!", (0, 0, 255), thickness=3),
+        ]
+        compositor.update(items)
+        assert np.array_equal(compositor.composite(background.copy()), drawn(background, items)), step
+    stats = compositor.stats()
+    assert stats["outline_renders"] == 0
+    assert stats["glyphs"]["misses"] == 3 and stats["glyphs"]["hits"] == 3 * 59
+
+    # Only boxes too small for straight edges are rasterized, once per size.
+    tiny = [BoxItem((50, 50, 53, 54)), BoxItem((90, 90, 93, 94))]
+    compositor.update(tiny)
+    assert np.array_equal(compositor.composite(background.copy()), drawn(background, tiny))
+    assert compositor.stats()["outline_renders"] == 1
+
+
+def test():
+    print("Testing OverlayCompositor output against draw_bbox...")
+    check_matches_draw_bbox()
+    check_reuse()
+    check_tracked_boxes()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
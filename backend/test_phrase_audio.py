@@ -0,0 +1,109 @@
+import asyncio
+import tempfile
+
+import numpy as np
+from getstream.video.rtc import PcmData
+
+from processors.phrase_audio import MONITORING_ACTIVE, PhraseAudioCache
+
+
+class FakeTTS:
+    """Streams 100 ms of 24 kHz audio per phrase, in two chunks."""
+
+    provider_name = "fake"
+
+    def __init__(self, voice_id="calm"):
+        self.voice_id = voice_id
+        self.synthesized = []
+        self.sent = []
+
+    async def stream_audio(self, text):
+        self.synthesized.append(text)
+
+        async def chunks():
+            for _ in range(2):
+                yield PcmData(sample_rate=24000, format="s16", samples=np.full(1200, 100, dtype=np.int16))
+
+        return chunks()
+
+    async def send(self, text):
+        self.sent.append(text)
+
+
+class FakeTrack:
+    def __init__(self):
+        self.written = []
+
+    async def write(self, pcm, final=False):
+        self.written.append((pcm, final))
+
+
+class FakeAgent:
+    def __init__(self, tts):
+        self.tts = tts
+        self.audio_track = FakeTrack()
+        self.responses = []
+
+    async def simple_response(self, text):
+        self.responses.append(text)
+
+
+async def check_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        tts = FakeTTS()
+        cache = PhraseAudioCache(directory)
+        assert await cache.warm(tts) == 2
+        assert cache.synthesized == 2 and len(tts.synthesized) == 2
+        # Stored once, resampled to the call's rate over the whole phrase.
+        pcm = cache.get(tts, MONITORING_ACTIVE)
+        assert pcm.sample_rate == 48000 and len(pcm.samples) == 4800
+        assert await cache.load(tts, MONITORING_ACTIVE) is pcm and cache.synthesized == 2
+
+        # A fresh process reads the phrases back from disk instead of synthesizing.
+        tts_again = FakeTTS()
+        reloaded = PhraseAudioCache(directory)
+        assert await reloaded.warm(tts_again) == 2
+        assert reloaded.loaded == 2 and reloaded.synthesized == 0 and tts_again.synthesized == []
+        assert np.array_equal(reloaded.get(tts_again, MONITORING_ACTIVE).samples, pcm.samples)
+
+        # Another voice is another phrase.
+        other_voice = FakeTTS(voice_id="cheerful")
+        assert reloaded.get(other_voice, MONITORING_ACTIVE) is None
+
+
+async def check_speak():
+    tts = FakeTTS()
+    cache = PhraseAudioCache()
+    await cache.warm(tts, (MONITORING_ACTIVE,))
+    agent = FakeAgent(tts)
+
+    # Cached: written straight onto the call's audio track, no TTS.
+    assert await cache.speak(agent, MONITORING_ACTIVE)
+    assert len(agent.audio_track.written) == 1 and agent.audio_track.written[0][1] is True
+    assert tts.sent == []
+
+    # Not cached: live TTS now, cached in the background for next time.
+    assert not await cache.speak(agent, "Toddler near the stairs")
+    assert tts.sent == ["Toddler near the stairs"]
+    await asyncio.sleep(0.05)
+    assert await cache.speak(agent, "Toddler near the stairs")
+
+    stats = cache.stats()
+    assert stats["hits"]["count"] == 2 and stats["misses"]["count"] == 1 and stats["phrases"] == 2
+    assert stats["directory"] is None
+
+    # No TTS configured: the agent still says it through the LLM.
+    silent = FakeAgent(None)
+    assert not await cache.speak(silent, MONITORING_ACTIVE)
+    assert silent.responses == [MONITORING_ACTIVE]
+
+
+def test():
+    print("Testing PhraseAudioCache storage and playback...")
+    asyncio.run(check_cache())
+    asyncio.run(check_speak())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,49 @@
+import numpy as np
+from scipy.signal import resample_poly
+
+from processors.resampler import StreamingResampler, resample
+
+RATE_PAIRS = [(48000, 16000), (44100, 16000), (24000, 16000), (8000, 16000), (16000, 16000)]
+
+
+def stream(resampler, samples, rng, axis=-1):
+    """Feed ``samples`` in random 1-50 ms packets, then flush."""
+    pieces = []
+    start = 0
+    total = samples.shape[axis]
+    while start < total:
+        size = int(rng.integers(resampler.src_rate // 1000, resampler.src_rate // 20))
+        packet = samples[..., start:start + size] if axis == -1 else samples[start:start + size]
+        pieces.append(resampler.process(packet))
+        start += size
+    pieces.append(resampler.flush())
+    return np.concatenate(pieces)
+
+
+def test():
+    rng = np.random.default_rng(0)
+    for src_rate, dst_rate in RATE_PAIRS:
+        print(f"Testing {src_rate} -> {dst_rate} Hz against offline resampling...")
+        # Two seconds of a chirp plus noise, like a file recorded from the call.
+        t = np.arange(2 * src_rate) / src_rate
+        signal = (0.5 * np.sin(2 * np.pi * (200 + 1500 * t) * t) + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+        expected = resample_poly(signal.astype(np.float64), dst_rate, src_rate)
+
+        streamed = stream(StreamingResampler(src_rate, dst_rate), signal, rng)
+        assert len(streamed) == len(expected), (len(streamed), len(expected))
+        assert np.max(np.abs(streamed - expected)) < 1e-5
+        assert np.allclose(streamed, resample(signal, src_rate, dst_rate), atol=1e-6)
+
+    print("Testing stereo mixdown (planar and interleaved int16)...")
+    planar = rng.integers(-20000, 20000, (2, 48000)).astype(np.int16)
+    expected = resample_poly(planar.mean(axis=0), 1, 3)
+    streamed = stream(StreamingResampler(48000, 16000, channels=2), planar, rng)
+    assert np.max(np.abs(streamed - expected)) < 1e-5 * 32768
+    interleaved = np.ascontiguousarray(planar.T)
+    streamed = stream(StreamingResampler(48000, 16000, channels=2), interleaved, rng, axis=0)
+    assert np.max(np.abs(streamed - expected)) < 1e-5 * 32768
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
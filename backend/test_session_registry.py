@@ -0,0 +1,160 @@
+import asyncio
+
+from processors.batch_inference import BatchInferenceServer
+from processors.frame_cache import FrameCache
+from processors.frame_hub import FrameHub
+from processors.model_registry import ModelRegistry
+from processors.object_detection import ObjectDetectionProcessor
+from session_registry import Session, SessionRegistry
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.closed = 0
+
+    async def close(self):
+        self.closed += 1
+
+
+class CountingProcessor(ObjectDetectionProcessor):
+    closes = 0
+
+    async def close(self):
+        self.closes += 1
+        await super().close()
+
+
+class FakeAgent:
+    """Like Agent: closing it closes its processors."""
+
+    def __init__(self, agent_id, processors=()):
+        self.id = agent_id
+        self.processors = list(processors)
+        self.closed = False
+
+    async def close(self):
+        for processor in self.processors:
+            await processor.close()
+        self.closed = True
+
+
+def make_session(processor=None):
+    processor = processor or FakeProcessor()
+    session = Session(
+        publisher=None,
+        processors={"object_detection": processor},
+        frame_cache=FrameCache(),
+        frame_hub=FrameHub(),
+    )
+    return session, processor
+
+
+async def check_registry():
+    registry = SessionRegistry()
+    first, first_processor = make_session()
+    second, _ = make_session()
+
+    # Staged under the agent id until join_call knows the call id.
+    await registry.stage(FakeAgent("agent-1"), first)
+    await registry.stage(FakeAgent("agent-2"), second)
+    assert registry.get("call-1") is None and registry.latest() is None
+    assert await registry.bind("agent-1", "call-1") is first
+    assert await registry.bind("agent-1", "call-1") is None
+    assert await registry.bind("agent-2", "call-2") is second
+    assert first.call_id == "call-1" and registry.get("call-1") is first
+    assert sorted(registry.call_ids()) == ["call-1", "call-2"]
+    assert registry.latest() is second
+    assert first.stats()["processors"] == ["object_detection"]
+
+    # Each call keeps its own session; releasing one leaves the other.
+    await registry.release("call-1", first)
+    assert first_processor.closed == 1
+    assert registry.get("call-1") is None and registry.latest() is second
+    await registry.release("call-1", first)
+    assert first_processor.closed == 1
+
+    # A session whose call never started is closed when discarded.
+    third, third_processor = make_session()
+    await registry.stage(FakeAgent("agent-3"), third)
+    await registry.discard_staged("agent-3")
+    assert third_processor.closed == 1 and await registry.bind("agent-3", "call-3") is None
+
+
+async def check_rejoin_and_orphans():
+    registry = SessionRegistry()
+    old, old_processor = make_session()
+    new, new_processor = make_session()
+    await registry.stage(FakeAgent("agent-1"), old)
+    await registry.bind("agent-1", "call-1")
+
+    # Rejoining the call closes the session it replaces...
+    await registry.stage(FakeAgent("agent-2"), new)
+    await registry.bind("agent-2", "call-1")
+    assert old_processor.closed == 1 and registry.get("call-1") is new
+    # ...and the old join_call exiting later leaves the new one alone.
+    await registry.release("call-1", old)
+    assert registry.get("call-1") is new and new_processor.closed == 0
+
+    # The warm-up agent is closed without joining; its session goes on the next
+    # stage(), without closing the agent's processors a second time.
+    orphan, orphan_processor = make_session()
+    warm_up = FakeAgent("warm-up", [orphan_processor])
+    await registry.stage(warm_up, orphan)
+    await warm_up.close()
+    stale, stale_processor = make_session()
+    await registry.stage(FakeAgent("stale"), stale)
+    assert orphan_processor.closed == 1
+    # Staged too long ago: never going to be bound.
+    stale.created_ts -= 120
+    assert await registry.discard_orphans() == 1 and stale_processor.closed == 1
+
+
+async def check_shared_models_released_once():
+    # Two calls share one model and one batcher; the bundled config builds without a download.
+    models = ModelRegistry()
+    batch_server = BatchInferenceServer(max_batch_size=2, max_wait_ms=10)
+    registry = SessionRegistry()
+    processors = [
+        CountingProcessor(weights_path="yolo11n.yaml", model_registry=models, batch_server=batch_server)
+        for _ in range(3)
+    ]
+    model_key = "/".join(processors[0]._model_lease.key)
+    batch_key = processors[0]._batch_key
+    assert models.stats()[model_key]["refcount"] == 3 and batch_server._refcounts[batch_key] == 3
+
+    agents = [FakeAgent(f"agent-{index}", [processor]) for index, processor in enumerate(processors)]
+    for agent, processor in zip(agents, processors):
+        await registry.stage(agent, make_session(processor)[0])
+    first = await registry.bind("agent-0", "call-1")
+    await registry.bind("agent-1", "call-2")
+
+    # The first call ends: the agent closes its processors, then join_call
+    # releases the session, which leaves them alone.
+    await agents[0].close()
+    await registry.release("call-1", first)
+    assert processors[0].closes == 1
+    assert models.stats()[model_key]["refcount"] == 2 and batch_server._refcounts[batch_key] == 2
+
+    # A session that never joined closes its processor itself, once.
+    await registry.discard_staged("agent-2")
+    assert processors[2].closes == 1
+    assert models.stats()[model_key]["refcount"] == 1 and batch_server._refcounts[batch_key] == 1
+
+    # The last call out takes the batcher with it.
+    await agents[1].close()
+    await registry.release("call-2", registry.get("call-2"))
+    assert [processor.closes for processor in processors] == [1, 1, 1]
+    assert models.stats()[model_key]["refcount"] == 0 and batch_server.stats() == {}
+    await batch_server.close()
+
+
+def test():
+    print("Testing SessionRegistry stage, bind and release...")
+    asyncio.run(check_registry())
+    asyncio.run(check_rejoin_and_orphans())
+    asyncio.run(check_shared_models_released_once())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
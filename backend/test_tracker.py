@@ -0,0 +1,73 @@
+from processors.tracker import MultiObjectTracker
+
+
+def det(label, x, y, size=40, confidence=0.9):
+    return {"label": label, "confidence": confidence, "bbox": (x, y, x + size, y + size)}
+
+
+def ids(batch):
+    return [d["track_id"] for d in batch.to_dicts()]
+
+
+def check_identity_and_prediction():
+    tracker = MultiObjectTracker()
+    # A cup moving right 20 px/s and a person standing still, seen at 1 fps.
+    for second in range(4):
+        tracked = tracker.update([det("cup", 100 + 20 * second, 100), det("person", 300, 50, size=100)], float(second))
+        assert ids(tracked) == [1, 2], tracked
+    assert tracker.stats() == {"tracks": 2, "visible": 2, "created": 2}
+
+    # Between inference frames the cup's box is extrapolated along its velocity.
+    cup, person = tracker.predict(3.5).to_dicts()
+    assert cup["track_id"] == 1 and person["track_id"] == 2
+    assert abs(cup["bbox"][0] - 170) <= 3, cup
+    assert abs(person["bbox"][0] - 300) <= 2, person
+    # ...but never further than max_extrapolation_seconds past the last update.
+    far = tracker.predict(30.0).to_dicts()[0]
+    assert abs(far["bbox"][0] - 180) <= 4, far
+
+    # Swapped order in the batch: still matched by position and label.
+    tracked = tracker.update([det("person", 300, 50, size=100), det("cup", 180, 100)], 4.0)
+    assert ids(tracked) == [2, 1]
+
+
+def check_confidence_and_labels():
+    tracker = MultiObjectTracker(high_confidence=0.5)
+    # A low-confidence detection never starts a track...
+    assert ids(tracker.update([det("cup", 100, 100, confidence=0.3)], 0.0)) == [None]
+    assert ids(tracker.update([det("cup", 100, 100)], 1.0)) == [1]
+    # ...but does continue one (ByteTrack's second stage).
+    assert ids(tracker.update([det("cup", 102, 100, confidence=0.3)], 2.0)) == [1]
+    # A different label in the same place is a different object.
+    assert ids(tracker.update([det("bottle", 102, 100)], 3.0)) == [2]
+    # Fast motion at 1 fps: no overlap, but close enough to continue the track.
+    assert ids(tracker.update([det("bottle", 150, 100)], 4.0)) == [2]
+
+
+def check_ageing_and_reset():
+    tracker = MultiObjectTracker(max_age_seconds=2.0)
+    tracker.update([det("cup", 100, 100)], 0.0)
+    # Missed: hidden from predict right away, dropped after max_age_seconds.
+    tracker.update([], 1.0)
+    assert len(tracker.predict(1.0)) == 0 and tracker.stats()["tracks"] == 1
+    assert ids(tracker.update([det("cup", 100, 100)], 2.0)) == [1]
+    tracker.update([], 3.0)
+    tracker.update([], 5.5)
+    assert tracker.stats()["tracks"] == 0
+    assert ids(tracker.update([det("cup", 100, 100)], 6.0)) == [2]
+
+    # Time jumping back (track switch, pts reset) starts over.
+    tracker.update([det("cup", 400, 100)], 0.0)
+    assert tracker.stats()["tracks"] == 1
+
+
+def test():
+    print("Testing MultiObjectTracker association, prediction and ageing...")
+    check_identity_and_prediction()
+    check_confidence_and_labels()
+    check_ageing_and_reset()
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
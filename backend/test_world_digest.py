@@ -0,0 +1,162 @@
+import asyncio
+
+from events.detection_events import CryDetectedEvent, FallStateChangedEvent, ObjectDetectedEvent
+from events.event_bus import EventBus
+from events.world_digest import WorldDigest
+from processors.toddler_processor import PEOPLE_EVENT_NAME
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubLLM:
+    """Stands in for gemini.LLM: records prompts, answers from a script."""
+
+    def __init__(self):
+        self.prompts = []
+        self.spoken = []
+
+    async def simple_response(self, text):
+        self.prompts.append(text)
+        return f"reply {len(self.prompts)}"
+
+    async def say(self, text):
+        self.spoken.append(text)
+
+
+def people(*detections):
+    return ObjectDetectedEvent(
+        name=PEOPLE_EVENT_NAME,
+        objects=[{"label": label, "confidence": 0.9, "bbox": bbox} for label, bbox in detections],
+    )
+
+
+def objects(*detections):
+    return ObjectDetectedEvent(
+        objects=[{"label": label, "confidence": 0.9, "bbox": bbox} for label, bbox in detections],
+    )
+
+
+TODDLER = ("toddler", (100, 100, 200, 300))
+ADULT = ("adult", (400, 50, 550, 400))
+SCISSORS_NEAR = ("scissors", (210, 250, 240, 270))
+SCISSORS_FAR = ("scissors", (600, 400, 630, 420))
+
+
+async def check_digest():
+    clock, llm = FakeClock(), StubLLM()
+    digest = WorldDigest(
+        llm.simple_response,
+        replay=llm.say,
+        cadence_seconds=60,
+        min_interval_seconds=5,
+        tokens_per_minute=10_000,
+        clock=clock,
+    )
+
+    # Nothing in view: nothing to say.
+    assert await digest.poll() is None
+
+    digest.observe(people(TODDLER, ADULT))
+    digest.observe(objects(SCISSORS_FAR))
+    assert await digest.poll() is not None
+    assert llm.prompts[-1] == "Room update: toddler present 0 s; adult present 0 s; scissors present 0 s"
+
+    # Same situation, new frames: per-frame events are coalesced away.
+    for _ in range(50):
+        clock.now += 0.5
+        digest.observe(people(TODDLER, ADULT))
+        digest.observe(objects(SCISSORS_FAR))
+        assert await digest.poll() is None
+    assert len(llm.prompts) == 1
+
+    # The toddler reaches the scissors and the adult walks out.
+    digest.observe(people(TODDLER))
+    digest.observe(objects(SCISSORS_NEAR))
+    clock.now += 10
+    assert await digest.poll() is not None
+    assert llm.prompts[-1] == "Room update: toddler present 35 s, near scissors; adult left 10 s ago; scissors present 35 s"
+
+    # Moves away, then back: the second time is the same situation, answered from the cache.
+    clock.now += 6
+    digest.observe(people(TODDLER))
+    digest.observe(objects(SCISSORS_FAR))
+    await digest.poll()
+    clock.now += 6
+    digest.observe(people(TODDLER))
+    digest.observe(objects(SCISSORS_NEAR))
+    await digest.poll()
+    assert len(llm.prompts) == 3
+    assert llm.spoken == ["reply 2"]
+    assert digest.cache_hits == 1
+
+    # Falls bypass the minimum interval.
+    clock.now += 1
+    digest.observe(FallStateChangedEvent(fall_present=True))
+    await digest.poll()
+    assert llm.prompts[-1].startswith("Room update: person down 0 s; toddler present")
+
+    # With nothing changing, the cadence refresh still goes out.
+    clock.now += 60
+    digest.observe(people(TODDLER))
+    digest.observe(objects(SCISSORS_NEAR))
+    digest.observe(FallStateChangedEvent(fall_present=True))
+    await digest.poll()
+    assert digest.cadence_pushes == 1
+    print("Digest:", digest.last_digest)
+
+
+async def check_budget():
+    clock, llm = FakeClock(), StubLLM()
+    digest = WorldDigest(
+        llm.simple_response,
+        min_interval_seconds=0,
+        tokens_per_minute=100,
+        response_tokens=20,
+        forget_seconds=0,
+        clock=clock,
+    )
+    # A new situation every second, far more than the budget allows.
+    for second in range(120):
+        digest.observe(objects((f"object{second}", (0, 0, 10, 10))))
+        digest.observe(CryDetectedEvent(confidence=0.9))
+        await digest.poll()
+        assert digest.tokens_last_minute() <= 100
+        clock.now += 1
+    assert digest.budget_deferred > 0
+    # About three 32-token pushes fit in each minute.
+    assert 2 <= len(llm.prompts) <= 6, llm.prompts
+    print("Budget: sent", len(llm.prompts), "of 120 changes,", digest.tokens_total, "tokens")
+
+
+async def check_bus():
+    llm = StubLLM()
+    bus = EventBus()
+    digest = WorldDigest(llm.simple_response, min_interval_seconds=0)
+    digest.attach(bus)
+    for _ in range(30):
+        await bus.publish(people(TODDLER))
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if llm.prompts:
+            break
+    assert llm.prompts == ["Room update: toddler present 0 s"], llm.prompts
+    await digest.close()
+    await bus.close()
+
+
+def test():
+    print("Testing WorldDigest with a stub LLM...")
+    asyncio.run(check_digest())
+    asyncio.run(check_budget())
+    asyncio.run(check_bus())
+    print("Test passed.")
+
+
+if __name__ == "__main__":
+    test()
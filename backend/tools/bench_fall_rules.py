@@ -0,0 +1,112 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processors.fall_detection import parse_pose_result  # noqa: E402
+from processors.fall_rules import (  # noqa: E402
+    AspectRatioRule,
+    HeadBelowHipsRule,
+    default_fall_rules,
+    evaluate_fall_rules,
+)
+
+
+# Per-person Python version, as processors/fall_detection.py parsed pose
+# results before the rules were vectorized (aspect ratio + head below hips,
+# keypoints converted to nested lists).
+
+def _parse_per_person(result, fall_ratio_threshold: float) -> list[dict]:
+    detections = []
+    if result.boxes and result.keypoints:
+        for box, keypoints in zip(result.boxes, result.keypoints):
+            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+            conf = float(box.conf[0])
+            kpts = keypoints.data[0].tolist() if keypoints.data is not None else []
+            is_falling = max(1, x2 - x1) / max(1, y2 - y1) > fall_ratio_threshold
+            if len(kpts) >= 13:
+                nose_y, l_hip_y, r_hip_y = kpts[0][1], kpts[11][1], kpts[12][1]
+                if nose_y > 0 and l_hip_y > 0 and r_hip_y > 0 and nose_y > (l_hip_y + r_hip_y) / 2:
+                    is_falling = True
+            detections.append({
+                "label": "person",
+                "confidence": conf,
+                "bbox": (x1, y1, x2, y2),
+                "is_falling": is_falling,
+                "keypoints": kpts,
+            })
+    return detections
+
+
+def _synthetic_result(rng: np.random.Generator, people: int) -> Results:
+    """A pose Results with ``people`` random upright or lying skeletons."""
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    boxes, keypoints = [], []
+    for _ in range(people):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 400)
+        w, h = rng.uniform(60, 200), rng.uniform(150, 300)
+        if rng.random() < 0.3:
+            w, h = h, w
+        points = np.column_stack([
+            rng.uniform(x, x + w, 17),
+            rng.uniform(y, y + h, 17),
+            rng.uniform(0.0, 1.0, 17),
+        ])
+        boxes.append([x, y, x + w, y + h, rng.uniform(0.5, 1.0), 0])
+        keypoints.append(points)
+    return Results(
+        image,
+        path="synthetic",
+        names={0: "person"},
+        boxes=torch.tensor(np.array(boxes).reshape(-1, 6), dtype=torch.float32),
+        keypoints=torch.tensor(np.array(keypoints).reshape(-1, 17, 3), dtype=torch.float32),
+    )
+
+
+def _time(fn, repeat: int) -> float:
+    number = max(1, repeat)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-person vs vectorized fall analysis.")
+    parser.add_argument("--people", default="1,5,20", help="Comma-separated people-per-frame counts.")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing sample.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rules = default_fall_rules()
+    old_rules = (AspectRatioRule(1.2), HeadBelowHipsRule(min_confidence=0.0))
+    for people in (int(count) for count in args.people.split(",")):
+        result = _synthetic_result(rng, people)
+        # Same answers first: the old two rules, without confidence masking,
+        # must flag exactly the same people.
+        old = _parse_per_person(result, 1.2)
+        same = parse_pose_result(result, rules=old_rules)
+        assert [det["bbox"] for det in old] == [det["bbox"] for det in same]
+        assert [det["is_falling"] for det in old] == same.column("is_falling").tolist()
+
+        # Timed: the full default set (adds torso angle and confidence masking).
+        new = parse_pose_result(result, rules=rules)
+        boxes, keypoints = new.boxes, new.keypoints
+
+        per_person_us = _time(lambda: _parse_per_person(result, 1.2), args.repeat)
+        vectorized_us = _time(lambda: parse_pose_result(result, rules=rules), args.repeat)
+        rules_us = _time(lambda: evaluate_fall_rules(boxes, keypoints, rules), args.repeat)
+        print(
+            f"{people:3d} people  per-person={per_person_us:8.1f}us vectorized={vectorized_us:7.1f}us "
+            f"(rules only {rules_us:6.1f}us) speedup={per_person_us / vectorized_us:5.1f}x "
+            f"falling={int(new.column('is_falling').sum())}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
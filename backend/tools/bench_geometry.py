@@ -0,0 +1,117 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processors.base import (  # noqa: E402
+    center_distance_matrix,
+    iou_matrix,
+    points_in_polygons,
+)
+
+
+# Per-pair Python versions, as processors/base.py computed them before the
+# array API; the baseline every all-pairs comparison used to pay.
+
+def _iou_pair(a, b) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    intersection = (x2 - x1) * (y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def _distance_pair(a, b) -> float:
+    c1 = ((a[0] + a[2]) // 2, (a[1] + a[3]) // 2)
+    c2 = ((b[0] + b[2]) // 2, (b[1] + b[3]) // 2)
+    return float(np.sqrt((c1[0] - c2[0]) ** 2 + (c1[1] - c2[1]) ** 2))
+
+
+def _inside_pair(point, polygon) -> bool:
+    pts = np.array(polygon, dtype=np.float32)
+    return cv2.pointPolygonTest(pts, (float(point[0]), float(point[1])), False) >= 0
+
+
+def _random_boxes(rng: np.random.Generator, n: int) -> list[tuple[int, int, int, int]]:
+    xy = rng.integers(0, 1200, size=(n, 2))
+    wh = rng.integers(20, 300, size=(n, 2))
+    return [tuple(int(v) for v in (x, y, x + w, y + h)) for (x, y), (w, h) in zip(xy, wh)]
+
+
+def _random_polygons(rng: np.random.Generator, k: int, vertices: int) -> list[list[tuple[int, int]]]:
+    polygons = []
+    for _ in range(k):
+        center = rng.integers(200, 1000, size=2)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radii = rng.uniform(80, 300, vertices)
+        polygons.append([
+            (int(center[0] + r * np.cos(t)), int(center[1] + r * np.sin(t)))
+            for r, t in zip(radii, angles)
+        ])
+    return polygons
+
+
+def _time(fn, repeat: int) -> float:
+    number = max(1, repeat)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs vectorized geometry helpers.")
+    parser.add_argument("--people", type=int, default=6, help="Children + adults per frame.")
+    parser.add_argument("--objects", type=int, default=30, help="Objects per frame.")
+    parser.add_argument("--zones", type=int, default=6, help="Danger zones.")
+    parser.add_argument("--vertices", type=int, default=8, help="Vertices per zone.")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing sample.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    people = _random_boxes(rng, args.people)
+    objects = _random_boxes(rng, args.objects)
+    everything = people + objects
+    zones = _random_polygons(rng, args.zones, args.vertices)
+    # Box centers plus polygon vertices, so the on-edge rule is exercised too.
+    points = [((b[0] + b[2]) // 2, (b[1] + b[3]) // 2) for b in everything] + [zones[0][0], zones[-1][1]]
+
+    # Same answers first.
+    iou_loop = np.array([[_iou_pair(a, b) for b in everything] for a in everything])
+    dist_loop = np.array([[_distance_pair(a, b) for b in objects] for a in people])
+    inside_loop = np.array([[_inside_pair(p, z) for z in zones] for p in points])
+    assert np.allclose(iou_matrix(everything, everything), iou_loop)
+    assert np.allclose(center_distance_matrix(people, objects), dist_loop)
+    assert np.array_equal(points_in_polygons(points, zones), inside_loop)
+
+    cases = [
+        (
+            f"IoU {len(everything)}x{len(everything)} (tracker association)",
+            lambda: [[_iou_pair(a, b) for b in everything] for a in everything],
+            lambda: iou_matrix(everything, everything),
+        ),
+        (
+            f"distance {len(people)}x{len(objects)} (people to objects)",
+            lambda: [[_distance_pair(a, b) for b in objects] for a in people],
+            lambda: center_distance_matrix(people, objects),
+        ),
+        (
+            f"point-in-zone {len(points)}x{len(zones)}",
+            lambda: [[_inside_pair(p, z) for z in zones] for p in points],
+            lambda: points_in_polygons(points, zones),
+        ),
+    ]
+    for name, scalar, vectorized in cases:
+        scalar_us = _time(scalar, args.repeat // 10)
+        vector_us = _time(vectorized, args.repeat)
+        print(f"{name:45s} scalar={scalar_us:9.1f}us vectorized={vector_us:8.1f}us speedup={scalar_us / vector_us:6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
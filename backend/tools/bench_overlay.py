@@ -0,0 +1,89 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processors.base import draw_bbox  # noqa: E402
+from processors.overlay import BoxItem, OverlayCompositor  # noqa: E402
+
+
+def _random_items(rng: np.random.Generator, n: int, width: int, height: int) -> list[BoxItem]:
+    items = []
+    for i in range(n):
+        x, y = int(rng.integers(0, width - 60)), int(rng.integers(30, height - 60))
+        w, h = int(rng.integers(40, 300)), int(rng.integers(40, 300))
+        label = f"{['cup', 'toddler', 'scissors'][i % 3]} #{i + 1} 0.{rng.integers(50, 99)}"
+        color = [(0, 255, 0), (0, 165, 255), (0, 0, 255)][i % 3]
+        items.append(BoxItem((x, y, min(width - 1, x + w), min(height - 1, y + h)), label, color, 3 if i % 3 == 2 else 2))
+    return items
+
+
+def _tracked(items: list[BoxItem], offset: int) -> list[BoxItem]:
+    """The items as tracker predictions would move them: every box shifted and resized."""
+    return [
+        BoxItem((x1 + offset, y1 + offset // 2, x2 + 2 * offset, y2 + offset), item.label, item.color, item.thickness, item.font_scale)
+        for item in items
+        for x1, y1, x2, y2 in [item.bbox]
+    ]
+
+
+def _time(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=7)) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark draw_bbox per frame vs the cached overlay compositor.")
+    parser.add_argument("--boxes", default="1,4,12", help="Comma-separated boxes-per-frame counts.")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=200, help="Frames per timing sample.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    background = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    frame = background.copy()
+
+    for count in (int(n) for n in args.boxes.split(",")):
+        items = _random_items(rng, count, args.width, args.height)
+
+        # Same pixels first.
+        expected = background.copy()
+        for item in items:
+            draw_bbox(expected, item.bbox, label=item.label, color=item.color, thickness=item.thickness)
+        compositor = OverlayCompositor()
+        compositor.update(items)
+        assert np.array_equal(compositor.composite(background.copy()), expected)
+
+        def redraw() -> None:
+            for item in items:
+                draw_bbox(frame, item.bbox, label=item.label, color=item.color, thickness=item.thickness)
+
+        def unchanged() -> None:
+            compositor.update(items)
+            compositor.composite(frame)
+
+        # Every box at a new position and size every frame (worst case: tracks all moving).
+        moving_compositor = OverlayCompositor()
+        step = iter(range(10 ** 9))
+
+        def moving() -> None:
+            moving_compositor.update(_tracked(items, next(step) % 97))
+            moving_compositor.composite(frame)
+
+        redraw_us = _time(redraw, args.repeat)
+        unchanged_us = _time(unchanged, args.repeat)
+        moving_us = _time(moving, args.repeat)
+        print(
+            f"{count:3d} boxes  draw_bbox={redraw_us:7.1f}us  cached={unchanged_us:7.1f}us "
+            f"({redraw_us / unchanged_us:4.1f}x)  tracked={moving_us:7.1f}us ({redraw_us / moving_us:4.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import resample, resample_poly
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processors.resampler import StreamingResampler  # noqa: E402
+
+
+def _packets(signal: np.ndarray, size: int) -> list[np.ndarray]:
+    return [signal[..., start:start + size] for start in range(0, signal.shape[-1], size)]
+
+
+def _per_packet_fft(packets: list[np.ndarray], src_rate: int, dst_rate: int) -> np.ndarray:
+    # What the cry detector did before: mixdown, then an FFT resample of each packet on its own.
+    out = []
+    for packet in packets:
+        mono = packet.mean(axis=0, dtype=np.float32)
+        out.append(resample(mono, max(1, int(len(mono) * dst_rate / src_rate))).astype(np.float32))
+    return np.concatenate(out)
+
+
+def _streaming(packets: list[np.ndarray], src_rate: int, dst_rate: int, channels: int) -> np.ndarray:
+    resampler = StreamingResampler(src_rate, dst_rate, channels)
+    out = [resampler.process(packet) for packet in packets]
+    out.append(resampler.flush())
+    return np.concatenate(out)
+
+
+def _time(fn, repeat: int) -> tuple[float, np.ndarray]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-packet FFT resampling vs the streaming polyphase resampler.")
+    parser.add_argument("--rates", default="48000,44100,24000", help="Comma-separated input rates.")
+    parser.add_argument("--dst-rate", type=int, default=16000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--packet-ms", type=float, default=20.0)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Audio per timing sample.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for src_rate in (int(rate) for rate in args.rates.split(",")):
+        t = np.arange(int(args.seconds * src_rate)) / src_rate
+        tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+        signal = (tone + 0.01 * rng.standard_normal((args.channels, len(t)))).astype(np.float32)
+        packets = _packets(signal, int(src_rate * args.packet_ms / 1000))
+        offline = resample_poly(signal.mean(axis=0, dtype=np.float64), args.dst_rate, src_rate)
+
+        fft_s, fft_out = _time(lambda: _per_packet_fft(packets, src_rate, args.dst_rate), args.repeat)
+        stream_s, stream_out = _time(lambda: _streaming(packets, src_rate, args.dst_rate, args.channels), args.repeat)
+
+        # Error against resampling the whole signal at once (edge artifacts show up here).
+        n = min(len(offline), len(fft_out))
+        fft_err = float(np.max(np.abs(fft_out[:n] - offline[:n])))
+        stream_err = float(np.max(np.abs(stream_out - offline)))
+        print(
+            f"{src_rate:6d} -> {args.dst_rate} Hz x{args.channels}  "
+            f"per-packet FFT={args.seconds / fft_s:7.0f}x realtime (max err {fft_err:.2e})  "
+            f"streaming={args.seconds / stream_s:7.0f}x realtime (max err {stream_err:.2e})  "
+            f"({fft_s / stream_s:4.1f}x faster)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,19 +5,26 @@ import threading
 import time
 import numpy as np
 
+from processors.frame_ring import FrameRef, RingOverrun, SharedFrameRing
+
 class LocalCameraStream:
     """
     A simple wrapper around OpenCV's VideoCapture to provide a continuous stream
     of frames from a local webcam. Runs the capture in a separate thread.
+
+    Frames are captured straight into the slots of a ``SharedFrameRing``;
+    use ``acquire_latest_frame`` for a zero-copy view.
     """
-    def __init__(self, device_id: int = 0, target_fps: int = 30):
+    def __init__(self, device_id: int = 0, target_fps: int = 30, ring_slots: int = 4):
         self.device_id = device_id
         self.target_fps = target_fps
+        self.ring_slots = ring_slots
         self.cap = None
-        self.latest_frame = None
+        self.ring: SharedFrameRing | None = None
         self.is_running = False
         self.thread = None
         self.frame_count = 0
+        self.dropped_frames = 0
 
     def start(self):
         if self.is_running:
@@ -34,27 +41,68 @@ class LocalCameraStream:
 
     def _capture_loop(self):
         frame_time = 1.0 / self.target_fps
+        shape = None
         
         while self.is_running:
             start_time = time.time()
             
-            ret, frame = self.cap.read()
-            if ret:
-                # Store the most recent frame
-                # cv2.read() returns BGR frames
-                self.latest_frame = frame
-                self.frame_count += 1
+            if self.ring is None:
+                # First frame: learn the resolution and size the ring from it.
+                ret, frame = self.cap.read()
+                if ret:
+                    self.ring = SharedFrameRing(self.ring_slots, frame.nbytes)
+                    shape = frame.shape
+                    self.ring.write(frame)
+                    self.frame_count += 1
+            else:
+                try:
+                    slot, view = self.ring.reserve(shape)
+                except RingOverrun:
+                    # Every slot is still held by a reader; skip this frame.
+                    self.cap.grab()
+                    self.dropped_frames += 1
+                    ret = False
+                else:
+                    # cv2.read() decodes BGR directly into the slot when the shape matches.
+                    ret, frame = self.cap.read(view)
+                    if ret and frame is not view and frame.shape != view.shape:
+                        self.ring.abort(slot)
+                        try:
+                            self.ring.write(frame)
+                        except (ValueError, RingOverrun):
+                            self.dropped_frames += 1
+                            ret = False
+                    elif ret:
+                        if frame is not view:
+                            view[...] = frame
+                        self.ring.commit(slot)
+                    else:
+                        self.ring.abort(slot)
+                if ret:
+                    self.frame_count += 1
                 
             elapsed = time.time() - start_time
             sleep_time = max(0, frame_time - elapsed)
             time.sleep(sleep_time)
 
+    def acquire_latest_frame(self) -> FrameRef | None:
+        """
+        Pin the most recently captured frame and return a read-only view of it.
+
+        Release the returned ``FrameRef`` (or use it in a ``with`` block) as
+        soon as you're done so the capture thread can reuse the slot.
+        """
+        if self.ring is None:
+            return None
+        return self.ring.acquire()
+
     def get_latest_frame(self) -> np.ndarray | None:
-        """Return the most recently captured frame."""
-        if self.latest_frame is not None:
-             # Return a copy to avoid threading race conditions on mutation
-            return self.latest_frame.copy()
-        return None
+        """Return a private copy of the most recently captured frame."""
+        ref = self.acquire_latest_frame()
+        if ref is None:
+            return None
+        with ref:
+            return ref.array.copy()
 
     def stop(self):
         self.is_running = False
@@ -62,4 +110,7 @@ class LocalCameraStream:
             self.thread.join(timeout=1.0)
         if self.cap:
             self.cap.release()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
         print("Camera stream stopped.")
\ No newline at end of file
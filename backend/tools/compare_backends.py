@@ -0,0 +1,155 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processors.base import bbox_overlap_ratio  # noqa: E402
+from processors.detections import Detection, DetectionBatch  # noqa: E402
+from processors.model_backends import BACKEND_TORCH, BACKENDS, load_calibration_frames, prepare_weights  # noqa: E402
+
+IOU_MATCH = 0.5
+
+
+def _parser_for(task: str) -> Callable[[Any], DetectionBatch]:
+    if task == "pose":
+        from processors.fall_detection import parse_pose_result
+
+        return lambda result: parse_pose_result(result, fall_ratio_threshold=1.2)
+    from processors.object_detection import parse_object_result
+
+    return parse_object_result
+
+
+def _match(reference: DetectionBatch, candidate: DetectionBatch) -> list[tuple[Detection, Detection, float]]:
+    """Greedy same-label matching at IoU >= 0.5, best overlaps first."""
+    pairs = []
+    for i, ref in enumerate(reference):
+        for j, det in enumerate(candidate):
+            if ref["label"] != det["label"]:
+                continue
+            iou = bbox_overlap_ratio(ref["bbox"], det["bbox"])
+            if iou >= IOU_MATCH:
+                pairs.append((iou, i, j))
+    used_ref, used_det, matches = set(), set(), []
+    for iou, i, j in sorted(pairs, reverse=True):
+        if i in used_ref or j in used_det:
+            continue
+        used_ref.add(i)
+        used_det.add(j)
+        matches.append((reference[i], candidate[j], iou))
+    return matches
+
+
+def _run_backend(
+    weights: str,
+    task: str,
+    frames: list[np.ndarray],
+    conf: float,
+    warmup: int,
+    parse: Callable[[Any], DetectionBatch],
+) -> tuple[list[float], list[DetectionBatch]]:
+    from ultralytics import YOLO
+
+    model = YOLO(weights, task=task)
+    for frame in frames[:warmup]:
+        model(frame, verbose=False, conf=conf, device="cpu")
+    latencies, outputs = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results = model(frame, verbose=False, conf=conf, device="cpu")
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        outputs.append(parse(results[0]))
+    return latencies, outputs
+
+
+def _accuracy(
+    reference: list[DetectionBatch],
+    outputs: list[DetectionBatch],
+) -> dict[str, Any]:
+    ref_total = sum(len(dets) for dets in reference)
+    out_total = sum(len(dets) for dets in outputs)
+    matched, ious, fall_agree = 0, [], 0
+    for ref_dets, out_dets in zip(reference, outputs):
+        for ref, det, iou in _match(ref_dets, out_dets):
+            matched += 1
+            ious.append(iou)
+            fall_agree += int(ref.get("is_falling") == det.get("is_falling"))
+    return {
+        "recall": matched / ref_total if ref_total else 1.0,
+        "precision": matched / out_total if out_total else 1.0,
+        "mean_iou": statistics.fmean(ious) if ious else None,
+        "fall_flag_agreement": fall_agree / matched if matched else None,
+        "detections": out_total,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare YOLO latency and accuracy across torch / onnxruntime / openvino (optionally INT8)."
+    )
+    parser.add_argument("--model", default="yolo11n.pt", help="Source .pt weights.")
+    parser.add_argument("--task", choices=("detect", "pose"), default="detect")
+    parser.add_argument("--frames", required=True, help="Directory of test images (BGR, any size).")
+    parser.add_argument("--calibration", help="INT8 calibration images (defaults to --frames).")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends.")
+    parser.add_argument("--int8", action="store_true", help="Also run INT8 variants of non-torch backends.")
+    parser.add_argument("--limit", type=int, default=100, help="Max test frames.")
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up inferences per backend.")
+    parser.add_argument("--conf", type=float, default=0.5, help="Confidence threshold.")
+    parser.add_argument("--json", action="store_true", help="Emit one JSON line per variant.")
+    args = parser.parse_args()
+
+    frames = load_calibration_frames(args.frames, limit=args.limit)
+    if not frames:
+        print(f"No images found in {args.frames}")
+        return 1
+    calibration = load_calibration_frames(args.calibration or args.frames)
+    parse = _parser_for(args.task)
+
+    variants = [(BACKEND_TORCH, False)]
+    for backend in (name.strip() for name in args.backends.split(",")):
+        if backend == BACKEND_TORCH:
+            continue
+        variants.append((backend, False))
+        if args.int8:
+            variants.append((backend, True))
+
+    # torch fp32 is the accuracy reference for every other variant.
+    reference = None
+    for backend, int8 in variants:
+        label = f"{backend}{'-int8' if int8 else ''}"
+        weights = prepare_weights(args.model, backend, int8=int8, calibration=calibration)
+        latencies, outputs = _run_backend(weights, args.task, frames, args.conf, args.warmup, parse)
+        if reference is None:
+            reference = outputs
+        latencies.sort()
+        row = {
+            "variant": label,
+            "weights": weights,
+            "frames": len(frames),
+            "mean_ms": statistics.fmean(latencies),
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            **_accuracy(reference, outputs),
+        }
+        if args.json:
+            print(json.dumps(row))
+        else:
+            mean_iou = "-" if row["mean_iou"] is None else f"{row['mean_iou']:.3f}"
+            print(
+                f"{label:18s} mean={row['mean_ms']:7.1f}ms p50={row['p50_ms']:7.1f}ms "
+                f"p95={row['p95_ms']:7.1f}ms recall={row['recall']:.3f} "
+                f"precision={row['precision']:.3f} mean_iou={mean_iou}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())